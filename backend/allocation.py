@@ -0,0 +1,58 @@
+# allocation.py
+"""Alokasi bobot target ke lot saham (1 lot = 100 lembar) secara vektor dengan NumPy."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+LOT_SIZE = 100
+ALLOCATION_MODES = ("floor", "greedy")
+
+
+@dataclass(frozen=True)
+class LotAllocation:
+    """Hasil alokasi; semua array sejajar dengan urutan ticker input."""
+    lots: np.ndarray
+    invested: np.ndarray
+    actual_weights: np.ndarray
+    total_invested: float
+    leftover_cash: float
+
+
+def allocate_lots(target_weights, prices, capital: float, mode: str = "floor") -> LotAllocation:
+    """
+    Menghitung jumlah lot, modal terinvestasi, dan bobot aktual dalam satu pass NumPy.
+
+    - `floor`: setiap saham dibulatkan ke bawah ke lot penuh (perilaku awal).
+    - `greedy`: setelah pembulatan ke bawah, sisa kas dipakai membeli satu lot per
+      langkah untuk saham dengan kekurangan nilai terbesar terhadap targetnya yang
+      masih terjangkau (mirip `DiscreteAllocation.greedy_portfolio` di PyPortfolioOpt).
+    """
+    if mode not in ALLOCATION_MODES:
+        raise ValueError(f"Mode alokasi tidak dikenal: {mode}")
+
+    weights = np.asarray(target_weights, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    lot_prices = prices * LOT_SIZE
+    valid = (weights > 0) & np.isfinite(prices) & (prices > 0)
+    safe_lot_prices = np.where(valid, lot_prices, np.inf)
+
+    lots = np.where(valid, np.floor(capital * weights / safe_lot_prices), 0).astype(np.int64)
+    leftover = float(capital - np.dot(lots, np.where(valid, lot_prices, 0.0)))
+
+    if mode == "greedy" and valid.any():
+        target_values = capital * weights
+        while True:
+            affordable = valid & (safe_lot_prices <= leftover + 1e-9)
+            if not affordable.any():
+                break
+            deficit = np.where(affordable, target_values - lots * lot_prices, -np.inf)
+            best = int(np.argmax(deficit))
+            lots[best] += 1
+            leftover -= lot_prices[best]
+
+    invested = np.where(valid, lots * lot_prices, 0.0)
+    total_invested = float(invested.sum())
+    actual_weights = invested / total_invested if total_invested > 0 else np.zeros_like(invested)
+    return LotAllocation(lots=lots, invested=invested, actual_weights=actual_weights,
+                         total_invested=total_invested, leftover_cash=float(capital - total_invested))
@@ -0,0 +1,165 @@
+# backtest.py
+"""Backtest historis: simulasi portofolio ber-lot dengan rebalancing dan re-optimisasi walk-forward."""
+
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from allocation import LOT_SIZE, allocate_lots
+from portfolio_math import sharpe_ratio
+
+TRADING_DAYS_PER_YEAR = 252
+REBALANCE_RULES = ("none", "monthly", "quarterly")
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    """Hasil simulasi; `values`/`drawdowns` sejajar dengan tanggal harga mulai posisi rebalance pertama."""
+    values: np.ndarray
+    drawdowns: np.ndarray
+    rebalance_positions: np.ndarray
+    turnovers: np.ndarray
+    actual_weights: np.ndarray
+    final_cash: float
+
+
+def rebalance_positions(dates: pd.DatetimeIndex, rule: str, start: int) -> np.ndarray:
+    """Posisi hari perdagangan pertama tiap bulan/kuartal mulai `start` (rule `none`: hanya `start`)."""
+    if rule not in REBALANCE_RULES:
+        raise ValueError(f"Aturan rebalance tidak dikenal: {rule}")
+    if rule == "none":
+        return np.array([start])
+    periods = dates.to_period("M" if rule == "monthly" else "Q").asi8
+    first_of_period = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return np.unique(np.r_[start, first_of_period[first_of_period > start]])
+
+
+def walk_forward_weights(returns: np.ndarray, tickers: Sequence[str], positions: Sequence[int],
+                         lookback: int, optimization_target: str) -> np.ndarray:
+    """
+    Bobot optimal di setiap posisi rebalance memakai `lookback` return terakhir sebelum posisi itu.
+
+    `returns[i]` adalah return harian dari harga ke-i ke harga ke-(i+1). Baris NaN berarti
+    solver gagal untuk jendela tersebut.
+    """
+    from pypfopt import expected_returns, risk_models
+
+    from risk_model import solve_portfolio
+
+    weights = np.full((len(positions), len(tickers)), np.nan)
+    for row, position in enumerate(positions):
+        window = pd.DataFrame(returns[position - lookback:position], columns=list(tickers))
+        mu = expected_returns.capm_return(window, returns_data=True)
+        S = risk_models.CovarianceShrinkage(window, returns_data=True).ledoit_wolf()
+        for target in dict.fromkeys((optimization_target, "min_volatility")): # Cadangan jika max_sharpe infeasible
+            try:
+                cleaned_weights, _ = solve_portfolio(mu, S, target)
+            except Exception:
+                continue
+            weights[row] = [cleaned_weights.get(t, 0.0) for t in tickers]
+            break
+    return weights
+
+
+def split_walk_forward(returns: np.ndarray, positions: np.ndarray, lookback: int, n_chunks: int) -> List[tuple]:
+    """Membagi posisi rebalance menjadi potongan berurutan beserta irisan return yang dibutuhkannya."""
+    chunks = []
+    for chunk in np.array_split(positions, max(1, min(n_chunks, len(positions)))):
+        if len(chunk) == 0:
+            continue
+        low = int(chunk[0]) - lookback
+        chunks.append((returns[low:int(chunk[-1])], (chunk - low).tolist()))
+    return chunks
+
+
+def fill_failed_rebalances(weights: np.ndarray) -> np.ndarray:
+    """Rebalance yang gagal dioptimasi memakai bobot sebelumnya (atau bobot sama rata jika yang pertama)."""
+    weights = weights.copy()
+    for row in range(len(weights)):
+        if np.isnan(weights[row]).any():
+            weights[row] = weights[row - 1] if row > 0 else 1.0 / weights.shape[1]
+    return weights
+
+
+def simulate_portfolio(prices: np.ndarray, positions: Sequence[int], weights: np.ndarray,
+                       initial_capital: float) -> BacktestResult:
+    """
+    Simulasi nilai portofolio harian dengan pembulatan lot di setiap rebalance.
+
+    Di setiap posisi rebalance, seluruh nilai portofolio (saham + kas) dialokasikan ulang
+    ke bobot target dalam lot penuh; di antara rebalance jumlah lembar tetap sehingga
+    nilai harian dihitung sekaligus sebagai perkalian matriks harga x lembar.
+    """
+    prices = np.asarray(prices, dtype=float)
+    positions = np.asarray(positions, dtype=int)
+    start = int(positions[0])
+    n_days = prices.shape[0] - start
+    values = np.empty(n_days)
+    shares = np.zeros(prices.shape[1])
+    cash = float(initial_capital)
+    turnovers = np.zeros(len(positions))
+    actual_weights = np.zeros((len(positions), prices.shape[1]))
+
+    bounds = np.r_[positions, prices.shape[0]]
+    for k in range(len(positions)):
+        begin, end = int(bounds[k]), int(bounds[k + 1])
+        price_today = prices[begin]
+        portfolio_value = cash + float(shares @ price_today)
+        allocation = allocate_lots(weights[k], price_today, portfolio_value, mode="floor")
+        new_shares = allocation.lots * LOT_SIZE
+        if k > 0: # Pembelian awal tidak dihitung sebagai turnover
+            turnovers[k] = float(np.abs(new_shares - shares) @ price_today) / (2 * portfolio_value)
+        shares, cash = new_shares, allocation.leftover_cash
+        actual_weights[k] = allocation.invested / portfolio_value if portfolio_value > 0 else 0.0
+        values[begin - start:end - start] = prices[begin:end] @ shares + cash
+
+    drawdowns = values / np.maximum.accumulate(values) - 1
+    return BacktestResult(values=values, drawdowns=drawdowns, rebalance_positions=positions,
+                          turnovers=turnovers, actual_weights=actual_weights, final_cash=cash)
+
+
+def summarize_backtest(result: BacktestResult) -> dict:
+    """Metrik realisasi: return total & tahunan, volatilitas, drawdown maksimum, sharpe, dan turnover."""
+    values = result.values
+    daily_returns = values[1:] / values[:-1] - 1 if len(values) > 1 else np.zeros(0)
+    years = max(len(values) - 1, 1) / TRADING_DAYS_PER_YEAR
+    total_return = float(values[-1] / values[0] - 1)
+    annualized_return = float((values[-1] / values[0]) ** (1 / years) - 1)
+    volatility = float(daily_returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)) if len(daily_returns) > 1 else 0.0
+    return {
+        "total_return": total_return,
+        "annualized_return": annualized_return,
+        "annual_volatility": volatility,
+        "max_drawdown": float(result.drawdowns.min()),
+        "sharpe_ratio": sharpe_ratio(annualized_return, volatility),
+        "annual_turnover": float(result.turnovers.sum() / years),
+    }
+
+
+def format_backtest(result: BacktestResult, dates: pd.DatetimeIndex, tickers: Sequence[str],
+                    initial_capital: float) -> dict:
+    """Menyusun kurva ekuitas, drawdown, dan riwayat rebalance untuk respons API."""
+    start = int(result.rebalance_positions[0])
+    curve_dates = dates[start:].strftime('%Y-%m-%d')
+    tickers = np.asarray(tickers, dtype=object)
+    rebalances = []
+    for k, position in enumerate(result.rebalance_positions):
+        held = result.actual_weights[k] > 0
+        rebalances.append({
+            "date": dates[position].strftime('%Y-%m-%d'),
+            "turnover": float(result.turnovers[k]),
+            "weights": {t: round(float(w), 5) for t, w in zip(tickers[held], result.actual_weights[k][held])},
+        })
+    return {
+        "start_date": curve_dates[0],
+        "end_date": curve_dates[-1],
+        "initial_capital": float(initial_capital),
+        "final_value": float(result.values[-1]),
+        "final_cash": result.final_cash,
+        "metrics": summarize_backtest(result),
+        "rebalances": rebalances,
+        "equity_curve": [{"date": d, "value": float(v), "drawdown": float(dd)}
+                         for d, v, dd in zip(curve_dates, result.values, result.drawdowns)],
+    }
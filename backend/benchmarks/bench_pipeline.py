@@ -0,0 +1,272 @@
+# bench_pipeline.py
+"""
+Benchmark pipeline rekomendasi dengan universe sintetis (tanpa jaringan).
+
+Contoh:
+    cd backend
+    python -m benchmarks.bench_pipeline --sizes 20 100 --years 2 5 --output bench_results.json
+    python -m benchmarks.bench_pipeline --compare bench_baseline.json --tolerance 0.25
+
+Setiap tahap (filter fundamental, mu CAPM, kovarians Ledoit-Wolf, solver, alokasi,
+dan request HTTP end-to-end lewat TestClient) diukur terpisah. Durasi diukur tanpa
+tracemalloc (yang memperlambat alokasi hingga ~2x); memori puncak diukur di satu pass
+tambahan (lewati dengan `--no-memory`).
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from pypfopt import expected_returns, risk_models  # noqa: E402
+from risk_model import solve_portfolio  # noqa: E402
+
+TRADING_DAYS_PER_YEAR = 252
+SECTORS = ['Perbankan', 'Teknologi', 'Konsumsi Primer', 'Energi', 'Infrastruktur', 'Properti']
+BENCH_PAYLOAD = {
+    "initial_capital": 100000000,
+    "investment_goal": "Mengembangkan Kekayaan",
+    "time_horizon": "Antara 8 - 15 tahun",
+    "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+    "preferences": {"sectors": [], "principles": []}
+}
+
+
+# --- Data sintetis ---
+def make_synthetic_universe(n_tickers: int, years: float, seed: int = 42):
+    """Universe sintetis: harga dari model satu faktor (pasar) + noise idiosinkratik, fundamental lolos filter."""
+    rng = np.random.default_rng(seed)
+    n_days = int(years * TRADING_DAYS_PER_YEAR)
+    tickers = [f"S{i:04d}.JK" for i in range(n_tickers)]
+
+    market = rng.normal(0.0, 0.01, size=n_days)
+    market += 0.0005 - market.mean() # Drift realisasi tetap positif agar max_sharpe selalu feasible
+    betas = rng.uniform(0.5, 1.5, size=n_tickers)
+    idio = rng.normal(0.0, 0.015, size=(n_days, n_tickers))
+    log_returns = market[:, None] * betas[None, :] + idio + rng.uniform(0.0, 0.0004, size=n_tickers)
+    prices = rng.uniform(200, 10000, size=n_tickers) * np.exp(np.cumsum(log_returns, axis=0))
+    df_prices = pd.DataFrame(prices, columns=tickers,
+                             index=pd.bdate_range(end=pd.Timestamp('2025-01-03'), periods=n_days))
+
+    df_fundamentals = pd.DataFrame({
+        'company_name': [f"Perusahaan {t}" for t in tickers],
+        'sector': rng.choice(SECTORS, size=n_tickers),
+        'is_syariah': rng.random(n_tickers) < 0.5,
+        'marketCap': rng.uniform(1e12, 5e14, size=n_tickers),
+        'pe_ratio': rng.uniform(-5, 40, size=n_tickers),
+        'roe': rng.uniform(-0.05, 0.35, size=n_tickers),
+        'der': rng.uniform(0.1, 3.0, size=n_tickers),
+    }, index=pd.Index(tickers, name='ticker'))
+    return df_fundamentals, df_prices
+
+
+# --- Pengukuran ---
+@contextmanager
+def measure(results: dict, stage: str, trace_memory: bool = False):
+    """
+    Mencatat durasi (detik) satu tahap, atau dengan `trace_memory` hanya memori puncak
+    Python (MB). Keduanya tidak pernah diukur bersamaan: durasi di bawah tracemalloc tidak
+    mewakili durasi produksi.
+    """
+    entry = results.setdefault(stage, {"seconds": [], "peak_mb": None})
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            entry["peak_mb"] = max(entry["peak_mb"] or 0.0, peak / 1e6)
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry["seconds"].append(time.perf_counter() - started)
+
+
+def _summarize(stages: dict) -> dict:
+    return {
+        stage: {
+            "median_seconds": statistics.median(entry["seconds"]),
+            "min_seconds": min(entry["seconds"]),
+            "max_seconds": max(entry["seconds"]),
+            "peak_mb": round(entry["peak_mb"], 3) if entry["peak_mb"] is not None else None,
+            "runs": len(entry["seconds"]),
+        }
+        for stage, entry in stages.items()
+    }
+
+
+def _run_stages(stages: dict, df_fundamentals, df_prices, optimization_target: str, trace_memory: bool) -> int:
+    """Satu pass seluruh tahap pipeline; mengembalikan jumlah ticker eligible."""
+    preferences = {"sectors": [], "syariah_only": False, "esg_focus": False}
+    with measure(stages, "fundamental_filter", trace_memory):
+        eligible = main.select_eligible_tickers(preferences, df_fundamentals, df_prices)
+    if "error" in eligible:
+        raise RuntimeError(eligible["error"])
+    tickers, df_filtered = eligible["tickers"], eligible["df_prices"]
+
+    with measure(stages, "capm_mu", trace_memory):
+        mu = expected_returns.capm_return(df_filtered)
+    with measure(stages, "ledoit_wolf_cov", trace_memory):
+        S = risk_models.CovarianceShrinkage(df_filtered).ledoit_wolf()
+    with measure(stages, "solver", trace_memory):
+        weights, performance = solve_portfolio(mu, S, optimization_target)
+    with measure(stages, "allocation", trace_memory):
+        main.allocate_portfolio(BENCH_PAYLOAD["initial_capital"], weights, performance,
+                                df_fundamentals, df_filtered)
+    return len(tickers)
+
+
+def bench_stages(df_fundamentals, df_prices, repeats: int, optimization_target: str = "max_sharpe",
+                 memory: bool = True) -> dict:
+    """
+    Mengukur setiap tahap pipeline secara terpisah, di dalam proses yang sama: `repeats`
+    pass untuk durasi, lalu (jika `memory`) satu pass di bawah tracemalloc untuk memori puncak.
+    """
+    stages: dict = {}
+    for _ in range(repeats):
+        n_eligible = _run_stages(stages, df_fundamentals, df_prices, optimization_target, trace_memory=False)
+    if memory:
+        _run_stages(stages, df_fundamentals, df_prices, optimization_target, trace_memory=True)
+    summary = _summarize(stages)
+    summary["_eligible_tickers"] = n_eligible
+    return summary
+
+
+def _reset_caches() -> None:
+    """Mengosongkan semua cache tingkat proses (sama seperti fixture autouse di test_main.py)."""
+    main.market_cache.clear()
+    main.risk_model_registry.clear()
+    main.frontier_cache.clear()
+    main.universe_index_cache.clear()
+    main.backtest_weights_cache.clear()
+    main.response_cache.clear()
+
+
+def bench_http(df_fundamentals, df_prices, repeats: int, memory: bool = True) -> dict:
+    """
+    Request end-to-end lewat TestClient: cold (semua cache & model risiko kosong) lalu warm
+    (data pasar & model risiko sudah di memori). Cache respons dikosongkan sebelum setiap
+    request dan tabel strategi dimatikan agar yang diukur adalah pipeline, bukan hit ETag.
+    Jika `memory`, cold dan warm diulang sekali di bawah tracemalloc setelah pengukuran durasi.
+    """
+    from fastapi.testclient import TestClient
+
+    original_fetch, original_store = main.fetch_yfinance_data, main.price_store
+    original_table = main.strategy_table
+    main.fetch_yfinance_data = lambda tickers: (df_fundamentals, df_prices)
+    main.price_store = None
+    main.strategy_table = None
+    stages: dict = {}
+    try:
+        client = TestClient(main.app)
+        for trace_memory in ([False, True] if memory else [False]):
+            _reset_caches()
+            with measure(stages, "http_cold", trace_memory):
+                response = client.post("/api/v1/recommendations", json=BENCH_PAYLOAD)
+            if response.status_code != 200:
+                raise RuntimeError(f"Request benchmark gagal: {response.status_code} {response.text[:200]}")
+            for _ in range(1 if trace_memory else repeats):
+                main.response_cache.clear()
+                with measure(stages, "http_warm", trace_memory):
+                    client.post("/api/v1/recommendations", json=BENCH_PAYLOAD)
+    finally:
+        main.fetch_yfinance_data, main.price_store = original_fetch, original_store
+        main.strategy_table = original_table
+        _reset_caches()
+    return _summarize(stages)
+
+
+def run_benchmarks(sizes, years_list, repeats: int, http: bool = True, seed: int = 42, memory: bool = True) -> dict:
+    cases = []
+    for n_tickers in sizes:
+        for years in years_list:
+            print(f"[INFO] Benchmark {n_tickers} saham x {years} tahun...", file=sys.stderr)
+            df_fundamentals, df_prices = make_synthetic_universe(n_tickers, years, seed=seed)
+            case = {"n_tickers": n_tickers, "years": years, "n_days": len(df_prices)}
+            case["stages"] = bench_stages(df_fundamentals, df_prices, repeats, memory=memory)
+            case["eligible_tickers"] = case["stages"].pop("_eligible_tickers")
+            if http:
+                case["stages"].update(bench_http(df_fundamentals, df_prices, repeats, memory=memory))
+            cases.append(case)
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "cases": cases,
+    }
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float) -> list:
+    """Daftar regresi: tahap yang median-nya lebih lambat dari baseline melebihi `tolerance` (rasio)."""
+    def index(result):
+        return {(c["n_tickers"], c["years"]): c["stages"] for c in result["cases"]}
+
+    regressions = []
+    baseline_cases = index(baseline)
+    for key, stages in index(current).items():
+        for stage, stats in stages.items():
+            base = baseline_cases.get(key, {}).get(stage)
+            if base is None or base["median_seconds"] <= 0:
+                continue
+            ratio = stats["median_seconds"] / base["median_seconds"]
+            if ratio > 1 + tolerance:
+                regressions.append({"n_tickers": key[0], "years": key[1], "stage": stage,
+                                    "baseline_seconds": base["median_seconds"],
+                                    "current_seconds": stats["median_seconds"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline rekomendasi RoboKaya (data sintetis, offline).")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 500, 1000], help="Jumlah saham per universe")
+    parser.add_argument("--years", type=float, nargs="+", default=[2, 5, 10], help="Panjang riwayat harga (tahun)")
+    parser.add_argument("--repeats", type=int, default=3, help="Jumlah pengulangan per tahap")
+    parser.add_argument("--no-http", action="store_true", help="Lewati benchmark HTTP end-to-end")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Lewati pass tracemalloc untuk memori puncak (durasi tidak terpengaruh)")
+    parser.add_argument("--output", default="bench_results.json", help="File hasil JSON")
+    parser.add_argument("--compare", help="File hasil baseline untuk deteksi regresi")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Toleransi perlambatan relatif (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.years, args.repeats, http=not args.no_http, memory=not args.no_memory)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Hasil benchmark ditulis ke {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_results(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"[REGRESI] {r['n_tickers']} saham x {r['years']} tahun, {r['stage']}: "
+                  f"{r['baseline_seconds']:.4f}s -> {r['current_seconds']:.4f}s (x{r['ratio']})", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,88 @@
+# concurrent_fetch.py
+"""Helper untuk menjalankan pemanggilan I/O per item secara paralel dengan batas konkurensi."""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+# Interval polling untuk memeriksa item yang melewati batas waktu
+_POLL_INTERVAL_SECONDS = 0.05
+
+
+def map_concurrently(
+    fn: Callable,
+    items: Iterable[Hashable],
+    max_workers: int,
+    timeout: Optional[float] = None,
+    retries: int = 0,
+    backoff: float = 0.5,
+    sleep: Callable[[float], None] = time.sleep,
+    acquire: Optional[Callable[[], None]] = None,
+) -> Tuple[Dict, Dict]:
+    """
+    Menjalankan `fn(item)` untuk setiap item di thread pool berukuran `max_workers`.
+
+    - `timeout`: batas waktu total per item (termasuk retry), dihitung sejak item mulai diproses.
+    - `retries`: jumlah percobaan ulang per item jika `fn` melempar exception,
+      dengan jeda eksponensial `backoff * 2**attempt`.
+    - `acquire`: dipanggil sebelum setiap percobaan (mis. menunggu token rate limit);
+      waktu menunggunya tidak dihitung dalam `timeout`.
+
+    Mengembalikan `(results, errors)`: dict item -> hasil untuk yang berhasil dan
+    dict item -> exception untuk yang gagal/timeout. Kegagalan satu item tidak
+    menghentikan item lain.
+    """
+    items = list(dict.fromkeys(items))
+    results: Dict = {}
+    errors: Dict = {}
+    if not items:
+        return results, errors
+
+    started_at: Dict = {}
+
+    def run(item):
+        spent = 0.0 # Waktu yang sudah terpakai pada percobaan sebelumnya
+        attempt = 0
+        while True:
+            if acquire is not None:
+                started_at.pop(item, None) # Jam timeout berhenti selama menunggu izin
+                acquire()
+            started_at[item] = time.monotonic() - spent
+            try:
+                return fn(item)
+            except Exception:
+                if attempt >= retries:
+                    raise
+                delay = backoff * (2 ** attempt)
+                if timeout is not None and time.monotonic() - started_at[item] + delay >= timeout:
+                    raise
+                attempt += 1
+                sleep(delay)
+                spent = time.monotonic() - started_at[item]
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))),
+                                  thread_name_prefix="fetch")
+    futures = {executor.submit(run, item): item for item in items}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=None if timeout is None else _POLL_INTERVAL_SECONDS,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                item = futures[future]
+                try:
+                    results[item] = future.result()
+                except Exception as e:
+                    errors[item] = e
+
+            if timeout is not None and pending:
+                now = time.monotonic()
+                expired = {f for f in pending
+                           if futures[f] in started_at and now - started_at[futures[f]] >= timeout}
+                for future in expired:
+                    # Thread yang sudah berjalan tidak bisa dihentikan paksa; hasilnya diabaikan.
+                    errors[futures[future]] = TimeoutError(f"melebihi batas waktu {timeout:g} detik")
+                pending -= expired
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results, errors
@@ -0,0 +1,175 @@
+# executor.py
+"""Lapisan eksekusi: I/O & orkestrasi di thread pool, optimisasi CPU-bound di process pool."""
+
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+
+
+class QueueFullError(Exception):
+    """Dilempar saat jumlah pekerjaan yang sedang berjalan/antre sudah mencapai batas."""
+
+
+class ExecutionTimeoutError(Exception):
+    """Dilempar saat pekerjaan melewati batas waktu yang ditentukan."""
+
+
+class ExecutionCancelledError(Exception):
+    """Dilempar saat pemanggil membatalkan pekerjaan (mis. klien streaming terputus)."""
+
+# Interval pengecekan event pembatalan selama menunggu hasil process pool
+CANCEL_POLL_SECONDS = 0.05
+
+
+def _warm_worker() -> int:
+    """Dijalankan sekali di tiap proses worker agar import & kompilasi pypfopt/cvxpy tidak dibayar request pertama."""
+    from risk_model import warm_solver
+    warm_solver()
+    return os.getpid()
+
+
+class ExecutionLayer:
+    """
+    Memisahkan pekerjaan dari event loop uvicorn.
+
+    - `run_io`: menjalankan fungsi blocking (fetch data, orkestrasi pipeline) di thread pool,
+      dengan backpressure (`QueueFullError` jika antrean penuh) dan batas waktu per request.
+    - `run_cpu`: menjalankan fungsi CPU-bound (solver cvxpy) di process pool berukuran
+      sebanyak core, sehingga request serentak tersebar ke banyak core. `cpu_workers=0`
+      menjalankan fungsi langsung di thread pemanggil.
+    """
+
+    def __init__(self, io_workers: int, cpu_workers: int, max_pending: int):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers
+        self.max_pending = max_pending
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._admission_lock = threading.Lock()
+        self._in_flight = 0
+
+    # --- Pool (dibuat saat pertama dipakai) ---
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="request")
+            return self._io_pool
+
+    @property
+    def cpu_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.cpu_workers <= 0:
+            return None
+        with self._pool_lock:
+            if self._cpu_pool is None:
+                # forkserver: worker tidak mewarisi thread milik server (aman dibanding fork)
+                self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                                     mp_context=multiprocessing.get_context("forkserver"))
+            return self._cpu_pool
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    # --- Backpressure ---
+    def _admit(self) -> None:
+        with self._admission_lock:
+            if self._in_flight >= self.max_pending:
+                raise QueueFullError(f"Antrean penuh ({self._in_flight}/{self.max_pending} pekerjaan).")
+            self._in_flight += 1
+
+    def _release(self, _future: Optional[Future] = None) -> None:
+        with self._admission_lock:
+            self._in_flight -= 1
+
+    # --- Eksekusi ---
+    async def run_io(self, fn: Callable, *args, timeout: Optional[float] = None):
+        """
+        Menjalankan `fn(*args)` di thread pool tanpa memblokir event loop.
+
+        Slot antrean baru dilepas ketika fungsi benar-benar selesai (bukan saat timeout),
+        sehingga pekerjaan yang masih berjalan tetap dihitung dalam backpressure.
+        """
+        self._admit()
+        try:
+            # Salin contextvars agar span yang dicatat di thread pekerja masuk ke request pemanggil
+            future = self.io_pool.submit(contextvars.copy_context().run, fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise ExecutionTimeoutError(f"Pekerjaan melewati batas waktu {timeout:g} detik.") from None
+
+    def run_cpu(self, fn: Callable, *args, timeout: Optional[float] = None,
+                cancelled: Optional[threading.Event] = None):
+        """
+        Menjalankan `fn(*args)` di process pool dan menunggu hasilnya (dipanggil dari thread worker).
+        `fn` harus fungsi tingkat modul yang murni (tanpa state global): ia di-pickle ke proses worker.
+
+        Jika `cancelled` di-set selama menunggu, pekerjaan yang belum mulai dibatalkan dan
+        `ExecutionCancelledError` dilempar; solve yang sudah berjalan di proses worker
+        diselesaikan di sana tetapi hasilnya dibuang.
+        """
+        pool = self.cpu_pool
+        if pool is None:
+            return fn(*args)
+        future = pool.submit(fn, *args)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                if cancelled is not None and cancelled.is_set():
+                    future.cancel()
+                    raise ExecutionCancelledError("Optimisasi dibatalkan oleh pemanggil.")
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                wait = remaining if cancelled is None else min(CANCEL_POLL_SECONDS, remaining or CANCEL_POLL_SECONDS)
+                try:
+                    return future.result(timeout=wait)
+                except FutureTimeoutError:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise
+        except FutureTimeoutError:
+            future.cancel()
+            raise ExecutionTimeoutError(f"Optimisasi melewati batas waktu {timeout:g} detik.") from None
+
+    def map_cpu(self, fn: Callable, arg_tuples, timeout: Optional[float] = None) -> list:
+        """Menjalankan `fn(*args)` untuk setiap tuple argumen secara paralel di process pool (urutan dipertahankan)."""
+        pool = self.cpu_pool
+        if pool is None:
+            return [fn(*args) for args in arg_tuples]
+        futures = [pool.submit(fn, *args) for args in arg_tuples]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            return [future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                    for future in futures]
+        except FutureTimeoutError:
+            for future in futures:
+                future.cancel()
+            raise ExecutionTimeoutError(f"Optimisasi melewati batas waktu {timeout:g} detik.") from None
+
+    def warm_up(self) -> None:
+        """Memulai semua proses worker dan memuat pustaka solver di dalamnya."""
+        pool = self.cpu_pool
+        if pool is None:
+            return
+        futures = [pool.submit(_warm_worker) for _ in range(self.cpu_workers)]
+        for future in futures:
+            future.result()
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._io_pool is not None:
+                self._io_pool.shutdown(wait=False, cancel_futures=True)
+                self._io_pool = None
+            if self._cpu_pool is not None:
+                self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+                self._cpu_pool = None
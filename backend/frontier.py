@@ -0,0 +1,117 @@
+# frontier.py
+"""Efficient frontier: sweep target return pada satu masalah cvxpy terparameterisasi."""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from portfolio_math import WEIGHT_CUTOFF, portfolio_performance
+
+# Urutan solver yang dicoba per titik frontier
+FRONTIER_SOLVERS = ("CLARABEL", "OSQP")
+
+
+class FrontierProblem:
+    """
+    Masalah min-varians long-only dengan target return sebagai `cp.Parameter`.
+
+    Masalah dikompilasi sekali (DPP); setiap titik frontier hanya mengganti nilai
+    parameter dan menyelesaikan ulang, tanpa membangun ulang masalah. Solver dicoba
+    berurutan (`FRONTIER_SOLVERS`): CLARABEL (interior point) stabil hingga dekat
+    return maksimum, tempat OSQP sering berhenti di `optimal_inaccurate`.
+    """
+
+    def __init__(self, mu: np.ndarray, S: np.ndarray, solvers: Sequence[str] = FRONTIER_SOLVERS):
+        import cvxpy as cp # Impor lambat: cvxpy hanya dibutuhkan saat frontier dihitung
+
+        self.mu = np.asarray(mu, dtype=float)
+        self.S = np.asarray(S, dtype=float)
+        self.solvers = [s for s in solvers if s in cp.installed_solvers()]
+        if not self.solvers:
+            raise ValueError(f"Tidak ada solver frontier yang terpasang (butuh salah satu: {', '.join(solvers)}).")
+        n = len(self.mu)
+        self.weights = cp.Variable(n)
+        self.target_return = cp.Parameter(name="target_return")
+        self.problem = cp.Problem(
+            cp.Minimize(cp.quad_form(self.weights, cp.psd_wrap(self.S))),
+            [cp.sum(self.weights) == 1, self.weights >= 0, self.mu @ self.weights >= self.target_return],
+        )
+
+    def solve(self, target_return: float) -> Optional[np.ndarray]:
+        """Bobot min-varians untuk target return tertentu; None jika tidak feasible di semua solver."""
+        import cvxpy as cp
+
+        self.target_return.value = float(target_return)
+        for solver in self.solvers:
+            try:
+                self.problem.solve(solver=solver, warm_start=True)
+            except cp.error.SolverError:
+                continue
+            if self.problem.status == cp.OPTIMAL and self.weights.value is not None:
+                weights = np.clip(self.weights.value, 0, None)
+                return weights / weights.sum()
+        return None
+
+
+def max_return_weights(mu: np.ndarray, S: np.ndarray) -> np.ndarray:
+    """
+    Ujung atas frontier secara analitik: seluruh bobot pada aset dengan return tertinggi
+    (jika seri, aset dengan varians terkecil). Solver numerik sering gagal tepat di titik ini.
+    """
+    candidates = np.flatnonzero(mu >= mu.max() - 1e-12)
+    weights = np.zeros(len(mu))
+    weights[candidates[np.argmin(np.diag(S)[candidates])]] = 1.0
+    return weights
+
+
+def _point(tickers: Sequence[str], weights: np.ndarray, mu: np.ndarray, S: np.ndarray, target_return: float) -> dict:
+    expected_return, volatility, sharpe = portfolio_performance(weights, mu, S)
+    clean = {t: round(float(w), 5) for t, w in zip(tickers, weights) if w >= WEIGHT_CUTOFF}
+    return {
+        "target_return": float(target_return),
+        "expected_annual_return": expected_return,
+        "annual_volatility": volatility,
+        "sharpe_ratio": sharpe,
+        "weights": clean,
+    }
+
+
+def compute_frontier(tickers: Sequence[str], mu: np.ndarray, S: np.ndarray, n_points: int) -> Dict:
+    """
+    Menghitung tepat `n_points` titik frontier dari portofolio volatilitas minimum hingga
+    return aset tertinggi.
+
+    Kedua ujung tidak membutuhkan sweep (min-varians global dan aset return tertinggi);
+    titik di antaranya masing-masing satu solve, sekitar 10 ms untuk 100 aset (50 titik
+    ~0.5 detik). Melempar ValueError jika ada titik yang gagal diselesaikan, alih-alih
+    mengembalikan frontier yang bolong.
+    """
+    mu = np.asarray(mu, dtype=float)
+    S = np.asarray(S, dtype=float)
+    problem = FrontierProblem(mu, S)
+
+    # Target di bawah return terendah = kendala tidak aktif -> portofolio volatilitas minimum global
+    min_vol_weights = problem.solve(float(mu.min()) - 1.0)
+    if min_vol_weights is None:
+        raise ValueError("Solver gagal menemukan portofolio volatilitas minimum.")
+    max_return = max_return_weights(mu, S)
+    low = float(mu @ min_vol_weights)
+    high = float(mu @ max_return)
+
+    targets = np.linspace(low, high, n_points)
+    weights_per_target: List[np.ndarray] = [min_vol_weights]
+    failed: List[float] = []
+    for target in targets[1:-1]:
+        # Portofolio min-varians sudah mencapai return maksimum: seluruh frontier adalah satu titik
+        weights = min_vol_weights if high - low <= 1e-9 else problem.solve(target)
+        if weights is None:
+            failed.append(float(target))
+        weights_per_target.append(weights)
+    if failed:
+        raise ValueError(f"Solver gagal pada {len(failed)} dari {n_points} titik frontier "
+                         f"(target return: {', '.join(f'{t:.4f}' for t in failed)}).")
+    weights_per_target.append(max_return if high > low else min_vol_weights)
+
+    points = [_point(tickers, w, mu, S, t) for w, t in zip(weights_per_target, targets)]
+    max_sharpe_index = int(np.argmax([p["sharpe_ratio"] for p in points]))
+    return {"points": points, "min_volatility_index": 0, "max_sharpe_index": max_sharpe_index}
@@ -1,17 +1,51 @@
 # main.py
 
 # --- 1. Imports ---
-import uvicorn
+import time
+IMPORT_STARTED_AT = time.perf_counter() # Acuan pengukuran startup: durasi import, siap, dan respons pertama
+import os
+import logging
 import json
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Literal, Optional
 from datetime import datetime, timedelta
 
-from pypfopt import EfficientFrontier, risk_models, expected_returns
+from allocation import LOT_SIZE, allocate_lots
+from backtest import (REBALANCE_RULES, fill_failed_rebalances, format_backtest, rebalance_positions,
+                      simulate_portfolio, split_walk_forward, walk_forward_weights)
+from concurrent_fetch import map_concurrently
+from executor import ExecutionCancelledError, ExecutionLayer, ExecutionTimeoutError, QueueFullError
+from frontier import compute_frontier
+from lru import LRUCache
+from market_cache import MarketDataCache
+from metrics import (REGISTRY, HTTP_REQUEST_SECONDS, CACHE_EVENTS, TICKERS_DROPPED, SOLVER_FAILURES,
+                     span, start_request_timing, reset_request_timing, format_timing_header)
+from portfolio_math import portfolio_performance
+from price_store import PriceStore
+from progress import (PipelineCancelled, ProgressReporter, cancellation_event, format_sse, report_progress,
+                      reset_progress, start_progress)
+from providers import create_provider
+from response_cache import ResponseCache, SQLiteResponseStore, canonical_request_hash, etag_matches, make_etag
+from risk_model import RiskModelRegistry, UniverseRiskModel, solve_portfolio, warm_solver
+from shared_snapshot import LeaderLock, SharedSnapshotStore
+from sparse import prescreen_candidates, prune_to_cardinality
+from simulation import HORIZON_YEARS, simulate_wealth
+from strategy_table import StrategyTable, build_strategy_table, table_combinations
+from universe import UniverseIndex, load_universe
+from upstream_scheduler import UpstreamScheduler
+
+# Logging berlevel: ROBOKAYA_LOG_LEVEL=WARNING untuk membungkam log per request di produksi
+LOG_LEVEL = os.getenv("ROBOKAYA_LOG_LEVEL", "INFO").upper()
+logging.basicConfig(format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+logging.getLogger("robokaya").setLevel(LOG_LEVEL)
+logger = logging.getLogger("robokaya")
 
 # --- 2. Pydantic Models (Definisi Input API) ---
 class RiskAnswers(BaseModel):
@@ -29,105 +63,443 @@ class PortfolioRequest(BaseModel):
     time_horizon: str
     risk_answers: RiskAnswers
     preferences: Preferences
+    # "floor": bulatkan ke bawah per saham; "greedy": sisa kas dibelikan lot tambahan
+    allocation_mode: Literal["floor", "greedy"] = "floor"
+    # Target nilai portofolio (Rp) di akhir horizon, untuk simulasi peluang tercapainya tujuan
+    goal_amount: Optional[float] = None
+    # Mode sparse: paling banyak K saham, masing-masing minimal satu lot (untuk universe besar / modal kecil)
+    max_holdings: Optional[int] = Field(None, ge=1, le=100)
 
 # --- 3. Konstanta dan Helper ---
-# Dalam aplikasi nyata, ini bisa diambil dari file konfigurasi atau database
-SYARIAH_MAPPING = {
-    'BBCA.JK': False, 'BMRI.JK': True, 'TLKM.JK': False, 'ASII.JK': False,
-    'UNVR.JK': True, 'GOTO.JK': False, 'ARTO.JK': False, 'MDKA.JK': True,
-    'ICBP.JK': True, 'BBNI.JK': False, 'BRIS.JK': True, 'ANTM.JK': True,
-    'PGAS.JK': True, 'ADRO.JK': True, 'KLBF.JK': False, 'ACES.JK': True,
-    'INDF.JK': True, 'PTBA.JK': True, 'CPIN.JK': True, 'EXCL.JK': True
-}
-# Untuk pengujian, Anda bisa memulai dengan daftar ticker yang lebih sedikit
-# TICKERS_TO_ANALYZE = ['BBCA.JK', 'BMRI.JK', 'TLKM.JK', 'ASII.JK', 'UNVR.JK']
-TICKERS_TO_ANALYZE = list(SYARIAH_MAPPING.keys())
+# Daftar saham (ticker, nama, sektor, status syariah) dibaca dari file CSV. Arahkan
+# ROBOKAYA_UNIVERSE_FILE ke daftar lengkap IDX (atau daftar kecil untuk pengujian).
+UNIVERSE_FILE = os.getenv("ROBOKAYA_UNIVERSE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "universe.csv"))
+UNIVERSE = load_universe(UNIVERSE_FILE)
+SYARIAH_MAPPING = UNIVERSE['is_syariah'].to_dict()
+TICKERS_TO_ANALYZE = UNIVERSE.index.tolist()
+
+# Masa berlaku cache data pasar (detik). Harga diperbarui harian, fundamental mingguan.
+PRICE_CACHE_TTL_SECONDS = float(os.getenv("ROBOKAYA_PRICE_TTL_SECONDS", 24 * 3600))
+FUNDAMENTALS_CACHE_TTL_SECONDS = float(os.getenv("ROBOKAYA_FUNDAMENTALS_TTL_SECONDS", 7 * 24 * 3600))
+# Batas data basi yang masih boleh disajikan sambil menunggu pembaruan latar belakang
+MARKET_DATA_MAX_STALE_SECONDS = float(os.getenv("ROBOKAYA_MAX_STALE_SECONDS", 3 * 24 * 3600))
+# Pembaruan harga inkremental mengunduh ulang beberapa hari tersimpan terakhir. Harga `Close` Yahoo
+# disesuaikan (split/dividen); jika hari tumpang-tindih berbeda lebih dari toleransi relatif, riwayat
+# ticker itu sudah disesuaikan ulang dan diunduh penuh
+PRICE_OVERLAP_DAYS = int(os.getenv("ROBOKAYA_PRICE_OVERLAP_DAYS", 5))
+PRICE_ADJUSTMENT_TOLERANCE = float(os.getenv("ROBOKAYA_PRICE_ADJUSTMENT_TOLERANCE", 1e-4))
+# Interval pengecekan task pembaruan latar belakang
+MARKET_DATA_REFRESH_INTERVAL_SECONDS = float(os.getenv("ROBOKAYA_REFRESH_INTERVAL_SECONDS", 15 * 60))
+
+# Penarikan fundamental paralel: jumlah request serentak ke Yahoo, batas waktu per ticker, dan retry
+FUNDAMENTALS_FETCH_CONCURRENCY = int(os.getenv("ROBOKAYA_FUNDAMENTALS_CONCURRENCY", 8))
+FUNDAMENTALS_FETCH_TIMEOUT_SECONDS = float(os.getenv("ROBOKAYA_FUNDAMENTALS_TIMEOUT_SECONDS", 20))
+FUNDAMENTALS_FETCH_RETRIES = int(os.getenv("ROBOKAYA_FUNDAMENTALS_RETRIES", 2))
+FUNDAMENTALS_FETCH_BACKOFF_SECONDS = float(os.getenv("ROBOKAYA_FUNDAMENTALS_BACKOFF_SECONDS", 0.5))
+
+# Direktori penyimpanan data pasar di disk (kosongkan ROBOKAYA_DATA_DIR="" untuk menonaktifkan)
+DATA_DIR = os.getenv("ROBOKAYA_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data"))
+price_store = PriceStore(DATA_DIR) if DATA_DIR else None
+
+# Sumber data pasar: "yfinance" (live, cadangan ke rekaman/snapshot terakhir), "replay" (rekaman lokal,
+# tanpa jaringan), atau "record" (live sambil merekam ke ROBOKAYA_RECORDINGS_DIR)
+DATA_PROVIDER = os.getenv("ROBOKAYA_DATA_PROVIDER", "yfinance")
+RECORDINGS_DIR = os.getenv("ROBOKAYA_RECORDINGS_DIR", os.path.join(DATA_DIR, "recordings") if DATA_DIR else "")
+
+# Batas laju panggilan ke Yahoo (token/detik dan burst). Untuk fundamental, token diambil sebelum jam
+# ROBOKAYA_FUNDAMENTALS_TIMEOUT_SECONDS per ticker berjalan: antrean rate limit tidak membuat ticker timeout,
+# hanya memperpanjang penarikan total (~jumlah ticker / rate detik)
+UPSTREAM_RATE_PER_SECOND = float(os.getenv("ROBOKAYA_UPSTREAM_RATE", 5))
+UPSTREAM_BURST = int(os.getenv("ROBOKAYA_UPSTREAM_BURST", 10))
+upstream_scheduler = UpstreamScheduler(UPSTREAM_RATE_PER_SECOND, UPSTREAM_BURST)
+REGISTRY.gauge("robokaya_upstream_queue_depth", "Pemanggil yang sedang menunggu panggilan ke Yahoo.",
+               lambda: upstream_scheduler.queue_depth)
+market_data_provider = create_provider(DATA_PROVIDER, RECORDINGS_DIR, snapshot_dir=DATA_DIR,
+                                       scheduler=upstream_scheduler)
+
+# Mode multi-worker (`python main.py` dengan ROBOKAYA_WORKERS>1): satu worker pemimpin menarik data dan
+# mempublikasikan snapshot ke ROBOKAYA_SHARED_SNAPSHOT_DIR; worker lain memetakannya (mmap) tanpa menghubungi Yahoo
+WORKERS = int(os.getenv("ROBOKAYA_WORKERS", 1))
+SHARED_SNAPSHOT_DIR = os.getenv("ROBOKAYA_SHARED_SNAPSHOT_DIR", "")
+SNAPSHOT_POLL_INTERVAL_SECONDS = float(os.getenv("ROBOKAYA_SNAPSHOT_POLL_SECONDS", 5))
+shared_snapshots = SharedSnapshotStore(SHARED_SNAPSHOT_DIR) if SHARED_SNAPSHOT_DIR else None
+leader_lock = LeaderLock(os.path.join(SHARED_SNAPSHOT_DIR, "leader.lock")) if SHARED_SNAPSHOT_DIR else None
+
+# Lapisan eksekusi: ukuran pool, batas antrean (backpressure), dan batas waktu
+REQUEST_WORKER_THREADS = int(os.getenv("ROBOKAYA_REQUEST_THREADS", 16))
+OPTIMIZER_PROCESSES = int(os.getenv("ROBOKAYA_OPTIMIZER_PROCESSES", os.cpu_count() or 1))
+MAX_PENDING_REQUESTS = int(os.getenv("ROBOKAYA_MAX_PENDING_REQUESTS", 64))
+RECOMMENDATION_TIMEOUT_SECONDS = float(os.getenv("ROBOKAYA_REQUEST_TIMEOUT_SECONDS", 120))
+SOLVER_TIMEOUT_SECONDS = float(os.getenv("ROBOKAYA_SOLVER_TIMEOUT_SECONDS", 30))
+# Jumlah profil maksimal per request batch
+MAX_BATCH_SIZE = int(os.getenv("ROBOKAYA_MAX_BATCH_SIZE", 1000))
+# Efficient frontier: jumlah titik maksimal per request dan jumlah frontier yang di-cache
+MAX_FRONTIER_POINTS = int(os.getenv("ROBOKAYA_MAX_FRONTIER_POINTS", 200))
+FRONTIER_CACHE_SIZE = int(os.getenv("ROBOKAYA_FRONTIER_CACHE_SIZE", 128))
+# Backtest: batas waktu seluruh re-optimisasi walk-forward dan jumlah hasil bobot yang di-cache
+BACKTEST_TIMEOUT_SECONDS = float(os.getenv("ROBOKAYA_BACKTEST_TIMEOUT_SECONDS", 90))
+BACKTEST_CACHE_SIZE = int(os.getenv("ROBOKAYA_BACKTEST_CACHE_SIZE", 64))
+# Cache respons rekomendasi: jumlah entri per proses dan file SQLite opsional yang dibagi antar worker
+RESPONSE_CACHE_SIZE = int(os.getenv("ROBOKAYA_RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_DB = os.getenv("ROBOKAYA_RESPONSE_CACHE_DB")
+# Simulasi Monte Carlo: jumlah jalur maksimal dan batas waktu di process pool
+MAX_SIMULATION_PATHS = int(os.getenv("ROBOKAYA_MAX_SIMULATION_PATHS", 100_000))
+SIMULATION_TIMEOUT_SECONDS = float(os.getenv("ROBOKAYA_SIMULATION_TIMEOUT_SECONDS", 5))
+# Tabel strategi prakomputasi per snapshot (ROBOKAYA_STRATEGY_TABLE=0 untuk menonaktifkan) dan
+# ukuran maksimal himpunan sektor yang ikut diprakomputasi (0 = hanya "semua sektor")
+STRATEGY_TABLE_ENABLED = os.getenv("ROBOKAYA_STRATEGY_TABLE", "1").lower() not in ("0", "false", "no")
+STRATEGY_TABLE_MAX_SECTORS = int(os.getenv("ROBOKAYA_STRATEGY_TABLE_MAX_SECTORS", 1))
+OPTIMIZATION_TARGETS = ("max_sharpe", "min_volatility")
+# Header X-Timing (durasi per tahap) pada setiap respons, untuk debugging latensi
+TIMING_HEADER_ENABLED = os.getenv("ROBOKAYA_TIMING_HEADER", "").lower() in ("1", "true", "yes")
 
 
 # --- 4. Fungsi Inti ---
-def fetch_yfinance_data(tickers: list):
-    """Menarik data fundamental dan harga historis dari Yahoo Finance."""
-    print("--- Memulai Penarikan Data Pasar ---")
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=2 * 365 + 60) # 2 tahun + buffer
-    
-    print(f"[INFO] Menarik data harga untuk {len(tickers)} saham dari {start_date.strftime('%Y-%m-%d')} hingga {end_date.strftime('%Y-%m-%d')}...")
-    df_prices_raw = yf.download(tickers, start=start_date, end=end_date, interval="1d", progress=False)
-    
-    if df_prices_raw.empty:
-        print("[ERROR] Gagal mengunduh data harga awal. DataFrame mentah kosong.")
-        return None, None
+def _price_window_start(end_date: datetime) -> datetime:
+    """Tanggal awal jendela data harga (2 tahun + buffer)."""
+    return end_date - timedelta(days=2 * 365 + 60)
+
+def download_price_data(tickers: list, start_date: datetime, end_date: datetime):
+    """Mengunduh harga penutupan harian mentah (belum dibersihkan) dari provider data pasar."""
+    logger.info("Menarik data harga untuk %s saham dari %s hingga %s (provider %s)...", len(tickers), start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'), market_data_provider.name)
+    df_prices = market_data_provider.download_close(tickers, start_date, end_date)
 
-    df_prices = df_prices_raw.get('Close')
     if df_prices is None or df_prices.empty:
-        print("[ERROR] Kolom 'Close' tidak ditemukan atau DataFrame harga kosong setelah memilih 'Close'.")
-        return None, None
-    
-    # Jika hanya satu ticker, yf.download mungkin mengembalikan Series, ubah ke DataFrame
-    if isinstance(df_prices, pd.Series):
-        df_prices = df_prices.to_frame(name=tickers[0] if len(tickers) == 1 else 'PRICE_DATA')
+        logger.warning("Data harga penutupan kosong untuk rentang tanggal ini.")
+        return None
 
-    df_prices = df_prices.copy() 
+    logger.info("Data harga mentah diunduh untuk %s saham.", len(df_prices.columns))
+    return df_prices.copy()
 
-    print(f"[INFO] Data harga mentah diunduh untuk {len(df_prices.columns)} saham.")
-    df_prices.dropna(axis=1, how='all', inplace=True) 
-    df_prices = df_prices.loc[:, df_prices.isnull().mean() < 0.1]
+def clean_price_data(df_prices: pd.DataFrame):
+    """Membuang saham tanpa data atau dengan data harga kosong >= 10%."""
+    null_ratio = df_prices.isnull().mean()
+    keep_columns = (null_ratio < 0.1) & (null_ratio < 1.0)
+    if not keep_columns.all(): # Tanpa salinan jika semua kolom lolos (menjaga matriks memory-mapped)
+        TICKERS_DROPPED.inc(int((~keep_columns).sum()), stage="price_cleaning", reason="missing_prices")
+        df_prices = df_prices.loc[:, keep_columns]
     
     if df_prices.empty:
-        print("[ERROR] Tidak ada saham dengan data harga yang cukup setelah cleaning awal.")
-        return None, None
-    print(f"[INFO] Jumlah saham dengan data harga valid setelah cleaning awal: {len(df_prices.columns)}")
+        logger.error("Tidak ada saham dengan data harga yang cukup setelah cleaning awal.")
+        return None
+    logger.info("Jumlah saham dengan data harga valid setelah cleaning awal: %s", len(df_prices.columns))
+    return df_prices
+
+def find_readjusted_tickers(df_stored: pd.DataFrame, df_new: pd.DataFrame,
+                            tolerance: float = PRICE_ADJUSTMENT_TOLERANCE) -> list:
+    """Ticker yang harganya pada tanggal tumpang-tindih berbeda dari yang tersimpan (riwayat disesuaikan ulang)."""
+    overlap = df_new.index.intersection(df_stored.index)
+    columns = df_new.columns.intersection(df_stored.columns)
+    if overlap.empty or columns.empty:
+        return []
+    relative_change = (df_new.loc[overlap, columns] / df_stored.loc[overlap, columns] - 1).abs()
+    return columns[(relative_change > tolerance).any().to_numpy()].tolist()
+
+def fetch_price_data(tickers: list):
+    """
+    Menarik data harga penutupan historis dan membersihkannya.
+
+    Jika `price_store` aktif dan sudah berisi ticker yang sama, hanya hari setelah
+    tanggal tersimpan terakhir (ditambah `PRICE_OVERLAP_DAYS` hari tersimpan untuk
+    pembanding) yang diunduh lalu ditambahkan ke matriks yang ada. Ticker yang harga
+    tumpang-tindihnya berubah (split/dividen menyesuaikan ulang riwayat Yahoo) diunduh penuh.
+    """
+    end_date = datetime.now()
+    window_start = _price_window_start(end_date)
+    start_date = window_start
+    df_stored = None
+
+    stored = price_store.load_prices() if price_store is not None else None
+    if stored is not None:
+        df_stored, _, stored_tickers = stored
+        if set(tickers) <= set(stored_tickers) and not df_stored.empty:
+            start_date = max(window_start, df_stored.index[-1].to_pydatetime() + timedelta(days=1))
+        else:
+            logger.info("Daftar ticker berubah, mengunduh ulang seluruh riwayat harga.")
+            df_stored = None
+
+    if start_date.date() >= end_date.date():
+        logger.info("Data harga tersimpan sudah mutakhir, tidak ada hari baru untuk diunduh.")
+        df_new = None
+    else:
+        if df_stored is not None and PRICE_OVERLAP_DAYS > 0:
+            overlap_start = df_stored.index[-min(PRICE_OVERLAP_DAYS, len(df_stored))].to_pydatetime()
+            start_date = max(window_start, overlap_start)
+        with span("fetch_prices"):
+            df_new = download_price_data(tickers, start_date, end_date)
 
-    print(f"[INFO] Menarik data fundamental untuk {len(df_prices.columns)} saham yang memiliki harga valid...")
+    if df_new is None and df_stored is None:
+        logger.error("Gagal mengunduh data harga awal. DataFrame mentah kosong.")
+        return None
+
+    saved_tickers = tickers
+    if df_stored is None:
+        df_prices = df_new
+    else:
+        df_prices = df_stored[[t for t in df_stored.columns if t in tickers]]
+        if df_new is not None:
+            logger.info("Menambahkan %s hari baru ke %s hari data harga tersimpan.", len(df_new), len(df_prices))
+            readjusted = find_readjusted_tickers(df_prices, df_new)
+            df_prices = pd.concat([df_prices, df_new])
+            df_prices = df_prices[~df_prices.index.duplicated(keep='last')].sort_index()
+            if readjusted:
+                logger.info("Harga %s saham disesuaikan ulang oleh sumber data, mengunduh ulang riwayatnya: %s",
+                            len(readjusted), readjusted)
+                with span("fetch_prices"):
+                    df_full = download_price_data(readjusted, window_start, end_date)
+                refreshed = [t for t in readjusted if df_full is not None and t in df_full.columns]
+                if refreshed:
+                    df_prices = df_prices.drop(columns=refreshed).join(df_full[refreshed], how="outer")
+                    df_prices = df_prices[[t for t in tickers if t in df_prices.columns]]
+                missing = [t for t in readjusted if t not in refreshed]
+                if missing:
+                    # Riwayat lama tidak boleh disambung dengan harga yang sudah disesuaikan: buang,
+                    # dan jangan catat sebagai tersimpan agar fetch berikutnya mengunduh penuh
+                    df_prices = df_prices.drop(columns=missing)
+                    saved_tickers = [t for t in tickers if t not in missing]
+        df_prices = df_prices.loc[df_prices.index >= pd.Timestamp(window_start.date())]
+
+    # Data dari rekaman cadangan tidak disimpan ulang sebagai data baru
+    if price_store is not None and df_new is not None and market_data_provider.fallback_usage[0] is None:
+        try:
+            price_store.save_prices(df_prices, time.time(), saved_tickers)
+        except OSError as e:
+            logger.warning("Gagal menyimpan data harga ke disk: %s", e)
+
+    return clean_price_data(df_prices)
+
+def fetch_fundamental_data(tickers: list):
+    """Menarik data fundamental per saham dari provider data pasar secara paralel (konkurensi terbatas)."""
+    logger.info("Menarik data fundamental untuk %s saham yang memiliki harga valid...", len(tickers))
+    with span("fetch_fundamentals"):
+        stock_infos, fetch_errors = map_concurrently(
+            lambda ticker_str: market_data_provider.fetch_info(str(ticker_str)),
+            tickers,
+            max_workers=FUNDAMENTALS_FETCH_CONCURRENCY,
+            timeout=FUNDAMENTALS_FETCH_TIMEOUT_SECONDS,
+            retries=FUNDAMENTALS_FETCH_RETRIES,
+            backoff=FUNDAMENTALS_FETCH_BACKOFF_SECONDS,
+            acquire=lambda: market_data_provider.acquire_slot("info"),
+        )
+    market_data_provider.flush()
+    # Rekaman cadangan hanya dipakai jika Yahoo tidak memberi info sama sekali (setelah semua retry).
+    # Jika sebagian ticker saja yang gagal, ticker itu dibuang agar fundamental lain tetap dianggap segar.
+    for ticker_str in (list(fetch_errors) if not stock_infos else []):
+        try:
+            stock_infos[ticker_str] = market_data_provider.fetch_fallback_info(str(ticker_str))
+        except LookupError:
+            continue
+        del fetch_errors[ticker_str]
     fundamentals_list = []
-    valid_tickers_for_fundamentals = df_prices.columns.tolist()
 
-    for ticker_str in valid_tickers_for_fundamentals:
+    for ticker_str in tickers:
+        if ticker_str in fetch_errors:
+            logger.warning("Gagal menarik data fundamental untuk %s: %s. Saham ini dilewati.", ticker_str, fetch_errors[ticker_str])
+            TICKERS_DROPPED.inc(stage="fundamentals", reason="fetch_error")
+            continue
         try:
-            print(f"  [DEBUG] Memproses fundamental untuk: {ticker_str}")
-            stock_info = yf.Ticker(str(ticker_str)).info
+            logger.debug("Memproses fundamental untuk: %s", ticker_str)
+            stock_info = stock_infos[ticker_str]
             market_cap = stock_info.get('marketCap')
             
             if market_cap is None or market_cap == 0:
-                print(f"  [WARN] Data market cap tidak ada atau 0 untuk {ticker_str}. Saham ini dilewati.")
+                logger.warning("Data market cap tidak ada atau 0 untuk %s. Saham ini dilewati.", ticker_str)
+                TICKERS_DROPPED.inc(stage="fundamentals", reason="missing_market_cap")
                 continue
 
+            # Nama & sektor dari Yahoo; file universe menjadi cadangan jika Yahoo tidak menyediakannya
+            listed = UNIVERSE.loc[ticker_str] if ticker_str in UNIVERSE.index else {}
             fundamentals = {
-                'ticker': str(ticker_str), 'company_name': stock_info.get('shortName', str(ticker_str)),
-                'sector': stock_info.get('sector', 'N/A'), 'is_syariah': SYARIAH_MAPPING.get(str(ticker_str), False),
+                'ticker': str(ticker_str),
+                'company_name': stock_info.get('shortName') or listed.get('company_name') or str(ticker_str),
+                'sector': stock_info.get('sector') or listed.get('sector') or 'N/A',
+                'is_syariah': SYARIAH_MAPPING.get(str(ticker_str), False),
                 'marketCap': market_cap, 'pe_ratio': stock_info.get('trailingPE'),
                 'roe': stock_info.get('returnOnEquity'), 'der': stock_info.get('debtToEquity')
             }
             fundamentals_list.append(fundamentals)
         except Exception as e:
-            print(f"  [WARN] Gagal menarik data fundamental untuk {ticker_str}: {e}. Saham ini dilewati.")
+            logger.warning("Gagal menarik data fundamental untuk %s: %s. Saham ini dilewati.", ticker_str, e)
+            TICKERS_DROPPED.inc(stage="fundamentals", reason="invalid_info")
             continue
     
     if not fundamentals_list:
-        print("[ERROR] Tidak ada data fundamental yang berhasil ditarik untuk saham manapun.")
-        return None, None
-    print(f"[INFO] Jumlah saham dengan data fundamental berhasil ditarik: {len(fundamentals_list)}")
+        logger.error("Tidak ada data fundamental yang berhasil ditarik untuk saham manapun.")
+        return None
+    logger.info("Jumlah saham dengan data fundamental berhasil ditarik: %s", len(fundamentals_list))
 
-    df_fundamentals = pd.DataFrame(fundamentals_list).set_index('ticker')
-    
+    return pd.DataFrame(fundamentals_list).set_index('ticker')
+
+def synchronize_market_data(df_fundamentals: pd.DataFrame, df_prices: pd.DataFrame):
+    """Menyamakan ticker pada data fundamental dan harga, lalu membuang tanggal yang tidak lengkap."""
     # Sinkronisasi akhir: pastikan kedua DataFrame memiliki ticker yang sama
     common_tickers = df_prices.columns.intersection(df_fundamentals.index)
-    df_prices = df_prices[common_tickers]
+    if not df_prices.columns.equals(common_tickers):
+        TICKERS_DROPPED.inc(len(df_prices.columns) - len(common_tickers), stage="sync", reason="no_fundamentals")
+        df_prices = df_prices[common_tickers]
     df_fundamentals = df_fundamentals.loc[common_tickers]
     
-    df_prices.dropna(axis=0, how='any', inplace=True) # Hapus baris tanggal jika ada NaN
+    if df_prices.isnull().values.any():
+        df_prices = df_prices.dropna(axis=0, how='any') # Hapus baris tanggal jika ada NaN
 
     if df_prices.empty or df_fundamentals.empty or len(df_prices.columns) < 2:
-        print("[ERROR] Data harga atau fundamental menjadi kosong atau kurang dari 2 saham setelah sinkronisasi akhir.")
+        logger.error("Data harga atau fundamental menjadi kosong atau kurang dari 2 saham setelah sinkronisasi akhir.")
         return None, None
 
-    print(f"[INFO] Jumlah saham final setelah sinkronisasi: {len(df_prices.columns)}")
-    print("--- Penarikan Data Selesai ---")
+    logger.info("Jumlah saham final setelah sinkronisasi: %s", len(df_prices.columns))
     return df_fundamentals, df_prices
 
+def fetch_yfinance_data(tickers: list):
+    """Menarik data fundamental dan harga historis dari provider data pasar (default Yahoo Finance)."""
+    logger.info("--- Memulai Penarikan Data Pasar ---")
+    market_data_provider.reset_fallback_usage()
+    df_prices = fetch_price_data(tickers)
+    if df_prices is None:
+        return None, None
+
+    df_fundamentals = fetch_fundamental_data(df_prices.columns.tolist())
+    if df_fundamentals is None:
+        return None, None
+    if price_store is not None and market_data_provider.fallback_usage[1] is None:
+        try:
+            price_store.save_fundamentals(df_fundamentals, time.time())
+        except OSError as e:
+            logger.warning("Gagal menyimpan data fundamental ke disk: %s", e)
+
+    with span("sync"):
+        df_fundamentals, df_prices = synchronize_market_data(df_fundamentals, df_prices)
+    if df_fundamentals is None:
+        return None, None
+
+    logger.info("--- Penarikan Data Selesai ---")
+    return df_fundamentals, df_prices
+
+def refresh_price_data(df_fundamentals: pd.DataFrame):
+    """Memperbarui data harga saja untuk ticker yang fundamentalnya masih tersimpan di cache."""
+    logger.info("--- Memperbarui Data Harga ---")
+    market_data_provider.reset_fallback_usage()
+    df_prices = fetch_price_data(df_fundamentals.index.tolist())
+    if df_prices is None:
+        return None, None
+    return synchronize_market_data(df_fundamentals, df_prices)
+
+def load_stored_market_data():
+    """Memuat snapshot terakhir dari disk untuk memanaskan cache tanpa menghubungi Yahoo."""
+    if shared_snapshots is not None:
+        # Snapshot bersama sudah tersinkronisasi; matriks harganya dipakai langsung (mmap, tanpa salinan)
+        shared = shared_snapshots.load()
+        if shared is not None:
+            return shared.df_fundamentals, shared.df_prices, shared.prices_fetched_at, shared.fundamentals_fetched_at
+    if price_store is None:
+        return None
+    stored_prices = price_store.load_prices()
+    stored_fundamentals = price_store.load_fundamentals()
+    if stored_prices is None or stored_fundamentals is None:
+        return None
+    df_prices, prices_fetched_at, _ = stored_prices
+    df_fundamentals, fundamentals_fetched_at = stored_fundamentals
+    df_prices = clean_price_data(df_prices)
+    if df_prices is None:
+        return None
+    df_fundamentals, df_prices = synchronize_market_data(df_fundamentals, df_prices)
+    if df_fundamentals is None:
+        return None
+    return df_fundamentals, df_prices, prices_fetched_at, fundamentals_fetched_at
+
+# Cache data pasar bersama untuk seluruh proses. Loader dibungkus lambda agar
+# selalu memanggil fungsi fetch terbaru (memudahkan monkeypatch di pengujian).
+market_cache = MarketDataCache(
+    load_all=lambda: fetch_yfinance_data(TICKERS_TO_ANALYZE),
+    load_prices=lambda df_fundamentals: refresh_price_data(df_fundamentals),
+    load_stored=lambda: load_stored_market_data(),
+    price_ttl=PRICE_CACHE_TTL_SECONDS,
+    fundamentals_ttl=FUNDAMENTALS_CACHE_TTL_SECONDS,
+    max_stale=MARKET_DATA_MAX_STALE_SECONDS,
+    on_refresh=lambda snapshot: publish_shared_snapshot(snapshot),
+    fetch_enabled=shared_snapshots is None,
+    fallback_usage=lambda: market_data_provider.fallback_usage,
+)
+
+def publish_shared_snapshot(snapshot) -> None:
+    """Pemimpin: mempublikasikan snapshot baru agar worker lain memetakannya tanpa fetch sendiri."""
+    if shared_snapshots is not None:
+        shared_snapshots.publish(snapshot)
+
+def adopt_shared_snapshot():
+    """Memetakan snapshot bersama terbaru jika `CURRENT` menunjuk snapshot yang berbeda."""
+    current_id = shared_snapshots.current_id()
+    snapshot = market_cache.snapshot
+    if current_id is None or (snapshot is not None and snapshot.snapshot_id == current_id):
+        return snapshot
+    shared = shared_snapshots.load(current_id)
+    if shared is not None:
+        market_cache.adopt(shared)
+    return market_cache.snapshot
+
+# Model risiko (mu, kovarians) universe per snapshot + LRU bobot optimal
+risk_model_registry = RiskModelRegistry()
+
+# Indeks eligibility (mask kualitas, syariah, sektor) per snapshot
+universe_index_cache = LRUCache(4)
+
+def get_universe_index(snapshot) -> UniverseIndex:
+    """Indeks universe untuk snapshot; dibangun sekali lalu dipakai ulang oleh semua request."""
+    universe_index = universe_index_cache.get(snapshot.snapshot_id)
+    if universe_index is None:
+        universe_index = UniverseIndex(snapshot.df_fundamentals, snapshot.df_prices)
+        universe_index_cache.put(snapshot.snapshot_id, universe_index)
+    return universe_index
+
+# Cache efficient frontier per (snapshot, ticker eligible, jumlah titik)
+frontier_cache = LRUCache(FRONTIER_CACHE_SIZE)
+
+# Cache bobot walk-forward backtest per (snapshot, ticker eligible, target, aturan rebalance, lookback)
+backtest_weights_cache = LRUCache(BACKTEST_CACHE_SIZE)
+
+# Cache body respons rekomendasi per ETag (hash request ter-normalisasi + snapshot)
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE,
+                               SQLiteResponseStore(RESPONSE_CACHE_DB) if RESPONSE_CACHE_DB else None)
+
+# Lapisan eksekusi: pipeline di thread pool, solver di process pool (satu proses per core)
+execution = ExecutionLayer(
+    io_workers=REQUEST_WORKER_THREADS,
+    cpu_workers=OPTIMIZER_PROCESSES,
+    max_pending=MAX_PENDING_REQUESTS,
+)
+REGISTRY.gauge("robokaya_requests_in_flight", "Request pipeline yang sedang antre atau diproses.",
+               lambda: execution.in_flight)
+
+# Startup: pypfopt/cvxpy tidak diimpor saat modul dimuat, melainkan di warm-up latar belakang (lifespan).
+# Waktu dicatat dalam detik sejak modul mulai diimpor.
+startup_timings: Dict[str, float] = {}
+solver_ready = False
+REGISTRY.gauge("robokaya_startup_import_seconds", "Durasi import modul aplikasi.",
+               lambda: startup_timings["import"])
+REGISTRY.gauge("robokaya_startup_ready_seconds", "Waktu hingga data pasar dan solver siap (/readyz 200).",
+               lambda: startup_timings["ready"])
+REGISTRY.gauge("robokaya_startup_first_response_seconds", "Waktu hingga byte pertama respons API pertama.",
+               lambda: startup_timings["first_response"])
+
+def record_startup(phase: str) -> None:
+    if phase not in startup_timings:
+        startup_timings[phase] = time.perf_counter() - IMPORT_STARTED_AT
+        logger.info("Startup: %s setelah %.2f detik.", phase, startup_timings[phase])
+
+def readiness_checks() -> Dict[str, bool]:
+    checks = {"market_data": market_cache.snapshot is not None, "solver": solver_ready}
+    if all(checks.values()):
+        record_startup("ready")
+    return checks
+
+def portfolio_solver(mu: pd.Series, S: pd.DataFrame, optimization_target: str):
+    """Menjalankan solve_portfolio di process pool dengan batas waktu solver."""
+    with span("solver"):
+        return execution.run_cpu(solve_portfolio, mu, S, optimization_target, timeout=SOLVER_TIMEOUT_SECONDS,
+                                 cancelled=cancellation_event())
+
 def analyze_user_input(request: PortfolioRequest) -> dict:
     """Menganalisis input dari borang dan mengubahnya menjadi parameter teknis."""
-    print("[INFO] Menganalisis input pengguna...")
+    logger.debug("Menganalisis input pengguna...")
     
     risk_score_map = {'q1': {'A': 10, 'B': 20, 'C': 30, 'D': 40},
                       'q2': {'A': 5, 'B': 15, 'C': 25},
@@ -161,7 +533,8 @@ def analyze_user_input(request: PortfolioRequest) -> dict:
         'Growth': {"optimization_target": "max_sharpe"},
         'Aggressive Growth': {"optimization_target": "max_sharpe"}
     }
-    technical_constraints = constraints_map.get(strategy)
+    technical_constraints = dict(constraints_map.get(strategy), allocation_mode=request.allocation_mode,
+                                 max_holdings=request.max_holdings)
 
     stock_universe_filters = {
         "sectors": request.preferences.sectors,
@@ -171,111 +544,164 @@ def analyze_user_input(request: PortfolioRequest) -> dict:
     
     return {
         "risk_score": risk_score, "investment_strategy": strategy,
+        "time_horizon_category": time_horizon_category,
         "technical_constraints": technical_constraints,
         "stock_universe_filters": stock_universe_filters
     }
 
-def generate_optimal_portfolio(initial_capital: float, user_preferences: dict, technical_constraints: dict, df_fundamentals: pd.DataFrame, df_prices: pd.DataFrame):
-    """Menghasilkan rekomendasi portofolio optimal."""
-    print("[INFO] Memulai proses optimisasi portofolio...")
-    df_processed = df_fundamentals.copy()
-    # Menggunakan kolom baru untuk menghindari SettingWithCopyWarning pada DataFrame slice
-    df_processed['der_processed'] = df_processed['der'].fillna(0) 
-    df_processed['pe_ratio_processed'] = df_processed['pe_ratio'].fillna(999) 
-    df_processed['roe_processed'] = df_processed['roe'].fillna(-1)
-    
-    fundamental_filter = (
-        (df_processed['marketCap'] > 5e12) & 
-        (df_processed['pe_ratio_processed'] > 0) & 
-        (df_processed['pe_ratio_processed'] < 30) & 
-        (df_processed['roe_processed'] > 0.08) &
-        (df_processed['der_processed'] < 2.0)
-    )
-    quality_tickers_df = df_processed[fundamental_filter]
-    print(f"[DEBUG] Jumlah saham lolos filter fundamental awal: {len(quality_tickers_df)}")
+def select_eligible_tickers(user_preferences: dict, df_fundamentals: pd.DataFrame, df_prices: pd.DataFrame, universe_index: UniverseIndex = None) -> dict:
+    """
+    Tahap filter: fundamental, preferensi pengguna, dan sinkronisasi dengan data harga.
+
+    Dengan `universe_index` (dihitung sekali per snapshot), eligibility cukup berupa irisan
+    mask boolean; tanpa itu indeks dibangun sementara untuk data yang diberikan.
+    Mengembalikan {"tickers": [...], "df_prices": DataFrame harga terfilter} atau {"error": ...}.
+    """
+    if universe_index is None:
+        universe_index = UniverseIndex(df_fundamentals, df_prices)
+    logger.debug("Jumlah saham lolos filter fundamental awal: %s", int(universe_index.quality.sum()))
     
-    if quality_tickers_df.empty:
+    if not universe_index.quality.any():
         return {"error": "Tidak ada saham yang lolos filter fundamental awal."}
     
-    # Filter Preferensi Pengguna
-    if user_preferences.get('syariah_only', False):
-        quality_tickers_df = quality_tickers_df[quality_tickers_df['is_syariah'] == True]
-    print(f"[DEBUG] Jumlah saham setelah filter syariah (jika ada): {len(quality_tickers_df)}")
-    
-    selected_sectors = user_preferences.get('sectors', [])
-    if selected_sectors: # Hanya filter jika ada sektor yang dipilih
-        quality_tickers_df = quality_tickers_df[quality_tickers_df['sector'].isin(selected_sectors)]
-    print(f"[DEBUG] Jumlah saham setelah filter sektor (jika ada): {len(quality_tickers_df)}")
-    
-    # Sinkronisasi ticker yang lolos filter dengan data harga yang tersedia
-    final_eligible_tickers = [t for t in quality_tickers_df.index.tolist() if t in df_prices.columns]
-    print(f"[DEBUG] Jumlah saham di final_eligible_tickers (setelah sinkronisasi dgn df_prices): {len(final_eligible_tickers)}")
+    # Filter preferensi pengguna + sinkronisasi dengan data harga yang tersedia (irisan mask)
+    eligible_mask = universe_index.eligible_mask(
+        syariah_only=user_preferences.get('syariah_only', False),
+        sectors=user_preferences.get('sectors', [])
+    )
+    final_eligible_tickers = universe_index.tickers_for(eligible_mask)
+    logger.debug("Jumlah saham setelah filter preferensi & sinkronisasi dgn df_prices: %s", len(final_eligible_tickers))
+    report_progress("filters_applied", fundamental_passed=int(universe_index.quality.sum()),
+                    eligible=len(final_eligible_tickers))
     
     if len(final_eligible_tickers) < 2:
         return {"error": "Tidak cukup saham yang lolos filter (minimal 2) untuk membuat portofolio yang terdiversifikasi."}
     
-    print(f"[INFO] Saham yang lolos semua filter: {final_eligible_tickers}")
-    df_prices_filtered = df_prices[final_eligible_tickers].copy()
+    logger.debug("Saham yang lolos semua filter: %s", final_eligible_tickers)
+    df_prices_filtered = df_prices.iloc[:, universe_index.price_columns_for(eligible_mask)]
     
     # Pemeriksaan akhir pada data harga
     if df_prices_filtered.isnull().values.any():
-        print("[WARN] Ada nilai NaN di data harga setelah filter, akan di-dropna (baris).")
-        df_prices_filtered.dropna(axis=0, how='any', inplace=True)
+        logger.warning("Ada nilai NaN di data harga setelah filter, akan di-dropna (baris).")
+        df_prices_filtered = df_prices_filtered.dropna(axis=0, how='any')
         if df_prices_filtered.empty or len(df_prices_filtered) < 60: # Minimal 60 hari data untuk PyPortfolioOpt
             return {"error": "Tidak cukup data harga historis setelah menghapus NaN (minimal 60 hari)."}
-    
+
+    return {"tickers": final_eligible_tickers, "df_prices": df_prices_filtered}
+
+def optimize_portfolio_weights(tickers: list, df_prices_filtered: pd.DataFrame, optimization_target: str, risk_model: UniverseRiskModel = None) -> dict:
+    """
+    Tahap solver: bobot optimal + kinerja ex-ante.
+
+    Mengembalikan {"weights": {...}, "performance": (return, volatilitas, sharpe)} atau {"error": ...}.
+    """
     try:
-        mu = expected_returns.capm_return(df_prices_filtered)
-        S = risk_models.CovarianceShrinkage(df_prices_filtered).ledoit_wolf()
-        ef = EfficientFrontier(mu, S)
-        
-        optimization_target = technical_constraints.get("optimization_target", "max_sharpe")
-        if optimization_target == "min_volatility":
-            weights = ef.min_volatility()
+        if risk_model is not None and len(df_prices_filtered) == len(risk_model.df_prices):
+            cleaned_weights, performance = risk_model.optimize(tickers, optimization_target, solver=portfolio_solver)
         else:
-            weights = ef.max_sharpe()
-            
-        cleaned_weights = ef.clean_weights()
-        expected_return, annual_volatility, sharpe_ratio = ef.portfolio_performance(verbose=False)
+            mu, S = estimate_mu_cov(tickers, df_prices_filtered)
+            cleaned_weights, performance = portfolio_solver(mu, S, optimization_target)
+    except ExecutionCancelledError:
+        raise
     except Exception as e:
-        print(f"[ERROR] Exception saat optimisasi: {e}")
+        SOLVER_FAILURES.inc(problem=optimization_target)
+        logger.error("Exception saat optimisasi: %s", e)
         return {"error": f"Optimisasi portofolio gagal: {e}"}
-    
+    report_progress("solver_done", optimization_target=optimization_target,
+                    holdings=sum(1 for w in cleaned_weights.values() if w > 0))
+    return {"weights": cleaned_weights, "performance": performance}
+
+def optimize_sparse_weights(tickers: list, df_prices_filtered: pd.DataFrame, optimization_target: str,
+                            max_holdings: int, initial_capital: float, risk_model: UniverseRiskModel = None) -> dict:
+    """
+    Tahap solver mode sparse: paling banyak `max_holdings` saham, tiap bobot minimal harga satu lot.
+
+    Pre-screening (saham terjangkau dengan skor individual terbaik) dilakukan di thread ini,
+    sehingga hanya masalah kecil berukuran tetap yang dikirim ke process pool untuk pruning.
+    """
+    try:
+        mu, S = estimate_mu_cov(tickers, df_prices_filtered, risk_model)
+        mu, S = mu.to_numpy(dtype=float), S.to_numpy(dtype=float)
+        lot_prices = df_prices_filtered[tickers].iloc[-1].to_numpy(dtype=float) * LOT_SIZE
+        candidates = prescreen_candidates(mu, np.diag(S), lot_prices, initial_capital, max_holdings, optimization_target)
+        if len(candidates) == 0:
+            return {"error": "Modal tidak cukup untuk membeli satu lot dari saham yang lolos filter."}
+        mu, S = mu[candidates], S[np.ix_(candidates, candidates)]
+        with span("solver"):
+            weights = execution.run_cpu(prune_to_cardinality, mu, S, lot_prices[candidates] / initial_capital,
+                                        max_holdings, optimization_target,
+                                        timeout=SOLVER_TIMEOUT_SECONDS, cancelled=cancellation_event())
+    except ExecutionCancelledError:
+        raise
+    except Exception as e:
+        SOLVER_FAILURES.inc(problem=f"sparse_{optimization_target}")
+        logger.error("Exception saat optimisasi sparse: %s", e)
+        return {"error": f"Optimisasi portofolio gagal: {e}"}
+    cleaned_weights = {tickers[c]: float(w) for c, w in zip(candidates, weights) if w > 0}
+    report_progress("solver_done", optimization_target=optimization_target, holdings=len(cleaned_weights))
+    return {"weights": cleaned_weights, "performance": portfolio_performance(weights, mu, S)}
+
+def optimize_profile_weights(tickers: list, df_prices_filtered: pd.DataFrame, technical_constraints: dict,
+                             initial_capital: float, risk_model: UniverseRiskModel = None) -> dict:
+    """Bobot optimal sesuai batasan teknis profil: mode sparse jika `max_holdings` diisi."""
+    optimization_target = technical_constraints.get("optimization_target", "max_sharpe")
+    if technical_constraints.get("max_holdings"):
+        return optimize_sparse_weights(tickers, df_prices_filtered, optimization_target,
+                                       technical_constraints["max_holdings"], initial_capital, risk_model)
+    return optimize_portfolio_weights(tickers, df_prices_filtered, optimization_target, risk_model)
+
+def estimate_mu_cov(tickers: list, df_prices_filtered: pd.DataFrame, risk_model: UniverseRiskModel = None):
+    """mu CAPM & kovarians Ledoit-Wolf untuk ticker terpilih (irisan model snapshot bila tersedia)."""
+    if risk_model is not None and len(df_prices_filtered) == len(risk_model.df_prices):
+        return risk_model.subset(tickers)
+    from pypfopt import expected_returns, risk_models
+
+    with span("risk_model"):
+        mu = expected_returns.capm_return(df_prices_filtered)
+        S = risk_models.CovarianceShrinkage(df_prices_filtered).ledoit_wolf()
+    return mu, S
+
+def allocate_portfolio(initial_capital: float, cleaned_weights: dict, performance: tuple, df_fundamentals: pd.DataFrame, df_prices_filtered: pd.DataFrame, allocation_mode: str = "floor") -> dict:
+    """
+    Tahap alokasi: membulatkan bobot target ke lot (100 lembar) sesuai modal pengguna.
+
+    Perhitungan lot dilakukan sekaligus dengan NumPy (lihat `allocation.allocate_lots`);
+    respons memuat nilai numerik mentah (`*_value`) di samping string terformat.
+    """
+    expected_return, annual_volatility, sharpe_ratio = performance
+
+    tickers = [t for t, w in cleaned_weights.items() if w > 0 and t in df_prices_filtered.columns]
+    target_weights = np.array([cleaned_weights[t] for t in tickers], dtype=float)
+    last_prices = df_prices_filtered[tickers].iloc[-1].to_numpy(dtype=float) if tickers else np.empty(0)
+    invalid_price = ~np.isfinite(last_prices) | (last_prices <= 0)
+    for ticker in np.asarray(tickers, dtype=object)[invalid_price]:
+        logger.warning("Harga terakhir tidak valid untuk %s. Melewatkan alokasi.", ticker)
+
+    allocation = allocate_lots(target_weights, last_prices, initial_capital, mode=allocation_mode)
+    # Ambil company_name & sector dari df_fundamentals sekaligus untuk semua ticker
+    names = df_fundamentals.reindex(tickers)[['company_name', 'sector']].fillna('N/A')
+
     allocation_details = []
-    total_invested_actually = 0
-    for ticker, weight in cleaned_weights.items():
-        if weight > 0 and ticker in df_prices_filtered.columns:
-            last_price = df_prices_filtered[ticker].iloc[-1]
-            if pd.isna(last_price) or last_price <= 0:
-                print(f"[WARN] Harga terakhir tidak valid untuk {ticker}. Melewatkan alokasi.")
-                continue
-                
-            number_of_lots = np.floor((initial_capital * weight) / (100 * last_price))
-            actual_invested = number_of_lots * 100 * last_price
-            if number_of_lots > 0:
-                total_invested_actually += actual_invested
-                # Ambil company_name dari df_fundamentals (bukan df_processed) karena df_processed mungkin tidak berisi semua kolom asli
-                company_name_original = df_fundamentals.loc[ticker, 'company_name'] if ticker in df_fundamentals.index else 'N/A'
-                sector_original = df_fundamentals.loc[ticker, 'sector'] if ticker in df_fundamentals.index else 'N/A'
-
-                allocation_details.append({
-                    "ticker": ticker, 
-                    "company_name": company_name_original,
-                    "sector": sector_original,
-                    "target_weight_percentage": f"{weight:.2%}",
-                    "invested_capital": f"Rp {actual_invested:,.0f}",
-                    "lots": int(number_of_lots),
-                    "price_per_share": f"Rp {last_price:,.0f}"
-                })
-    
-    for item in allocation_details:
-        invested_val = float(item['invested_capital'].replace('Rp ', '').replace(',', ''))
-        if total_invested_actually > 0:
-            item['actual_weight_percentage'] = f"{(invested_val / total_invested_actually):.2%}"
-        else:
-            item['actual_weight_percentage'] = "0.00%"
+    for i in np.flatnonzero(allocation.lots > 0):
+        ticker = tickers[i]
+        weight, last_price, actual_invested = target_weights[i], last_prices[i], allocation.invested[i]
+        allocation_details.append({
+            "ticker": ticker, 
+            "company_name": names.iat[i, 0],
+            "sector": names.iat[i, 1],
+            "target_weight_percentage": f"{weight:.2%}",
+            "invested_capital": f"Rp {actual_invested:,.0f}",
+            "lots": int(allocation.lots[i]),
+            "price_per_share": f"Rp {last_price:,.0f}",
+            "actual_weight_percentage": f"{allocation.actual_weights[i]:.2%}",
+            "target_weight": float(weight),
+            "actual_weight": float(allocation.actual_weights[i]),
+            "invested_capital_value": float(actual_invested),
+            "price_per_share_value": float(last_price)
+        })
 
-    unallocated_cash = initial_capital - total_invested_actually
+    total_invested_actually = allocation.total_invested
+    unallocated_cash = allocation.leftover_cash
     last_data_date_str = "N/A"
     if not df_prices_filtered.empty:
         last_data_date_str = df_prices_filtered.index[-1].strftime('%Y-%m-%d')
@@ -286,69 +712,651 @@ def generate_optimal_portfolio(initial_capital: float, user_preferences: dict, t
         "portfolio_metrics": {
             "expected_annual_return": f"{expected_return:.2%}", 
             "annual_volatility_risk": f"{annual_volatility:.2%}", 
-            "sharpe_ratio": f"{sharpe_ratio:.2f}"
+            "sharpe_ratio": f"{sharpe_ratio:.2f}",
+            "expected_annual_return_value": float(expected_return),
+            "annual_volatility_risk_value": float(annual_volatility),
+            "sharpe_ratio_value": float(sharpe_ratio)
         },
         "allocation_details": allocation_details,
         "financial_summary": {
             "total_capital_invested": f"Rp {total_invested_actually:,.0f}",
             "unallocated_cash_due_to_lot_rounding": f"Rp {unallocated_cash:,.0f}",
-            "percentage_of_capital_invested": f"{(total_invested_actually / initial_capital):.2%}" if initial_capital > 0 else "N/A"
+            "percentage_of_capital_invested": f"{(total_invested_actually / initial_capital):.2%}" if initial_capital > 0 else "N/A",
+            "allocation_mode": allocation_mode,
+            "total_capital_invested_value": total_invested_actually,
+            "unallocated_cash_value": unallocated_cash,
+            "fraction_of_capital_invested": (total_invested_actually / initial_capital) if initial_capital > 0 else None
         }
     }
 
+def generate_optimal_portfolio(initial_capital: float, user_preferences: dict, technical_constraints: dict, df_fundamentals: pd.DataFrame, df_prices: pd.DataFrame, risk_model: UniverseRiskModel = None, universe_index: UniverseIndex = None):
+    """
+    Menghasilkan rekomendasi portofolio optimal.
+
+    Jika `risk_model` diberikan (model per snapshot), mu dan kovarians diiris dari
+    hasil prakomputasi universe dan bobot optimal diambil dari cache bila tersedia.
+    """
+    logger.debug("Memulai proses optimisasi portofolio...")
+    with span("filter"):
+        eligible = select_eligible_tickers(user_preferences, df_fundamentals, df_prices, universe_index)
+    if "error" in eligible:
+        return eligible
+
+    optimized = optimize_profile_weights(eligible["tickers"], eligible["df_prices"], technical_constraints,
+                                         initial_capital, risk_model)
+    if "error" in optimized:
+        return optimized
+
+    with span("allocation"):
+        return allocate_portfolio(initial_capital, optimized["weights"], optimized["performance"],
+                                  df_fundamentals, eligible["df_prices"],
+                                  allocation_mode=technical_constraints.get("allocation_mode", "floor"))
+
+# Tabel strategi untuk snapshot terbaru (diganti utuh saat snapshot baru selesai dihitung)
+strategy_table: Optional[StrategyTable] = None
+
+def precompute_strategy_table(snapshot) -> StrategyTable:
+    """Menyelesaikan semua kombinasi (target, syariah, sektor) yang dapat dijangkau untuk satu snapshot."""
+    risk_model = risk_model_registry.get(snapshot.snapshot_id, snapshot.df_prices)
+    universe_index = get_universe_index(snapshot)
+    eligible_prices = {}
+
+    def eligible_tickers(syariah_only, sectors):
+        eligible = select_eligible_tickers({"syariah_only": syariah_only, "sectors": list(sectors)},
+                                           snapshot.df_fundamentals, snapshot.df_prices, universe_index)
+        if "error" in eligible:
+            return None
+        eligible_prices[tuple(eligible["tickers"])] = eligible["df_prices"]
+        return eligible["tickers"]
+
+    def solve(problem):
+        tickers, optimization_target = problem
+        optimized = optimize_portfolio_weights(list(tickers), eligible_prices[tickers], optimization_target, risk_model)
+        if "error" in optimized:
+            raise ValueError(optimized["error"])
+        return optimized["weights"], optimized["performance"]
+
+    def solve_many(problems):
+        # Thread hanya menunggu; solver berjalan paralel di process pool lapisan eksekusi
+        results, _ = map_concurrently(solve, problems, max_workers=max(1, execution.cpu_workers))
+        return results
+
+    sectors = snapshot.df_fundamentals["sector"].dropna().astype(str).unique().tolist()
+    with span("strategy_table"):
+        return build_strategy_table(snapshot.snapshot_id,
+                                    table_combinations(sectors, OPTIMIZATION_TARGETS, STRATEGY_TABLE_MAX_SECTORS),
+                                    eligible_tickers, solve_many)
+
+def refresh_strategy_table(snapshot) -> None:
+    global strategy_table
+    if STRATEGY_TABLE_ENABLED and (strategy_table is None or strategy_table.snapshot_id != snapshot.snapshot_id):
+        strategy_table = precompute_strategy_table(snapshot)
+
+def lookup_strategy_table(snapshot, analyzed_params: dict):
+    """Entri tabel untuk profil jika tabel snapshot yang sama sudah tersedia; None berarti solve langsung."""
+    table = strategy_table
+    if table is None or table.snapshot_id != snapshot.snapshot_id:
+        return None
+    if analyzed_params["technical_constraints"].get("max_holdings"): # Mode sparse bergantung pada modal
+        return None
+    filters = analyzed_params["stock_universe_filters"]
+    entry = table.get(analyzed_params["technical_constraints"].get("optimization_target", "max_sharpe"),
+                      filters["syariah_only"], filters["sectors"])
+    CACHE_EVENTS.inc(cache="strategy_table", result="miss" if entry is None else "hit")
+    return entry
+
 # --- 5. Inisiasi Aplikasi FastAPI & Endpoint ---
+async def _market_data_refresher():
+    """Task latar belakang: memanaskan cache saat startup lalu memperbaruinya secara berkala."""
+    while True:
+        interval = MARKET_DATA_REFRESH_INTERVAL_SECONDS
+        try:
+            if shared_snapshots is None:
+                await asyncio.to_thread(market_cache.refresh_if_stale)
+            elif leader_lock.try_acquire():
+                # Pemimpin: mulai dari snapshot bersama terakhir (mis. milik pemimpin sebelumnya), lalu perbarui
+                market_cache.fetch_enabled = True
+                await asyncio.to_thread(adopt_shared_snapshot)
+                await asyncio.to_thread(market_cache.refresh_if_stale)
+                if market_cache.snapshot is not None: # Snapshot hasil warm-up dari disk juga perlu dipublikasikan
+                    await asyncio.to_thread(publish_shared_snapshot, market_cache.snapshot)
+            else:
+                # Pengikut: cek penunjuk CURRENT lebih sering; kunci pemimpin dicoba lagi di putaran berikutnya
+                await asyncio.to_thread(adopt_shared_snapshot)
+                interval = SNAPSHOT_POLL_INTERVAL_SECONDS
+            snapshot = market_cache.snapshot
+            if snapshot is not None:
+                # Hitung mu, kovarians & indeks universe sekarang agar request pertama tidak menanggungnya
+                risk_model = risk_model_registry.get(snapshot.snapshot_id, snapshot.df_prices)
+                get_universe_index(snapshot)
+                await asyncio.to_thread(lambda: risk_model.cov)
+                readiness_checks()
+                # Lalu seluruh kombinasi profil, agar request cukup membaca tabel + alokasi lot
+                await asyncio.to_thread(refresh_strategy_table, snapshot)
+        except Exception as e:
+            logger.error("Task pembaruan data pasar gagal: %s", e)
+        await asyncio.sleep(interval)
+
+async def _warm_up_solver():
+    """Memuat & mengompilasi solver di proses ini dan di seluruh worker process pool, lalu menandai siap."""
+    global solver_ready
+    try:
+        await asyncio.gather(asyncio.to_thread(warm_solver), asyncio.to_thread(execution.warm_up))
+    except Exception as e:
+        logger.error("Warm-up solver gagal: %s", e)
+        return
+    solver_ready = True
+    readiness_checks()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresher = asyncio.create_task(_market_data_refresher())
+    warm_up = asyncio.create_task(_warm_up_solver())
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        warm_up.cancel()
+        execution.shutdown()
+        if leader_lock is not None:
+            leader_lock.release()
+
 app = FastAPI(
     title="Ronbokaya API",
     description="API untuk memberikan rekomendasi portofolio investasi yang dipersonalisasi.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-@app.post("/api/v1/recommendations", summary="Membuat Rekomendasi Portofolio")
-async def create_recommendation(request: PortfolioRequest):
-    try:
-        print(f"[INFO] Menerima request: {request.model_dump_json(indent=2)}")
+def format_recommendation_response(request: PortfolioRequest, analyzed_params: dict, portfolio_result: dict) -> dict:
+    """Menyusun body respons rekomendasi (ringkasan input + hasil portofolio)."""
+    return {
+        "input_summary": {
+            "initial_capital": f"Rp {request.initial_capital:,.0f}",
+            "investment_goal": request.investment_goal,
+            "time_horizon": request.time_horizon,
+            "risk_score": analyzed_params['risk_score'],
+            "determined_strategy": analyzed_params['investment_strategy']
+        },
+        "portfolio_recommendation": portfolio_result
+    }
+
+def get_market_snapshot():
+    """Snapshot data pasar saat ini; 503 jika tidak tersedia."""
+    with span("market_data"):
+        snapshot = market_cache.get()
+    if snapshot is None:
+        logger.error("Gagal mengambil data pasar yang valid dari cache data pasar di endpoint.")
+        raise HTTPException(status_code=503, detail="Gagal mengambil data pasar saat ini. Coba lagi beberapa saat.")
+    return snapshot
+
+def build_recommendation(request: PortfolioRequest, snapshot=None) -> dict:
+    """Pipeline rekomendasi lengkap (blocking); dijalankan di thread pool lapisan eksekusi."""
+    if logger.isEnabledFor(logging.DEBUG): # Serialisasi JSON hanya jika log debug aktif
+        logger.debug("Menerima request: %s", request.model_dump_json(indent=2))
+    with span("analyze_input"):
         analyzed_params = analyze_user_input(request)
-        print(f"[INFO] Parameter hasil analisis: {json.dumps(analyzed_params, indent=2)}")
-        
-        df_fundamentals, df_prices = fetch_yfinance_data(TICKERS_TO_ANALYZE)
-        
-        if df_fundamentals is None or df_prices is None or df_fundamentals.empty or df_prices.empty:
-            print("[ERROR] Gagal mengambil data pasar yang valid dari fetch_yfinance_data di endpoint.")
-            raise HTTPException(status_code=503, detail="Gagal mengambil data pasar saat ini. Coba lagi beberapa saat.")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Parameter hasil analisis: %s", json.dumps(analyzed_params, indent=2))
+    
+    if snapshot is None:
+        snapshot = get_market_snapshot()
+    df_fundamentals, df_prices = snapshot.df_fundamentals, snapshot.df_prices
+    report_progress("data_fetched", tickers=len(df_prices.columns), data_as_of_date=snapshot.data_as_of_date)
+    risk_model = risk_model_registry.get(snapshot.snapshot_id, df_prices)
 
+    entry = lookup_strategy_table(snapshot, analyzed_params)
+    if entry is not None:
+        # Hasil filter & solver sudah diprakomputasi di tabel strategi snapshot ini
+        optimization_target = analyzed_params["technical_constraints"].get("optimization_target", "max_sharpe")
+        report_progress("filters_applied", eligible=len(entry.tickers), precomputed=True)
+        report_progress("solver_done", optimization_target=optimization_target,
+                        holdings=sum(1 for w in entry.weights.values() if w > 0), precomputed=True)
+        with span("allocation"):
+            portfolio_result = allocate_portfolio(request.initial_capital, entry.weights, entry.performance,
+                                                  df_fundamentals, df_prices,
+                                                  allocation_mode=request.allocation_mode)
+    else:
         portfolio_result = generate_optimal_portfolio(
             initial_capital=request.initial_capital,
             user_preferences=analyzed_params["stock_universe_filters"],
             technical_constraints=analyzed_params["technical_constraints"],
             df_fundamentals=df_fundamentals,
-            df_prices=df_prices
+            df_prices=df_prices,
+            risk_model=risk_model,
+            universe_index=get_universe_index(snapshot)
         )
 
-        if "error" in portfolio_result:
-            print(f"[ERROR] Error dari generate_optimal_portfolio: {portfolio_result['error']}")
-            raise HTTPException(status_code=400, detail=portfolio_result["error"])
-        
-        final_response = {
-            "input_summary": {
-                "initial_capital": f"Rp {request.initial_capital:,.0f}",
-                "investment_goal": request.investment_goal,
-                "time_horizon": request.time_horizon,
-                "risk_score": analyzed_params['risk_score'],
-                "determined_strategy": analyzed_params['investment_strategy']
-            },
-            "portfolio_recommendation": portfolio_result
-        }
-        print("[INFO] Rekomendasi berhasil dibuat.")
-        return final_response
+    if "error" in portfolio_result:
+        logger.error("Error dari generate_optimal_portfolio: %s", portfolio_result['error'])
+        raise HTTPException(status_code=400, detail=portfolio_result["error"])
+    
+    report_progress("allocation_ready", holdings=len(portfolio_result["allocation_details"]))
+    final_response = format_recommendation_response(request, analyzed_params, portfolio_result)
+    logger.debug("Rekomendasi berhasil dibuat.")
+    return final_response
+
+def build_cached_recommendation(request: PortfolioRequest, if_none_match: Optional[str]) -> tuple:
+    """
+    Rekomendasi dengan cache respons per ETag.
+
+    Mengembalikan `(etag, body)`; `body` None berarti klien sudah memegang versi terbaru
+    (If-None-Match cocok) sehingga cukup dijawab 304 tanpa menjalankan pipeline.
+    """
+    snapshot = get_market_snapshot()
+    etag = make_etag(canonical_request_hash(request.model_dump()), snapshot.snapshot_id)
+    if etag_matches(if_none_match, etag):
+        CACHE_EVENTS.inc(cache="response", result="not_modified")
+        return etag, None
+    body = response_cache.get(etag)
+    CACHE_EVENTS.inc(cache="response", result="miss" if body is None else "hit")
+    if body is None:
+        result = build_recommendation(request, snapshot)
+        with span("serialize"):
+            body = JSONResponse(result).body
+        response_cache.put(etag, body)
+    return etag, body
+
+def build_frontier(request: PortfolioRequest, points: int) -> dict:
+    """Efficient frontier untuk universe eligible milik profil; hasil di-cache per snapshot."""
+    analyzed_params = analyze_user_input(request)
+    snapshot = market_cache.get()
+    if snapshot is None:
+        logger.error("Gagal mengambil data pasar yang valid dari cache data pasar untuk frontier.")
+        raise HTTPException(status_code=503, detail="Gagal mengambil data pasar saat ini. Coba lagi beberapa saat.")
+    risk_model = risk_model_registry.get(snapshot.snapshot_id, snapshot.df_prices)
+
+    eligible = select_eligible_tickers(analyzed_params["stock_universe_filters"], snapshot.df_fundamentals, snapshot.df_prices,
+                                       get_universe_index(snapshot))
+    if "error" in eligible:
+        raise HTTPException(status_code=400, detail=eligible["error"])
+    tickers = eligible["tickers"]
+
+    cache_key = (snapshot.snapshot_id, tuple(sorted(tickers)), points)
+    frontier = frontier_cache.get(cache_key)
+    CACHE_EVENTS.inc(cache="frontier", result="miss" if frontier is None else "hit")
+    if frontier is None:
+        mu, S = estimate_mu_cov(tickers, eligible["df_prices"], risk_model)
+        try:
+            with span("frontier_solver"):
+                frontier = execution.run_cpu(compute_frontier, tickers, mu.to_numpy(), S.to_numpy(), points,
+                                             timeout=SOLVER_TIMEOUT_SECONDS)
+        except ValueError as e:
+            SOLVER_FAILURES.inc(problem="frontier")
+            logger.error("Perhitungan frontier gagal: %s", e)
+            raise HTTPException(status_code=400, detail=f"Perhitungan efficient frontier gagal: {e}")
+        frontier_cache.put(cache_key, frontier)
+    else:
+        logger.debug("Efficient frontier diambil dari cache untuk %s saham.", len(tickers))
+
+    return {
+        "data_as_of_date": snapshot.data_as_of_date,
+        "determined_strategy": analyzed_params["investment_strategy"],
+        "eligible_tickers": tickers,
+        **frontier
+    }
+
+def compute_backtest_weights(tickers: list, df_prices_filtered: pd.DataFrame, positions, lookback_days: int, optimization_target: str):
+    """Re-optimisasi walk-forward di setiap rebalance; potongan posisi diselesaikan paralel di process pool."""
+    prices = df_prices_filtered.to_numpy(dtype=float)
+    returns = prices[1:] / prices[:-1] - 1 # Return dihitung sekali untuk seluruh riwayat
+    chunks = split_walk_forward(returns, positions, lookback_days, max(1, execution.cpu_workers))
+    with span("backtest_reoptimize"):
+        results = execution.map_cpu(walk_forward_weights,
+                                    [(chunk, tickers, chunk_positions, lookback_days, optimization_target)
+                                     for chunk, chunk_positions in chunks],
+                                    timeout=BACKTEST_TIMEOUT_SECONDS)
+    return fill_failed_rebalances(np.vstack(results))
+
+def build_backtest(request: PortfolioRequest, rebalance: str, lookback_days: int) -> dict:
+    """
+    Backtest historis portofolio profil di atas riwayat harga yang di-cache.
+
+    `rebalance="none"`: bobot rekomendasi dibeli sekali lalu ditahan (in-sample, karena bobot
+    dihitung dari seluruh riwayat). `monthly`/`quarterly`: bobot dioptimasi ulang di setiap
+    rebalance hanya dengan `lookback_days` hari sebelumnya (walk-forward, tanpa look-ahead).
+    """
+    analyzed_params = analyze_user_input(request)
+    snapshot = market_cache.get()
+    if snapshot is None:
+        logger.error("Gagal mengambil data pasar yang valid dari cache data pasar untuk backtest.")
+        raise HTTPException(status_code=503, detail="Gagal mengambil data pasar saat ini. Coba lagi beberapa saat.")
+    risk_model = risk_model_registry.get(snapshot.snapshot_id, snapshot.df_prices)
+
+    eligible = select_eligible_tickers(analyzed_params["stock_universe_filters"], snapshot.df_fundamentals, snapshot.df_prices,
+                                       get_universe_index(snapshot))
+    if "error" in eligible:
+        raise HTTPException(status_code=400, detail=eligible["error"])
+    tickers, df_prices_filtered = eligible["tickers"], eligible["df_prices"]
+    if len(df_prices_filtered) <= lookback_days + 1:
+        raise HTTPException(status_code=400, detail=f"Riwayat harga ({len(df_prices_filtered)} hari) tidak cukup untuk lookback {lookback_days} hari.")
 
+    optimization_target = analyzed_params["technical_constraints"].get("optimization_target", "max_sharpe")
+    positions = rebalance_positions(df_prices_filtered.index, rebalance, start=lookback_days)
+    if rebalance == "none":
+        optimized = optimize_profile_weights(tickers, df_prices_filtered, analyzed_params["technical_constraints"],
+                                             request.initial_capital, risk_model)
+        if "error" in optimized:
+            raise HTTPException(status_code=400, detail=optimized["error"])
+        weights = np.array([[optimized["weights"].get(t, 0.0) for t in tickers]])
+    else:
+        cache_key = (snapshot.snapshot_id, tuple(tickers), optimization_target, rebalance, lookback_days)
+        weights = backtest_weights_cache.get(cache_key)
+        CACHE_EVENTS.inc(cache="backtest", result="miss" if weights is None else "hit")
+        if weights is None:
+            weights = compute_backtest_weights(tickers, df_prices_filtered, positions, lookback_days, optimization_target)
+            backtest_weights_cache.put(cache_key, weights)
+
+    with span("backtest_simulate"):
+        result = simulate_portfolio(df_prices_filtered.to_numpy(dtype=float), positions, weights, request.initial_capital)
+        backtest = format_backtest(result, df_prices_filtered.index, tickers, request.initial_capital)
+
+    return {
+        "data_as_of_date": snapshot.data_as_of_date,
+        "determined_strategy": analyzed_params["investment_strategy"],
+        "rebalance": rebalance,
+        "lookback_days": lookback_days,
+        "in_sample": rebalance == "none",
+        "eligible_tickers": tickers,
+        **backtest
+    }
+
+def build_simulation(request: PortfolioRequest, paths: int, seed: Optional[int] = None) -> dict:
+    """Simulasi Monte Carlo kekayaan portofolio rekomendasi selama horizon investasi profil."""
+    analyzed_params = analyze_user_input(request)
+    snapshot = market_cache.get()
+    if snapshot is None:
+        logger.error("Gagal mengambil data pasar yang valid dari cache data pasar untuk simulasi.")
+        raise HTTPException(status_code=503, detail="Gagal mengambil data pasar saat ini. Coba lagi beberapa saat.")
+    risk_model = risk_model_registry.get(snapshot.snapshot_id, snapshot.df_prices)
+
+    eligible = select_eligible_tickers(analyzed_params["stock_universe_filters"], snapshot.df_fundamentals, snapshot.df_prices,
+                                       get_universe_index(snapshot))
+    if "error" in eligible:
+        raise HTTPException(status_code=400, detail=eligible["error"])
+    tickers = eligible["tickers"]
+    optimized = optimize_profile_weights(tickers, eligible["df_prices"], analyzed_params["technical_constraints"],
+                                         request.initial_capital, risk_model)
+    if "error" in optimized:
+        raise HTTPException(status_code=400, detail=optimized["error"])
+
+    # Hanya saham berbobot yang ikut simulasi (mu & kovarians diiris dari model snapshot)
+    held = [t for t in tickers if optimized["weights"].get(t, 0) > 0]
+    mu, S = estimate_mu_cov(tickers, eligible["df_prices"], risk_model)
+    weights = np.array([optimized["weights"][t] for t in held])
+    years = HORIZON_YEARS[analyzed_params["time_horizon_category"]]
+    with span("simulation"):
+        simulation = execution.run_cpu(simulate_wealth, weights, mu.loc[held].to_numpy(), S.loc[held, held].to_numpy(),
+                                       request.initial_capital, years, paths, request.goal_amount,
+                                       seed, timeout=SIMULATION_TIMEOUT_SECONDS)
+
+    return {
+        "data_as_of_date": snapshot.data_as_of_date,
+        "determined_strategy": analyzed_params["investment_strategy"],
+        "time_horizon_category": analyzed_params["time_horizon_category"],
+        "initial_capital": request.initial_capital,
+        "weights": {t: optimized["weights"][t] for t in held},
+        **simulation
+    }
+
+def prepare_batch(requests: List[PortfolioRequest]) -> dict:
+    """
+    Tahap awal batch: analisis semua profil, satu kali baca data pasar, lalu kelompokkan
+    profil yang menghasilkan pasangan (ticker eligible, target optimisasi) yang sama.
+    """
+    logger.info("Menerima batch berisi %s profil investor.", len(requests))
+    snapshot = market_cache.get()
+    if snapshot is None:
+        logger.error("Gagal mengambil data pasar yang valid dari cache data pasar untuk batch.")
+        raise HTTPException(status_code=503, detail="Gagal mengambil data pasar saat ini. Coba lagi beberapa saat.")
+    risk_model = risk_model_registry.get(snapshot.snapshot_id, snapshot.df_prices)
+
+    universe_index = get_universe_index(snapshot)
+
+    analyzed = [analyze_user_input(request) for request in requests]
+    errors = {}
+    groups = {}
+    eligibility_by_filter = {} # Profil dengan filter preferensi yang sama cukup difilter sekali
+    for index, analyzed_params in enumerate(analyzed):
+        filters = analyzed_params["stock_universe_filters"]
+        filter_key = (filters["syariah_only"], tuple(sorted(filters["sectors"])))
+        if filter_key not in eligibility_by_filter:
+            eligibility_by_filter[filter_key] = select_eligible_tickers(filters, snapshot.df_fundamentals, snapshot.df_prices,
+                                                                        universe_index)
+        eligible = eligibility_by_filter[filter_key]
+        if "error" in eligible:
+            errors[index] = eligible["error"]
+            continue
+
+        optimization_target = analyzed_params["technical_constraints"].get("optimization_target", "max_sharpe")
+        max_holdings = analyzed_params["technical_constraints"].get("max_holdings")
+        # Mode sparse bergantung pada modal (bobot minimum satu lot), jadi modal ikut menjadi kunci kelompok
+        sparse_key = (max_holdings, requests[index].initial_capital) if max_holdings else None
+        group_key = (tuple(sorted(eligible["tickers"])), optimization_target, sparse_key)
+        group = groups.setdefault(group_key, {
+            "tickers": eligible["tickers"], "df_prices": eligible["df_prices"],
+            "optimization_target": optimization_target, "sparse_key": sparse_key, "members": []
+        })
+        group["members"].append(index)
+
+    logger.info("Batch: %s masalah optimisasi unik untuk %s profil valid.", len(groups), len(requests) - len(errors))
+    return {"snapshot": snapshot, "risk_model": risk_model, "analyzed": analyzed,
+            "errors": errors, "groups": list(groups.values())}
+
+def process_batch_group(group: dict, requests: List[PortfolioRequest], prepared: dict) -> list:
+    """Menyelesaikan satu optimisasi untuk sebuah kelompok, lalu alokasi lot per klien."""
+    if group["sparse_key"] is not None:
+        max_holdings, initial_capital = group["sparse_key"]
+        optimized = optimize_sparse_weights(group["tickers"], group["df_prices"], group["optimization_target"],
+                                            max_holdings, initial_capital, prepared["risk_model"])
+    else:
+        optimized = optimize_portfolio_weights(group["tickers"], group["df_prices"],
+                                               group["optimization_target"], prepared["risk_model"])
+    lines = []
+    for index in group["members"]:
+        if "error" in optimized:
+            lines.append(_batch_line(index, 400, detail=optimized["error"]))
+            continue
+        request = requests[index]
+        portfolio_result = allocate_portfolio(request.initial_capital, optimized["weights"], optimized["performance"],
+                                              prepared["snapshot"].df_fundamentals, group["df_prices"],
+                                              allocation_mode=request.allocation_mode)
+        lines.append(_batch_line(index, 200, result=format_recommendation_response(
+            request, prepared["analyzed"][index], portfolio_result)))
+    return lines
+
+def _batch_line(index: int, status_code: int, result: dict = None, detail: str = None) -> str:
+    """Satu baris NDJSON hasil batch."""
+    line = {"index": index, "status_code": status_code}
+    if result is not None:
+        line["result"] = result
+    if detail is not None:
+        line["detail"] = detail
+    return json.dumps(line, default=str) + "\n"
+
+async def _stream_batch(requests: List[PortfolioRequest], prepared: dict):
+    """Mengalirkan hasil batch per kelompok segera setelah solver kelompok tersebut selesai."""
+    for index, detail in prepared["errors"].items():
+        yield _batch_line(index, 400, detail=detail)
+
+    # Batasi kelompok yang diproses serentak agar satu batch tidak memenuhi seluruh antrean
+    semaphore = asyncio.Semaphore(max(1, execution.cpu_workers))
+
+    async def run_group(group):
+        async with semaphore:
+            try:
+                return await execution.run_io(process_batch_group, group, requests, prepared,
+                                              timeout=RECOMMENDATION_TIMEOUT_SECONDS)
+            except QueueFullError:
+                return [_batch_line(i, 503, detail="Server sedang sibuk memproses permintaan lain. Coba lagi beberapa saat.")
+                        for i in group["members"]]
+            except ExecutionTimeoutError:
+                return [_batch_line(i, 504, detail="Pemrosesan rekomendasi melewati batas waktu. Coba lagi beberapa saat.")
+                        for i in group["members"]]
+            except Exception as e:
+                logger.error("Kelompok batch gagal diproses: %s", e)
+                return [_batch_line(i, 500, detail=f"Terjadi kesalahan internal di server: {str(e)}")
+                        for i in group["members"]]
+
+    tasks = [asyncio.ensure_future(run_group(group)) for group in prepared["groups"]]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for line in await next_done:
+                yield line
+    finally:
+        # Klien terputus: batalkan kelompok yang belum dijalankan
+        for task in tasks:
+            task.cancel()
+
+async def _stream_recommendation(request: PortfolioRequest):
+    """
+    Event SSE per tahap pipeline (data_fetched, filters_applied, solver_done, allocation_ready),
+    diakhiri event `result` (body rekomendasi) atau `error`.
+
+    Jika klien terputus, generator ini dibatalkan: pipeline yang masih antre dibatalkan dan
+    pipeline yang sedang berjalan berhenti di laporan tahap berikutnya / saat menunggu solver.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    reporter = ProgressReporter(lambda stage, data: loop.call_soon_threadsafe(events.put_nowait, (stage, data)))
+    token = start_progress(reporter)
+    try:
+        # Task menyalin context saat dibuat, sehingga reporter ikut ke thread pipeline
+        pipeline = asyncio.ensure_future(run_pipeline(build_cached_recommendation, request, None))
+    finally:
+        reset_progress(token)
+
+    try:
+        while not pipeline.done():
+            next_event = asyncio.ensure_future(events.get())
+            await asyncio.wait({next_event, pipeline}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                yield format_sse(*next_event.result())
+            else:
+                next_event.cancel()
+        while not events.empty():
+            yield format_sse(*events.get_nowait())
+        try:
+            _, body = pipeline.result()
+        except HTTPException as exc:
+            yield format_sse("error", {"status_code": exc.status_code, "detail": exc.detail})
+            return
+        yield format_sse("result", body.decode("utf-8"))
+    finally:
+        if not pipeline.done():
+            reporter.cancel()
+            pipeline.cancel()
+
+async def run_pipeline(fn, *args):
+    """Menjalankan fungsi pipeline di lapisan eksekusi dan memetakan kegagalannya ke HTTPException."""
+    try:
+        return await execution.run_io(fn, *args, timeout=RECOMMENDATION_TIMEOUT_SECONDS)
     except HTTPException as http_exc:
         raise http_exc
+    except QueueFullError as e:
+        logger.warning("Request ditolak karena server sibuk: %s", e)
+        raise HTTPException(status_code=503, detail="Server sedang sibuk memproses permintaan lain. Coba lagi beberapa saat.")
+    except (PipelineCancelled, ExecutionCancelledError) as e:
+        logger.info("Pipeline dihentikan karena klien terputus: %s", e)
+        raise HTTPException(status_code=499, detail="Request dibatalkan oleh klien.")
+    except ExecutionTimeoutError as e:
+        logger.error("Request melewati batas waktu: %s", e)
+        raise HTTPException(status_code=504, detail="Pemrosesan rekomendasi melewati batas waktu. Coba lagi beberapa saat.")
     except Exception as e:
-        print(f"[FATAL] Terjadi kesalahan tidak terduga di endpoint: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Terjadi kesalahan tidak terduga di endpoint: %s", e)
         raise HTTPException(status_code=500, detail=f"Terjadi kesalahan internal di server: {str(e)}")
 
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    """Mencatat durasi request per route; span tahap pipeline dikumpulkan untuk header X-Timing."""
+    token = start_request_timing()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = reset_request_timing(token)
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(elapsed, route=getattr(route, "path", "unmatched"),
+                                     method=request.method, status=status_code)
+    if TIMING_HEADER_ENABLED:
+        response.headers["X-Timing"] = format_timing_header(timings + [("total", elapsed)])
+    if request.url.path not in PROBE_PATHS:
+        record_startup("first_response")
+    return response
+
+PROBE_PATHS = ("/healthz", "/readyz", "/metrics")
+
+@app.get("/healthz", summary="Liveness probe", include_in_schema=False)
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz", summary="Readiness probe: data pasar tersedia dan solver sudah di-warm-up", include_in_schema=False)
+async def readyz():
+    checks = readiness_checks()
+    snapshot = market_cache.snapshot
+    body = {"ready": all(checks.values()), "checks": checks,
+            "snapshot_id": snapshot.snapshot_id if snapshot is not None else None}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+@app.get("/metrics", summary="Metrik Prometheus", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/api/v1/recommendations", summary="Membuat Rekomendasi Portofolio")
+async def create_recommendation(request: PortfolioRequest, if_none_match: Optional[str] = Header(None)):
+    etag, body = await run_pipeline(build_cached_recommendation, request, if_none_match)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.post("/api/v1/recommendations/stream", summary="Membuat Rekomendasi Portofolio dengan Progres (SSE)")
+async def create_recommendation_stream(request: PortfolioRequest):
+    return StreamingResponse(_stream_recommendation(request), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/v1/recommendations/frontier", summary="Efficient Frontier untuk Profil Investor")
+async def create_frontier(request: PortfolioRequest, points: int = Query(50, ge=2, le=MAX_FRONTIER_POINTS)):
+    return await run_pipeline(build_frontier, request, points)
+
+@app.post("/api/v1/recommendations/backtest", summary="Backtest Historis Portofolio Rekomendasi")
+async def create_backtest(request: PortfolioRequest,
+                          rebalance: Literal[REBALANCE_RULES] = Query("none"),
+                          lookback_days: int = Query(252, ge=60, le=2520)):
+    if request.max_holdings is not None and rebalance != "none":
+        # Bobot walk-forward memakai optimisasi dense; batas lot/jumlah saham hanya berlaku tanpa rebalancing
+        raise HTTPException(status_code=400, detail="max_holdings hanya didukung untuk backtest dengan rebalance=none.")
+    return await run_pipeline(build_backtest, request, rebalance, lookback_days)
+
+@app.post("/api/v1/recommendations/simulation", summary="Simulasi Monte Carlo Peluang Mencapai Tujuan")
+async def create_simulation(request: PortfolioRequest,
+                            paths: int = Query(50_000, ge=1_000, le=MAX_SIMULATION_PATHS),
+                            seed: Optional[int] = Query(None, ge=0)):
+    return await run_pipeline(build_simulation, request, paths, seed)
+
+@app.post("/api/v1/recommendations/batch", summary="Membuat Rekomendasi Portofolio untuk Banyak Profil (NDJSON)")
+async def create_recommendations_batch(requests: List[PortfolioRequest]):
+    if not requests:
+        raise HTTPException(status_code=400, detail="Batch tidak boleh kosong.")
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Ukuran batch maksimal {MAX_BATCH_SIZE} profil.")
+    prepared = await run_pipeline(prepare_batch, requests)
+    return StreamingResponse(_stream_batch(requests, prepared), media_type="application/x-ndjson")
+
 # --- 6. Cara Menjalankan Server ---
+record_startup("import")
+
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    import uvicorn
+    if WORKERS > 1:
+        # Mode produksi: worker membaca konfigurasi dari environment saat mengimpor ulang modul ini
+        os.environ.setdefault("ROBOKAYA_SHARED_SNAPSHOT_DIR",
+                              os.path.join(DATA_DIR or tempfile.gettempdir(), "shared"))
+        # Process pool solver dibagi rata antar worker agar total proses tidak melebihi jumlah core
+        os.environ.setdefault("ROBOKAYA_OPTIMIZER_PROCESSES", str(max(1, (os.cpu_count() or 1) // WORKERS)))
+        uvicorn.run("main:app", host="0.0.0.0", port=int(os.getenv("ROBOKAYA_PORT", 8000)), workers=WORKERS)
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,247 @@
+# market_cache.py
+"""Cache data pasar bersama (harga & fundamental) untuk seluruh proses server."""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+
+from metrics import CACHE_EVENTS
+
+logger = logging.getLogger("robokaya.market_cache")
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Satu potret data pasar yang sudah tersinkronisasi dan siap dipakai optimizer."""
+    df_fundamentals: pd.DataFrame
+    df_prices: pd.DataFrame
+    prices_fetched_at: float
+    fundamentals_fetched_at: float
+    snapshot_id: str = field(default="")
+
+    @property
+    def data_as_of_date(self) -> str:
+        if self.df_prices.empty:
+            return "N/A"
+        return self.df_prices.index[-1].strftime('%Y-%m-%d')
+
+
+def _make_snapshot_id(df_prices: pd.DataFrame, prices_fetched_at: float) -> str:
+    """ID snapshot: tanggal data terakhir + waktu penarikan harga (untuk kunci cache turunan)."""
+    last_date = df_prices.index[-1].strftime('%Y%m%d') if not df_prices.empty else "empty"
+    return f"{last_date}-{int(prices_fetched_at)}"
+
+
+class MarketDataCache:
+    """
+    Cache data pasar dengan TTL terpisah untuk harga (harian) dan fundamental (mingguan).
+
+    Semantik stale-while-revalidate: selama data masih di bawah `max_stale`, pemanggil
+    langsung menerima snapshot lama sementara pembaruan berjalan di thread latar belakang.
+    Pemanggil hanya menunggu Yahoo jika cache masih kosong atau data sudah terlalu basi.
+
+    Pada mode multi-worker hanya proses pemimpin yang menarik data (`fetch_enabled`);
+    worker lain menerima snapshot yang dipublikasikan pemimpin lewat `adopt`.
+
+    `fallback_usage` melaporkan `(harga, fundamental)`: waktu rekam data cadangan yang dipakai fetch
+    terakhir, atau None untuk bagian yang live. Bagian dari rekaman diberi stempel waktu rekamannya
+    (harga live tetap memakai waktu unduh), dan Yahoo dicoba lagi setelah `retry_interval`.
+    """
+
+    def __init__(
+        self,
+        load_all: Callable[[], Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]],
+        load_prices: Callable[[pd.DataFrame], Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]],
+        price_ttl: float,
+        fundamentals_ttl: float,
+        max_stale: float,
+        load_stored: Optional[Callable[[], Optional[tuple]]] = None,
+        retry_interval: float = 300.0,
+        clock: Callable[[], float] = time.time,
+        on_refresh: Optional[Callable[[MarketSnapshot], None]] = None,
+        fetch_enabled: bool = True,
+        fallback_usage: Optional[Callable[[], Tuple[Optional[float], Optional[float]]]] = None,
+    ):
+        self._load_all = load_all
+        self._load_prices = load_prices
+        self._load_stored = load_stored
+        self.price_ttl = price_ttl
+        self.fundamentals_ttl = fundamentals_ttl
+        self.max_stale = max_stale
+        self.retry_interval = retry_interval
+        self._clock = clock
+        self._on_refresh = on_refresh
+        self.fetch_enabled = fetch_enabled
+        self._fallback_usage = fallback_usage
+
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._background_thread: Optional[threading.Thread] = None
+        self._last_failure_at: Optional[float] = None
+        self._store_checked = False
+
+    # --- Status ---
+    @property
+    def snapshot(self) -> Optional[MarketSnapshot]:
+        return self._snapshot
+
+    def _prices_stale(self, snapshot: MarketSnapshot, now: float) -> bool:
+        return now - snapshot.prices_fetched_at >= self.price_ttl
+
+    def _fundamentals_stale(self, snapshot: MarketSnapshot, now: float) -> bool:
+        return now - snapshot.fundamentals_fetched_at >= self.fundamentals_ttl
+
+    def is_stale(self, snapshot: Optional[MarketSnapshot] = None) -> bool:
+        snapshot = snapshot or self._snapshot
+        if snapshot is None:
+            return True
+        now = self._clock()
+        return self._prices_stale(snapshot, now) or self._fundamentals_stale(snapshot, now)
+
+    def _too_stale(self, snapshot: MarketSnapshot) -> bool:
+        return self._clock() - snapshot.prices_fetched_at >= self.max_stale
+
+    def _in_failure_backoff(self) -> bool:
+        return (self._last_failure_at is not None and
+                self._clock() - self._last_failure_at < self.retry_interval)
+
+    # --- Akses ---
+    def warm_from_store(self) -> Optional[MarketSnapshot]:
+        """Sekali per proses: memuat snapshot terakhir dari disk (tanpa jaringan) jika cache kosong."""
+        if self._load_stored is None or self._store_checked:
+            return self._snapshot
+        with self._refresh_lock:
+            if self._snapshot is not None or self._store_checked:
+                return self._snapshot
+            self._store_checked = True
+            try:
+                stored = self._load_stored()
+            except Exception as e:
+                logger.warning("Gagal memuat data pasar dari disk: %s", e)
+                stored = None
+            if stored is None:
+                return None
+            df_fundamentals, df_prices, prices_fetched_at, fundamentals_fetched_at = stored
+            self._snapshot = MarketSnapshot(
+                df_fundamentals=df_fundamentals,
+                df_prices=df_prices,
+                prices_fetched_at=prices_fetched_at,
+                fundamentals_fetched_at=fundamentals_fetched_at,
+                snapshot_id=_make_snapshot_id(df_prices, prices_fetched_at),
+            )
+            logger.info("Cache data pasar dipanaskan dari disk (snapshot %s).", self._snapshot.snapshot_id)
+            return self._snapshot
+
+    def get(self) -> Optional[MarketSnapshot]:
+        """Mengembalikan snapshot terkini; memicu pembaruan latar belakang jika sudah basi."""
+        snapshot = self._snapshot or self.warm_from_store()
+        if not self.fetch_enabled:
+            # Worker pengikut: tidak pernah menghubungi Yahoo, snapshot baru datang lewat adopt()
+            CACHE_EVENTS.inc(cache="market_data", result="miss" if snapshot is None else "hit")
+            return snapshot
+        if snapshot is None or (self._too_stale(snapshot) and not self._in_failure_backoff()):
+            # Cache kosong / terlalu basi: pemanggil harus menunggu (hanya satu fetch yang berjalan)
+            CACHE_EVENTS.inc(cache="market_data", result="miss")
+            return self.refresh_if_stale() or snapshot
+        if self.is_stale(snapshot):
+            CACHE_EVENTS.inc(cache="market_data", result="stale")
+            self.refresh_in_background()
+        else:
+            CACHE_EVENTS.inc(cache="market_data", result="hit")
+        return snapshot
+
+    def refresh_in_background(self) -> bool:
+        """Menjalankan pembaruan di thread daemon jika belum ada yang berjalan."""
+        if not self.fetch_enabled or self._in_failure_backoff():
+            return False
+        if self._background_thread is not None and self._background_thread.is_alive():
+            return False
+        self._background_thread = threading.Thread(
+            target=self.refresh_if_stale, name="market-data-refresh", daemon=True
+        )
+        self._background_thread.start()
+        return True
+
+    def refresh_if_stale(self, force: bool = False) -> Optional[MarketSnapshot]:
+        """Memperbarui data yang sudah kedaluwarsa. Pemanggil serentak menunggu satu fetch yang sama."""
+        self.warm_from_store()
+        with self._refresh_lock:
+            snapshot = self._snapshot
+            if not force and snapshot is not None and not self.is_stale(snapshot):
+                return snapshot
+
+            now = self._clock()
+            try:
+                if force or snapshot is None or self._fundamentals_stale(snapshot, now):
+                    df_fundamentals, df_prices = self._load_all()
+                    fundamentals_fetched_at = now
+                else:
+                    logger.info("Fundamental masih segar, hanya memperbarui data harga...")
+                    df_fundamentals, df_prices = self._load_prices(snapshot.df_fundamentals)
+                    fundamentals_fetched_at = snapshot.fundamentals_fetched_at
+            except Exception as e:
+                logger.error("Pembaruan cache data pasar gagal: %s", e)
+                df_fundamentals, df_prices = None, None
+
+            if df_fundamentals is None or df_prices is None or df_fundamentals.empty or df_prices.empty:
+                self._last_failure_at = self._clock()
+                if snapshot is not None:
+                    logger.warning("Pembaruan data pasar gagal, tetap menyajikan snapshot lama.")
+                return None
+
+            prices_fetched_at = now
+            prices_recorded_at, fundamentals_recorded_at = (
+                self._fallback_usage() if self._fallback_usage is not None else (None, None))
+            if prices_recorded_at is not None:
+                # Harga dari rekaman: hanya berguna jika lebih baru dari snapshot yang sedang disajikan
+                if snapshot is not None and prices_recorded_at <= snapshot.prices_fetched_at:
+                    self._last_failure_at = self._clock()
+                    logger.warning("Yahoo tidak tersedia dan rekaman harga tidak lebih baru, tetap menyajikan snapshot lama.")
+                    return None
+                prices_fetched_at = prices_recorded_at
+            if fundamentals_recorded_at is not None:
+                fundamentals_fetched_at = min(fundamentals_fetched_at, fundamentals_recorded_at)
+            degraded = prices_recorded_at is not None or fundamentals_recorded_at is not None
+            # Data (sebagian) dari rekaman: coba Yahoo lagi setelah retry_interval, bukan setelah TTL
+            self._last_failure_at = self._clock() if degraded else None
+
+            self._snapshot = MarketSnapshot(
+                df_fundamentals=df_fundamentals,
+                df_prices=df_prices,
+                prices_fetched_at=prices_fetched_at,
+                fundamentals_fetched_at=fundamentals_fetched_at,
+                snapshot_id=_make_snapshot_id(df_prices, prices_fetched_at),
+            )
+            if degraded:
+                logger.warning("Yahoo tidak tersedia, sebagian data berasal dari rekaman (snapshot %s).",
+                               self._snapshot.snapshot_id)
+            else:
+                logger.info("Cache data pasar diperbarui (snapshot %s).", self._snapshot.snapshot_id)
+            if self._on_refresh is not None:
+                try:
+                    self._on_refresh(self._snapshot)
+                except Exception as e:
+                    logger.error("Publikasi snapshot data pasar gagal: %s", e)
+            return self._snapshot
+
+    def adopt(self, snapshot: MarketSnapshot) -> bool:
+        """Mengganti snapshot dengan snapshot dari luar (mis. dipublikasikan worker pemimpin)."""
+        with self._refresh_lock:
+            if self._snapshot is not None and self._snapshot.snapshot_id == snapshot.snapshot_id:
+                return False
+            self._snapshot = snapshot
+            self._store_checked = True
+            self._last_failure_at = None
+        logger.info("Snapshot data pasar %s diadopsi.", snapshot.snapshot_id)
+        return True
+
+    def clear(self) -> None:
+        """Mengosongkan cache (dipakai saat pengujian atau reload manual)."""
+        with self._refresh_lock:
+            self._snapshot = None
+            self._last_failure_at = None
+            self._store_checked = False
@@ -0,0 +1,198 @@
+# metrics.py
+"""Metrik ala Prometheus (counter, gauge, histogram) dan span pengukur waktu per tahap pipeline."""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(labelnames: Sequence[str], values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Gauge yang nilainya dibaca dari fungsi saat /metrics di-scrape."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        try:
+            value = float(self._function())
+        except Exception:
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((k, list(v), self._sums[k]) for k, v in self._counts.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_value(bound) if bound != float("inf") else "+Inf"
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {repr(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, function: Callable[[], float]) -> Gauge:
+        # Gauge dapat didaftarkan ulang (mis. saat objek sumbernya diganti)
+        self._metrics[name] = Gauge(name, documentation, function)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "robokaya_stage_duration_seconds", "Durasi setiap tahap pipeline rekomendasi.", ["stage"])
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "robokaya_http_request_duration_seconds", "Durasi request HTTP per route.", ["route", "method", "status"])
+CACHE_EVENTS = REGISTRY.counter(
+    "robokaya_cache_events_total", "Hit/miss cache per jenis cache.", ["cache", "result"])
+TICKERS_DROPPED = REGISTRY.counter(
+    "robokaya_tickers_dropped_total", "Ticker yang dibuang dari universe, per tahap dan alasan.", ["stage", "reason"])
+SOLVER_FAILURES = REGISTRY.counter(
+    "robokaya_solver_failures_total", "Optimisasi yang gagal, per jenis masalah.", ["problem"])
+UPSTREAM_CALLS = REGISTRY.counter(
+    "robokaya_upstream_calls_total", "Panggilan keluar ke sumber data (Yahoo), per operasi.", ["operation"])
+UPSTREAM_WAIT_SECONDS = REGISTRY.histogram(
+    "robokaya_upstream_wait_seconds", "Waktu tunggu token rate limit sebelum panggilan keluar dimulai.",
+    ["operation"])
+
+
+# --- Span per request ---
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("robokaya_request_timings", default=None)
+
+
+def start_request_timing():
+    """Mulai mengumpulkan span untuk request saat ini; kembalikan token untuk `reset_request_timing`."""
+    return _request_timings.set([])
+
+
+def reset_request_timing(token) -> List[Tuple[str, float]]:
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return timings
+
+
+@contextmanager
+def span(stage: str):
+    """Mengukur durasi satu tahap: masuk ke histogram global dan ke daftar span request (jika ada)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def format_timing_header(timings: List[Tuple[str, float]]) -> str:
+    """Format mirip Server-Timing: `stage;dur=12.3, stage2;dur=4.5` (milidetik)."""
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in timings)
@@ -0,0 +1,23 @@
+# portfolio_math.py
+"""Konstanta dan metrik portofolio bersama untuk solver rekomendasi, pruning, frontier, dan backtest."""
+
+from typing import Tuple
+
+import numpy as np
+
+# Sama dengan default PyPortfolioOpt agar sharpe ratio konsisten dengan endpoint rekomendasi
+RISK_FREE_RATE = 0.02
+# Bobot di bawah ambang ini dianggap nol (setara `clean_weights` PyPortfolioOpt)
+WEIGHT_CUTOFF = 1e-4
+
+
+def sharpe_ratio(expected_return: float, volatility: float) -> float:
+    """Sharpe ratio terhadap `RISK_FREE_RATE`; 0 untuk volatilitas nol."""
+    return (expected_return - RISK_FREE_RATE) / volatility if volatility > 0 else 0.0
+
+
+def portfolio_performance(weights: np.ndarray, mu: np.ndarray, S: np.ndarray) -> Tuple[float, float, float]:
+    """Return, volatilitas, dan sharpe ex-ante (sama dengan `portfolio_performance` PyPortfolioOpt)."""
+    expected_return = float(weights @ mu)
+    volatility = float(np.sqrt(max(weights @ S @ weights, 0.0)))
+    return expected_return, volatility, sharpe_ratio(expected_return, volatility)
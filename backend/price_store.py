@@ -0,0 +1,135 @@
+# price_store.py
+"""Penyimpanan lokal (on-disk) untuk matriks harga penutupan dan data fundamental."""
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("robokaya.price_store")
+
+
+class PriceStore:
+    """
+    Menyimpan matriks harga `Close` (tanggal x ticker) sebagai array NumPy `.npy`
+    yang dibaca kembali dengan memory-map, plus metadata (ticker, tanggal) di JSON.
+
+    Setiap penyimpanan menulis file `.npy` baru lalu mengganti file metadata secara
+    atomik (`os.replace`), sehingga pembaca tidak pernah melihat data setengah jadi.
+    """
+
+    PRICES_META_FILE = "prices_meta.json"
+    FUNDAMENTALS_FILE = "fundamentals.json"
+    INFOS_FILE = "infos.json"
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    # --- Utilitas file ---
+    def _atomic_write_text(self, filename: str, text: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{filename}.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.directory / filename)
+
+    def _read_json(self, filename: str) -> Optional[dict]:
+        path = self.directory / filename
+        if not path.exists():
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("File %s tidak dapat dibaca: %s", path, e)
+            return None
+
+    # --- Harga ---
+    def load_prices(self) -> Optional[Tuple[pd.DataFrame, float, List[str]]]:
+        """
+        Memuat matriks harga tanpa menyalin (memory-mapped, read-only).
+
+        Mengembalikan `(df_prices, fetched_at, requested_tickers)` atau None jika belum ada data.
+        """
+        meta = self._read_json(self.PRICES_META_FILE)
+        if meta is None:
+            return None
+        try:
+            values = np.load(self.directory / meta["array_file"], mmap_mode="r")
+            dates = pd.to_datetime(meta["dates"], format="%Y-%m-%d")
+            if values.shape != (len(dates), len(meta["tickers"])):
+                logger.warning("Ukuran matriks harga tersimpan tidak cocok dengan metadata. Data diabaikan.")
+                return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Gagal memuat matriks harga tersimpan: %s", e)
+            return None
+
+        # DataFrame dari ndarray 2D tidak menyalin data; blok pandas langsung menunjuk ke memmap.
+        df_prices = pd.DataFrame(values, index=pd.DatetimeIndex(dates, name="Date"),
+                                 columns=pd.Index(meta["tickers"], name="Ticker"), copy=False)
+        return df_prices, float(meta["fetched_at"]), list(meta.get("requested_tickers", meta["tickers"]))
+
+    def save_prices(self, df_prices: pd.DataFrame, fetched_at: float, requested_tickers: List[str]) -> None:
+        """Menulis matriks harga baru; file array lama dihapus setelah metadata dialihkan."""
+        old_meta = self._read_json(self.PRICES_META_FILE)
+        array_file = f"prices-{int(fetched_at * 1000)}.npy"
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        values = np.ascontiguousarray(df_prices.to_numpy(dtype=np.float64))
+        tmp_array = self.directory / f".{array_file}.tmp"
+        with open(tmp_array, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp_array, self.directory / array_file)
+
+        meta = {
+            "array_file": array_file,
+            "tickers": [str(t) for t in df_prices.columns],
+            "requested_tickers": [str(t) for t in requested_tickers],
+            "dates": [d.strftime("%Y-%m-%d") for d in df_prices.index],
+            "fetched_at": fetched_at,
+        }
+        self._atomic_write_text(self.PRICES_META_FILE, json.dumps(meta))
+
+        # Di Linux, pembaca yang masih memetakan file lama tetap aman setelah unlink.
+        if old_meta and old_meta.get("array_file") not in (None, array_file):
+            try:
+                (self.directory / old_meta["array_file"]).unlink()
+            except OSError:
+                pass
+
+    # --- Fundamental ---
+    def load_fundamentals(self) -> Optional[Tuple[pd.DataFrame, float]]:
+        """Memuat DataFrame fundamental beserta waktu penarikannya."""
+        payload = self._read_json(self.FUNDAMENTALS_FILE)
+        if payload is None:
+            return None
+        try:
+            df_fundamentals = pd.DataFrame(payload["data"], index=payload["index"], columns=payload["columns"])
+        except (KeyError, ValueError) as e:
+            logger.warning("Gagal memuat data fundamental tersimpan: %s", e)
+            return None
+        df_fundamentals.index.name = "ticker"
+        return df_fundamentals.infer_objects(), float(payload["fetched_at"])
+
+    def save_fundamentals(self, df_fundamentals: pd.DataFrame, fetched_at: float) -> None:
+        payload = json.loads(df_fundamentals.to_json(orient="split"))
+        payload["fetched_at"] = fetched_at
+        self._atomic_write_text(self.FUNDAMENTALS_FILE, json.dumps(payload))
+
+    # --- Rekaman info mentah (mode record/replay provider) ---
+    def load_infos(self) -> dict:
+        """Info mentah per ticker (subset `Ticker.info` Yahoo) yang direkam; dict kosong jika belum ada."""
+        payload = self._read_json(self.INFOS_FILE)
+        return payload.get("infos", {}) if payload else {}
+
+    def infos_fetched_at(self) -> Optional[float]:
+        payload = self._read_json(self.INFOS_FILE)
+        return float(payload["fetched_at"]) if payload and "fetched_at" in payload else None
+
+    def save_infos(self, infos: dict, fetched_at: float) -> None:
+        self._atomic_write_text(self.INFOS_FILE, json.dumps({"infos": infos, "fetched_at": fetched_at}, default=str))
@@ -0,0 +1,63 @@
+# progress.py
+"""Laporan progres tahap pipeline (untuk streaming SSE) dan pembatalan saat klien terputus."""
+
+import json
+import threading
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+
+class PipelineCancelled(Exception):
+    """Dilempar di titik laporan progres setelah klien streaming terputus."""
+
+
+class ProgressReporter:
+    """
+    Penerima event tahap pipeline untuk satu request streaming.
+
+    `emit(stage, data)` dipanggil dari thread pipeline (mis. dijadwalkan ke event loop).
+    Setelah `cancel()`, laporan berikutnya melempar `PipelineCancelled` sehingga tahap
+    selanjutnya (termasuk solver) tidak dijalankan.
+    """
+
+    def __init__(self, emit: Callable[[str, dict], None]):
+        self._emit = emit
+        self.cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def report(self, stage: str, data: dict) -> None:
+        if self.cancelled.is_set():
+            raise PipelineCancelled(f"Request dibatalkan sebelum tahap {stage}.")
+        self._emit(stage, data)
+
+
+# Reporter untuk request saat ini; ikut tersalin ke thread pipeline bersama contextvars lainnya
+_reporter: ContextVar[Optional[ProgressReporter]] = ContextVar("robokaya_progress_reporter", default=None)
+
+
+def start_progress(reporter: ProgressReporter):
+    return _reporter.set(reporter)
+
+
+def reset_progress(token) -> None:
+    _reporter.reset(token)
+
+
+def report_progress(stage: str, **data) -> None:
+    """Melaporkan tahap selesai ke klien streaming (tanpa efek untuk request biasa)."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.report(stage, data)
+
+
+def cancellation_event() -> Optional[threading.Event]:
+    reporter = _reporter.get()
+    return reporter.cancelled if reporter is not None else None
+
+
+def format_sse(event: str, data) -> str:
+    """Satu event Server-Sent Events; `data` berupa objek JSON atau string JSON yang sudah dirender."""
+    payload = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,298 @@
+# providers.py
+"""Sumber data pasar yang dapat diganti: Yahoo Finance (live), replay rekaman lokal, dan mode rekam."""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from price_store import PriceStore
+
+logger = logging.getLogger("robokaya.providers")
+
+PROVIDER_NAMES = ("yfinance", "replay", "record")
+# Field `Ticker.info` yang dipakai pipeline; hanya ini yang direkam agar file rekaman tetap kecil
+INFO_FIELDS = ("shortName", "sector", "marketCap", "trailingPE", "returnOnEquity", "debtToEquity")
+
+
+class MarketDataProvider:
+    """Antarmuka sumber data: harga penutupan harian mentah dan info fundamental per ticker."""
+
+    name = "base"
+
+    def download_close(self, tickers: List[str], start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
+        """Harga `Close` (tanggal x ticker) untuk [start_date, end_date); None jika tidak ada data."""
+        raise NotImplementedError
+
+    def fetch_info(self, ticker: str) -> dict:
+        """Info fundamental mentah satu ticker (format `yfinance.Ticker.info`). Melempar exception jika gagal."""
+        raise NotImplementedError
+
+    def fetch_fallback_info(self, ticker: str) -> dict:
+        """Info dari sumber cadangan, dipanggil setelah retry `fetch_info` habis. LookupError jika tidak ada."""
+        raise LookupError(f"Tidak ada sumber cadangan untuk {ticker}")
+
+    @property
+    def fallback_usage(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        `(harga, fundamental)`: waktu rekam tertua data cadangan yang disajikan sejak
+        `reset_fallback_usage`, atau None untuk bagian yang seluruhnya live.
+        """
+        return None, None
+
+    def reset_fallback_usage(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        """Menulis data yang ditampung di memori (mis. rekaman info); dipanggil sekali per penarikan."""
+
+    def acquire_slot(self, operation: str) -> None:
+        """Menunggu izin rate limit untuk satu panggilan `fetch_info`; no-op untuk sumber tanpa batas."""
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def download_close(self, tickers, start_date, end_date):
+        import yfinance as yf
+
+        df_raw = yf.download(tickers, start=start_date, end=end_date, interval="1d", progress=False)
+        if df_raw is None or df_raw.empty:
+            return None
+        df_close = df_raw.get('Close')
+        if df_close is None or df_close.empty:
+            return None
+        # Jika hanya satu ticker, yf.download mungkin mengembalikan Series, ubah ke DataFrame
+        if isinstance(df_close, pd.Series):
+            df_close = df_close.to_frame(name=tickers[0] if len(tickers) == 1 else 'PRICE_DATA')
+        return df_close
+
+    def fetch_info(self, ticker):
+        import yfinance as yf
+
+        return yf.Ticker(str(ticker)).info
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Menyajikan rekaman lokal tanpa jaringan: hasil `RecordingProvider`, atau snapshot
+    terakhir di direktori data (info direkonstruksi dari `fundamentals.json`).
+
+    Rekaman disimpan di memori dan dibaca ulang hanya jika file di disk berubah;
+    cocok untuk load test, benchmark, pengembangan offline, dan cadangan saat
+    Yahoo membatasi request.
+    """
+
+    name = "replay"
+
+    def __init__(self, directory):
+        self.store = PriceStore(directory)
+        self._lock = threading.Lock()
+        self._signature = None
+        self._prices: Optional[pd.DataFrame] = None
+        self._infos: Dict[str, dict] = {}
+        # Waktu penarikan asli data yang direkam (0 jika tidak diketahui: dianggap sangat lama)
+        self.prices_recorded_at = 0.0
+        self.infos_recorded_at = 0.0
+
+    def _files_signature(self) -> tuple:
+        signature = []
+        for filename in (PriceStore.PRICES_META_FILE, PriceStore.INFOS_FILE, PriceStore.FUNDAMENTALS_FILE):
+            try:
+                signature.append(os.stat(self.store.directory / filename).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load(self) -> None:
+        signature = self._files_signature()
+        with self._lock:
+            if signature == self._signature:
+                return
+            stored = self.store.load_prices()
+            self._prices = stored[0] if stored is not None else None
+            self.prices_recorded_at = stored[1] if stored is not None else 0.0
+            self._infos = self.store.load_infos()
+            self.infos_recorded_at = self.store.infos_fetched_at() or 0.0
+            if not self._infos:
+                self._infos, self.infos_recorded_at = _infos_from_fundamentals(self.store)
+            self._signature = signature
+
+    @property
+    def available(self) -> bool:
+        """True jika ada rekaman harga yang dapat diputar ulang."""
+        self._load()
+        return self._prices is not None and not self._prices.empty
+
+    def download_close(self, tickers, start_date, end_date):
+        self._load()
+        if self._prices is None:
+            return None
+        columns = [t for t in tickers if t in self._prices.columns]
+        index = self._prices.index
+        rows = (index >= pd.Timestamp(start_date.date())) & (index < pd.Timestamp(end_date))
+        if not columns or not rows.any():
+            return None
+        return self._prices.loc[rows, columns].copy()
+
+    def fetch_info(self, ticker):
+        self._load()
+        if ticker not in self._infos:
+            raise LookupError(f"Tidak ada rekaman info untuk {ticker}")
+        return dict(self._infos[ticker])
+
+
+def _infos_from_fundamentals(store: PriceStore) -> Tuple[Dict[str, dict], float]:
+    """Rekonstruksi info mentah dari DataFrame fundamental tersimpan (kebalikan `fetch_fundamental_data`)."""
+    stored = store.load_fundamentals()
+    if stored is None:
+        return {}, 0.0
+    df_fundamentals, fetched_at = stored
+    columns = {'company_name': 'shortName', 'sector': 'sector', 'marketCap': 'marketCap',
+               'pe_ratio': 'trailingPE', 'roe': 'returnOnEquity', 'der': 'debtToEquity'}
+    df_infos = df_fundamentals[[c for c in columns if c in df_fundamentals.columns]].rename(columns=columns)
+    df_infos = df_infos.astype(object).where(df_infos.notna(), None)
+    return {str(ticker): row for ticker, row in df_infos.to_dict(orient="index").items()}, fetched_at
+
+
+class RecordingProvider(MarketDataProvider):
+    """
+    Meneruskan ke provider live lalu merekam hasilnya ke direktori rekaman untuk diputar ulang.
+
+    Info per ticker ditampung di memori dan ditulis sekaligus oleh `flush` (sekali per
+    penarikan fundamental), bukan satu tulis ulang `infos.json` per ticker.
+    """
+
+    name = "record"
+
+    def __init__(self, inner: MarketDataProvider, directory):
+        self.inner = inner
+        self.store = PriceStore(directory)
+        self._lock = threading.Lock()
+        self._pending_infos: Dict[str, dict] = {}
+
+    def download_close(self, tickers, start_date, end_date):
+        df_close = self.inner.download_close(tickers, start_date, end_date)
+        if df_close is None or df_close.empty:
+            return df_close
+        with self._lock:
+            stored = self.store.load_prices()
+            recorded = df_close if stored is None else df_close.combine_first(stored[0])
+            requested = sorted(set(tickers) | set(stored[2] if stored else []))
+            try:
+                self.store.save_prices(recorded.sort_index(), time.time(), requested)
+            except OSError as e:
+                logger.warning("Gagal merekam data harga: %s", e)
+        return df_close
+
+    def acquire_slot(self, operation):
+        self.inner.acquire_slot(operation)
+
+    def fetch_info(self, ticker):
+        info = self.inner.fetch_info(ticker)
+        with self._lock:
+            self._pending_infos[ticker] = {field: info.get(field) for field in INFO_FIELDS if field in info}
+        return info
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending_infos = self._pending_infos, {}
+            if not pending:
+                return
+            infos = self.store.load_infos()
+            infos.update(pending)
+            try:
+                self.store.save_infos(infos, time.time())
+            except OSError as e:
+                logger.warning("Gagal merekam info %s ticker: %s", len(pending), e)
+
+
+class FailoverProvider(MarketDataProvider):
+    """
+    Memakai provider utama; jika gagal atau kosong (mis. dibatasi Yahoo), jatuh ke rekaman lokal.
+
+    Harga jatuh ke rekaman langsung (tidak ada retry di pemanggil). Info tidak: `fetch_info`
+    meneruskan error agar retry/backoff pemanggil berjalan, lalu pemanggil dapat memakai
+    `fetch_fallback_info` untuk ticker yang tetap gagal. Pemakaian rekaman dicatat terpisah
+    untuk harga dan per ticker info (`fallback_usage`) agar cache tidak menganggap data lama
+    sebagai data segar.
+    """
+
+    def __init__(self, primary: MarketDataProvider, fallback: ReplayProvider):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+        self._lock = threading.Lock()
+        self._prices_recorded_at: Optional[float] = None
+        self._infos_recorded_at: Dict[str, float] = {} # ticker -> waktu rekam info cadangan
+
+    @property
+    def fallback_usage(self) -> Tuple[Optional[float], Optional[float]]:
+        with self._lock:
+            return self._prices_recorded_at, min(self._infos_recorded_at.values(), default=None)
+
+    def reset_fallback_usage(self) -> None:
+        with self._lock:
+            self._prices_recorded_at = None
+            self._infos_recorded_at = {}
+
+    def download_close(self, tickers, start_date, end_date):
+        try:
+            df_close = self.primary.download_close(tickers, start_date, end_date)
+        except Exception as e:
+            logger.warning("Provider %s gagal mengunduh harga: %s", self.primary.name, e)
+            df_close = None
+        if df_close is not None and not df_close.empty:
+            return df_close
+        logger.warning("Memakai rekaman %s untuk data harga.", self.fallback.name)
+        df_close = self.fallback.download_close(tickers, start_date, end_date)
+        if df_close is not None and not df_close.empty:
+            with self._lock:
+                self._prices_recorded_at = self.fallback.prices_recorded_at
+        return df_close
+
+    def acquire_slot(self, operation):
+        self.primary.acquire_slot(operation)
+
+    def fetch_info(self, ticker):
+        return self.primary.fetch_info(ticker)
+
+    def fetch_fallback_info(self, ticker):
+        info = self.fallback.fetch_info(ticker)
+        with self._lock:
+            self._infos_recorded_at[ticker] = self.fallback.infos_recorded_at
+        return info
+
+
+def create_provider(name: str, recordings_dir: Optional[str] = None,
+                    snapshot_dir: Optional[str] = None, scheduler=None) -> MarketDataProvider:
+    """
+    Membuat provider dari nama konfigurasi.
+
+    - `yfinance`: live; saat Yahoo gagal, jatuh ke rekaman (jika direktorinya ada)
+      atau ke snapshot terakhir di `snapshot_dir`.
+    - `replay`: hanya rekaman lokal (tanpa jaringan).
+    - `record`: live sambil merekam setiap respons ke direktori rekaman.
+
+    Jika `scheduler` (`UpstreamScheduler`) diberikan, panggilan live ke Yahoo dijadwalkan lewatnya.
+    """
+    if name not in PROVIDER_NAMES:
+        raise ValueError(f"Provider data tidak dikenal: {name} (pilihan: {', '.join(PROVIDER_NAMES)})")
+    if name != "yfinance" and not recordings_dir:
+        raise ValueError(f"Provider {name} membutuhkan direktori rekaman (ROBOKAYA_RECORDINGS_DIR).")
+    if name == "replay":
+        return ReplayProvider(recordings_dir)
+    live: MarketDataProvider = YFinanceProvider()
+    if scheduler is not None:
+        from upstream_scheduler import ScheduledProvider # Impor lokal: upstream_scheduler mengimpor modul ini
+        live = ScheduledProvider(live, scheduler)
+    if name == "record":
+        return RecordingProvider(live, recordings_dir)
+    fallback_dir = recordings_dir if recordings_dir and os.path.isdir(recordings_dir) else snapshot_dir
+    if fallback_dir:
+        return FailoverProvider(live, ReplayProvider(fallback_dir))
+    return live
@@ -0,0 +1,123 @@
+# response_cache.py
+"""Cache respons rekomendasi per (input ter-normalisasi, snapshot) dengan ETag dan backend SQLite bersama."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from lru import LRUCache
+
+logger = logging.getLogger("robokaya.response_cache")
+
+
+def canonical_request_hash(payload: dict) -> str:
+    """
+    Hash SHA-256 dari body request yang dinormalisasi: kunci diurutkan, daftar preferensi
+    (sektor, prinsip) diurutkan & tanpa duplikat, dan angka bulat ditulis seragam.
+    """
+    def normalize(value, key=None):
+        if isinstance(value, dict):
+            return {k: normalize(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            items = [normalize(v) for v in value]
+            return sorted(set(items)) if key in ("sectors", "principles") else items
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    canonical = json.dumps(normalize(payload), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def make_etag(request_hash: str, snapshot_id: str) -> str:
+    digest = hashlib.sha256(f"{snapshot_id}:{request_hash}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Mencocokkan header If-None-Match (boleh berisi beberapa ETag, `*`, atau awalan `W/`)."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return any(c == "*" or c.removeprefix("W/") == etag for c in candidates)
+
+
+class SQLiteResponseStore:
+    """
+    Backend bersama berbasis file SQLite (mode WAL) agar beberapa worker uvicorn berbagi hit.
+
+    Jumlah entri dibatasi `max_entries`; entri yang paling lama tidak diakses dihapus lebih dulu.
+    """
+
+    def __init__(self, path, max_entries: int = 10_000):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                         "etag TEXT PRIMARY KEY, body BLOB NOT NULL, accessed_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, etag: str) -> Optional[bytes]:
+        conn = self._connect()
+        row = conn.execute("SELECT body FROM responses WHERE etag = ?", (etag,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE etag = ?", (time.time(), etag))
+        return bytes(row[0])
+
+    def put(self, etag: str, body: bytes) -> None:
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO responses (etag, body, accessed_at) VALUES (?, ?, ?)",
+                     (etag, body, time.time()))
+        conn.execute("DELETE FROM responses WHERE etag IN (SELECT etag FROM responses ORDER BY accessed_at DESC "
+                     "LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    """LRU lokal per proses, opsional di depan backend bersama (SQLite)."""
+
+    def __init__(self, maxsize: int, shared: Optional[SQLiteResponseStore] = None):
+        self.local = LRUCache(maxsize)
+        self.shared = shared
+
+    def get(self, etag: str) -> Optional[bytes]:
+        body = self.local.get(etag)
+        if body is None and self.shared is not None:
+            try:
+                body = self.shared.get(etag)
+            except sqlite3.Error as e:
+                logger.warning("Cache respons bersama tidak dapat dibaca: %s", e)
+                body = None
+            if body is not None:
+                self.local.put(etag, body)
+        return body
+
+    def put(self, etag: str, body: bytes) -> None:
+        self.local.put(etag, body)
+        if self.shared is not None:
+            try:
+                self.shared.put(etag, body)
+            except sqlite3.Error as e:
+                logger.warning("Cache respons bersama tidak dapat ditulis: %s", e)
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
@@ -0,0 +1,135 @@
+# risk_model.py
+"""Model risiko per snapshot: return harian, mu CAPM, dan kovarians Ledoit-Wolf untuk seluruh universe."""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from lru import LRUCache
+from metrics import CACHE_EVENTS, span
+
+logger = logging.getLogger("robokaya.risk_model")
+
+# Jumlah hasil optimisasi (bobot) yang disimpan per proses
+WEIGHTS_CACHE_SIZE = 512
+
+PortfolioPerformance = Tuple[float, float, float]
+
+
+def solve_portfolio(mu: pd.Series, S: pd.DataFrame, optimization_target: str) -> Tuple[Dict[str, float], PortfolioPerformance]:
+    """Menyelesaikan satu masalah Efficient Frontier dan mengembalikan bobot bersih + kinerja ex-ante."""
+    from pypfopt import EfficientFrontier # Impor lambat: pypfopt menarik cvxpy (~0,5 detik)
+
+    ef = EfficientFrontier(mu, S)
+    if optimization_target == "min_volatility":
+        ef.min_volatility()
+    else:
+        ef.max_sharpe()
+    cleaned_weights = dict(ef.clean_weights())
+    performance = ef.portfolio_performance(verbose=False)
+    return cleaned_weights, tuple(float(x) for x in performance)
+
+
+def warm_solver() -> None:
+    """Memuat pypfopt/cvxpy dan menyelesaikan masalah kecil untuk tiap target agar request pertama tidak menanggungnya."""
+    mu = pd.Series([0.10, 0.14], index=["A", "B"])
+    S = pd.DataFrame([[0.04, 0.01], [0.01, 0.09]], index=mu.index, columns=mu.index)
+    for optimization_target in ("max_sharpe", "min_volatility"):
+        solve_portfolio(mu, S, optimization_target)
+
+
+class UniverseRiskModel:
+    """
+    Statistik seluruh universe yang dihitung sekali per snapshot data.
+
+    Subset per request diambil dengan mengiris baris/kolom dari mu dan kovarians
+    universe, sehingga request berikutnya tidak perlu mengulang kerja O(T·N²).
+    Catatan: CAPM memakai rata-rata seluruh universe sebagai proksi pasar, dan
+    intensitas shrinkage dihitung sekali untuk seluruh universe.
+    """
+
+    def __init__(self, df_prices: pd.DataFrame, snapshot_id: str, weights_cache: Optional[LRUCache] = None):
+        self.df_prices = df_prices
+        self.snapshot_id = snapshot_id
+        self.weights_cache = weights_cache if weights_cache is not None else LRUCache(WEIGHTS_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._mu: Optional[pd.Series] = None
+        self._cov: Optional[pd.DataFrame] = None
+
+    def _ensure_computed(self) -> None:
+        if self._cov is not None:
+            return
+        with self._lock:
+            if self._cov is not None:
+                return
+            logger.info("Menghitung model risiko universe untuk snapshot %s (%s saham)...", self.snapshot_id, len(self.df_prices.columns))
+            from pypfopt import expected_returns, risk_models
+
+            with span("risk_model"):
+                returns = expected_returns.returns_from_prices(self.df_prices)
+                mu = expected_returns.capm_return(returns, returns_data=True)
+                cov = risk_models.CovarianceShrinkage(returns, returns_data=True).ledoit_wolf()
+            # Matriks return T x N tidak disimpan: hanya mu dan kovarians (N x N) yang dipakai
+            self._mu, self._cov = mu, cov
+
+    @property
+    def mu(self) -> pd.Series:
+        self._ensure_computed()
+        return self._mu
+
+    @property
+    def cov(self) -> pd.DataFrame:
+        self._ensure_computed()
+        return self._cov
+
+    def subset(self, tickers: Sequence[str]) -> Tuple[pd.Series, pd.DataFrame]:
+        """Mengiris mu dan kovarians untuk ticker yang lolos filter."""
+        tickers = list(tickers)
+        return self.mu.loc[tickers], self.cov.loc[tickers, tickers]
+
+    def weights_key(self, tickers: Sequence[str], optimization_target: str) -> tuple:
+        return (self.snapshot_id, tuple(sorted(tickers)), optimization_target)
+
+    def optimize(self, tickers: List[str], optimization_target: str,
+                 solver: Optional[Callable] = None) -> Tuple[Dict[str, float], PortfolioPerformance]:
+        """
+        Bobot optimal untuk subset ticker; hasil disimpan di LRU per (snapshot, ticker, target).
+
+        `solver` dapat diganti (mis. untuk menjalankan `solve_portfolio` di process pool).
+        """
+        key = self.weights_key(tickers, optimization_target)
+        cached = self.weights_cache.get(key)
+        if cached is not None:
+            CACHE_EVENTS.inc(cache="weights", result="hit")
+            logger.debug("Bobot optimal diambil dari cache untuk %s saham (%s).", len(tickers), optimization_target)
+            return dict(cached[0]), cached[1]
+
+        CACHE_EVENTS.inc(cache="weights", result="miss")
+        mu, S = self.subset(tickers)
+        cleaned_weights, performance = (solver or solve_portfolio)(mu, S, optimization_target)
+        self.weights_cache.put(key, (dict(cleaned_weights), performance))
+        return cleaned_weights, performance
+
+
+class RiskModelRegistry:
+    """Menyimpan model risiko untuk snapshot terbaru; snapshot baru otomatis mengganti yang lama."""
+
+    def __init__(self, weights_cache_size: int = WEIGHTS_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._model: Optional[UniverseRiskModel] = None
+        self.weights_cache = LRUCache(weights_cache_size)
+
+    def get(self, snapshot_id: str, df_prices: pd.DataFrame) -> UniverseRiskModel:
+        with self._lock:
+            if self._model is None or self._model.snapshot_id != snapshot_id:
+                # Kunci LRU memuat snapshot_id, jadi bobot snapshot lama tidak akan terpakai lagi
+                self.weights_cache.clear()
+                self._model = UniverseRiskModel(df_prices, snapshot_id, self.weights_cache)
+            return self._model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._model = None
+            self.weights_cache.clear()
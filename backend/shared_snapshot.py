@@ -0,0 +1,131 @@
+# shared_snapshot.py
+"""Snapshot data pasar bersama antar worker: dipublikasikan satu proses pemimpin, dibaca lewat memory-map."""
+
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from market_cache import MarketSnapshot
+from price_store import PriceStore
+
+try:
+    import fcntl
+except ImportError: # Windows: tanpa flock, setiap proses menjadi pemimpin
+    fcntl = None
+
+logger = logging.getLogger("robokaya.shared_snapshot")
+
+
+class SharedSnapshotStore:
+    """
+    Direktori snapshot bersama: `snapshots/<snapshot_id>/` (matriks harga `.npy` + fundamental)
+    dan file penunjuk `CURRENT` berisi ID snapshot aktif.
+
+    Snapshot ditulis lengkap dulu, baru `CURRENT` dialihkan secara atomik (`os.replace`),
+    sehingga worker tidak pernah membaca snapshot setengah jadi. Matriks harga dibaca
+    dengan memory-map read-only: semua worker berbagi page cache yang sama, memori privat
+    per worker tidak bertambah seiring jumlah saham.
+    """
+
+    CURRENT_FILE = "CURRENT"
+    SNAPSHOTS_DIR = "snapshots"
+
+    def __init__(self, directory, keep: int = 2):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def _snapshot_store(self, snapshot_id: str) -> PriceStore:
+        return PriceStore(self.directory / self.SNAPSHOTS_DIR / snapshot_id)
+
+    def current_id(self) -> Optional[str]:
+        try:
+            snapshot_id = (self.directory / self.CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        return snapshot_id or None
+
+    def publish(self, snapshot: MarketSnapshot) -> bool:
+        """Menulis snapshot lalu mengalihkan `CURRENT`; False jika snapshot ini sudah aktif."""
+        if self.current_id() == snapshot.snapshot_id:
+            return False
+        store = self._snapshot_store(snapshot.snapshot_id)
+        store.save_prices(snapshot.df_prices, snapshot.prices_fetched_at, list(snapshot.df_prices.columns))
+        store.save_fundamentals(snapshot.df_fundamentals, snapshot.fundamentals_fetched_at)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{self.CURRENT_FILE}.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(snapshot.snapshot_id)
+        os.replace(tmp_path, self.directory / self.CURRENT_FILE)
+        logger.info("Snapshot bersama %s dipublikasikan.", snapshot.snapshot_id)
+        self._prune(snapshot.snapshot_id)
+        return True
+
+    def _prune(self, current_id: str) -> None:
+        # Worker yang masih memetakan file lama tetap aman: di Linux data tetap ada sampai unmap.
+        snapshots = sorted((p for p in (self.directory / self.SNAPSHOTS_DIR).iterdir()
+                            if p.is_dir() and p.name != current_id),
+                           key=lambda p: p.stat().st_mtime, reverse=True)
+        for old in snapshots[max(self.keep - 1, 0):]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def load(self, snapshot_id: Optional[str] = None) -> Optional[MarketSnapshot]:
+        """Memuat snapshot (default: yang aktif) dengan matriks harga memory-mapped."""
+        snapshot_id = snapshot_id or self.current_id()
+        if snapshot_id is None:
+            return None
+        store = self._snapshot_store(snapshot_id)
+        stored_prices = store.load_prices()
+        stored_fundamentals = store.load_fundamentals()
+        if stored_prices is None or stored_fundamentals is None:
+            logger.warning("Snapshot bersama %s tidak lengkap, diabaikan.", snapshot_id)
+            return None
+        df_prices, prices_fetched_at, _ = stored_prices
+        df_fundamentals, fundamentals_fetched_at = stored_fundamentals
+        return MarketSnapshot(df_fundamentals=df_fundamentals, df_prices=df_prices,
+                              prices_fetched_at=prices_fetched_at,
+                              fundamentals_fetched_at=fundamentals_fetched_at,
+                              snapshot_id=snapshot_id)
+
+
+class LeaderLock:
+    """
+    Pemilihan pemimpin lewat `flock` non-blocking pada satu file kunci.
+
+    Hanya satu proses yang memegang kunci; kunci dilepas otomatis oleh kernel saat
+    proses pemimpin mati, sehingga worker lain dapat mengambil alih pada percobaan berikutnya.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        logger.info("Proses %s menjadi pemimpin pembaruan data pasar.", os.getpid())
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,121 @@
+# sparse.py
+"""Optimisasi dengan batas jumlah saham (K) dan bobot minimum satu lot: pre-screening lalu pruning iteratif."""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from portfolio_math import RISK_FREE_RATE, WEIGHT_CUTOFF
+
+# Ukuran kandidat hasil pre-screening: SCREEN_MULTIPLIER x K, minimal MIN_SCREEN_SIZE saham.
+# Ukuran masalah QP jadi tidak bergantung pada besar universe.
+SCREEN_MULTIPLIER = 4
+MIN_SCREEN_SIZE = 20
+# Bobot minimum sedikit di atas harga satu lot agar pembulatan lot ke bawah tetap mendapat 1 lot
+MIN_WEIGHT_MARGIN = 1.001
+
+
+def prescreen_candidates(mu: np.ndarray, variances: np.ndarray, lot_prices: np.ndarray, capital: float,
+                         max_holdings: int, optimization_target: str) -> np.ndarray:
+    """
+    Posisi kandidat terbaik: hanya saham yang satu lotnya terjangkau modal, diurutkan per skor
+    individual (rasio sharpe per saham untuk `max_sharpe`, volatilitas terendah untuk `min_volatility`).
+    """
+    mu = np.asarray(mu, dtype=float)
+    volatility = np.sqrt(np.maximum(np.asarray(variances, dtype=float), 1e-12))
+    affordable = np.flatnonzero(np.isfinite(lot_prices) & (lot_prices > 0) & (lot_prices <= capital))
+    if optimization_target == "min_volatility":
+        score = -volatility[affordable]
+    else:
+        score = (mu[affordable] - RISK_FREE_RATE) / volatility[affordable]
+    screen_size = max(SCREEN_MULTIPLIER * max_holdings, MIN_SCREEN_SIZE)
+    order = np.argsort(-score, kind="stable")[:screen_size]
+    return affordable[order]
+
+
+class _ActiveSetProblem:
+    """
+    QP long-only atas kandidat tetap dengan parameter `active` (1 = boleh dipegang, 0 = dipangkas).
+
+    Masalah dikompilasi sekali (DPP); setiap pruning hanya mengganti nilai parameter dan
+    menyelesaikan ulang dengan warm start. `max_sharpe` memakai transformasi standar
+    (y = κw, (μ - rf)ᵀy = 1) sehingga tetap berupa QP.
+    """
+
+    def __init__(self, mu: np.ndarray, S: np.ndarray, optimization_target: str):
+        import cvxpy as cp # Impor lambat: cvxpy hanya dibutuhkan saat solver berjalan
+
+        n = len(mu)
+        self.optimization_target = optimization_target
+        self.active = cp.Parameter(n, nonneg=True)
+        self.variable = cp.Variable(n, nonneg=True)
+        objective = cp.Minimize(cp.quad_form(self.variable, cp.psd_wrap(S)))
+        if optimization_target == "max_sharpe":
+            kappa = cp.Variable(nonneg=True)
+            constraints = [(mu - RISK_FREE_RATE) @ self.variable == 1, cp.sum(self.variable) == kappa,
+                           self.variable <= cp.multiply(self.active, kappa)]
+        else:
+            constraints = [cp.sum(self.variable) == 1, self.variable <= self.active]
+        self.problem = cp.Problem(objective, constraints)
+
+    def solve(self, active: np.ndarray) -> Optional[np.ndarray]:
+        import cvxpy as cp
+
+        self.active.value = active.astype(float)
+        try:
+            self.problem.solve(warm_start=True)
+        except cp.error.SolverError:
+            return None
+        if self.problem.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE) or self.variable.value is None:
+            return None
+        weights = np.where(active > 0, np.clip(self.variable.value, 0, None), 0.0)
+        total = weights.sum()
+        return weights / total if total > 0 else None
+
+
+def prune_to_cardinality(mu: np.ndarray, S: np.ndarray, min_weights: np.ndarray, max_holdings: int,
+                         optimization_target: str) -> np.ndarray:
+    """
+    Bobot dengan paling banyak `max_holdings` saham dan setiap bobot >= `min_weights`.
+
+    Heuristik (bukan MIP): selesaikan QP atas semua kandidat, pangkas bobot ~0, lalu selama
+    jumlah saham > K pangkas separuh kelebihannya (rasio bobot/bobot minimum terkecil), dan
+    setelah <= K pangkas satu per satu saham yang bobotnya di bawah satu lot. Jumlah solve
+    paling banyak O(log n + K).
+    """
+    mu = np.asarray(mu, dtype=float)
+    S = np.asarray(S, dtype=float)
+    min_weights = np.asarray(min_weights, dtype=float) * MIN_WEIGHT_MARGIN
+    problem = None
+    if optimization_target == "max_sharpe" and (mu > RISK_FREE_RATE).any():
+        problem = _ActiveSetProblem(mu, S, "max_sharpe")
+    fallback = None
+    active = np.ones(len(mu))
+
+    for _ in range(len(mu)):
+        weights = problem.solve(active) if problem is not None else None
+        if weights is None:
+            # max_sharpe infeasible untuk himpunan ini (mis. semua μ <= rf): lanjutkan dengan min-varians
+            if fallback is None:
+                fallback = _ActiveSetProblem(mu, S, "min_volatility")
+            problem = fallback
+            weights = problem.solve(active)
+            if weights is None:
+                raise ValueError("Solver gagal menemukan bobot untuk kandidat yang tersisa.")
+
+        held = (active > 0) & (weights >= WEIGHT_CUTOFF)
+        active = held.astype(float)
+        weights = np.where(held, weights, 0.0)
+        ratio = np.where(held, weights / min_weights, np.inf)
+        n_held = int(held.sum())
+        if n_held > max_holdings:
+            drop = np.argsort(ratio, kind="stable")[:math.ceil((n_held - max_holdings) / 2)]
+        elif (ratio < 1).any():
+            if n_held == 1:
+                raise ValueError("Modal tidak cukup untuk membeli satu lot saham kandidat.")
+            drop = [int(np.argmin(ratio))]
+        else:
+            return weights / weights.sum()
+        active[drop] = 0.0
+    raise ValueError("Pruning tidak konvergen.")
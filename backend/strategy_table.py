@@ -0,0 +1,82 @@
+# strategy_table.py
+"""Tabel rekomendasi yang diprakomputasi per snapshot untuk setiap kombinasi (target, syariah, sektor)."""
+
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("robokaya.strategy_table")
+
+TableKey = Tuple[str, bool, Tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class StrategyEntry:
+    """Hasil optimisasi satu kombinasi; alokasi lot tetap dihitung per request (bergantung modal)."""
+    tickers: Tuple[str, ...]
+    weights: Dict[str, float]
+    performance: Tuple[float, float, float]
+
+
+def table_key(optimization_target: str, syariah_only: bool, sectors: Iterable[str]) -> TableKey:
+    return (optimization_target, bool(syariah_only), tuple(sorted(set(sectors))))
+
+
+def table_combinations(sectors: Sequence[str], optimization_targets: Sequence[str],
+                       max_sectors: int) -> Iterator[TableKey]:
+    """Semua kombinasi target x syariah x himpunan sektor berukuran 0..`max_sectors`."""
+    sectors = sorted(set(sectors))
+    for size in range(0, min(max_sectors, len(sectors)) + 1):
+        for sector_set in itertools.combinations(sectors, size):
+            for target in optimization_targets:
+                for syariah_only in (False, True):
+                    yield table_key(target, syariah_only, sector_set)
+
+
+class StrategyTable:
+    """Tabel hasil optimisasi untuk satu snapshot; dibaca tanpa kunci (dict tidak diubah setelah dibangun)."""
+
+    def __init__(self, snapshot_id: str, entries: Dict[TableKey, StrategyEntry]):
+        self.snapshot_id = snapshot_id
+        self.entries = entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, optimization_target: str, syariah_only: bool, sectors: Iterable[str]) -> Optional[StrategyEntry]:
+        return self.entries.get(table_key(optimization_target, syariah_only, sectors))
+
+
+def build_strategy_table(snapshot_id: str, combinations: Iterable[TableKey],
+                         eligible_tickers: Callable[[bool, Tuple[str, ...]], Optional[List[str]]],
+                         solve_many: Callable[[List[tuple]], Dict[tuple, tuple]]) -> StrategyTable:
+    """
+    Membangun tabel untuk semua kombinasi.
+
+    `eligible_tickers(syariah_only, sectors)` mengembalikan ticker eligible (None jika tidak
+    cukup saham). Kombinasi dengan himpunan ticker dan target yang sama hanya diselesaikan
+    sekali: `solve_many` menerima daftar masalah unik `(tickers, target)` dan mengembalikan
+    `{masalah: (weights, performance)}` untuk yang berhasil.
+    """
+    eligibility: Dict[tuple, Optional[List[str]]] = {}
+    problems: Dict[TableKey, tuple] = {}
+    for key in combinations:
+        target, syariah_only, sectors = key
+        filter_key = (syariah_only, sectors)
+        if filter_key not in eligibility:
+            eligibility[filter_key] = eligible_tickers(syariah_only, sectors)
+        tickers = eligibility[filter_key]
+        if tickers:
+            problems[key] = (tuple(tickers), target)
+
+    unique_problems = list(dict.fromkeys(problems.values()))
+    solved = solve_many(unique_problems)
+    entries = {}
+    for key, problem in problems.items():
+        if problem in solved:
+            weights, performance = solved[problem]
+            entries[key] = StrategyEntry(tickers=problem[0], weights=weights, performance=performance)
+    logger.info("Tabel strategi snapshot %s: %s kombinasi, %s masalah unik, %s berhasil.",
+                snapshot_id, len(problems), len(unique_problems), len(entries))
+    return StrategyTable(snapshot_id, entries)
@@ -0,0 +1,45 @@
+# test_allocation.py
+import numpy as np
+import pytest
+
+from allocation import LOT_SIZE, allocate_lots
+
+
+def test_floor_mode_matches_per_ticker_rounding():
+    weights = np.array([0.5, 0.3, 0.2])
+    prices = np.array([1040.0, 2015.0, 520.0])
+    capital = 10_000_000
+
+    result = allocate_lots(weights, prices, capital)
+
+    expected_lots = np.floor(capital * weights / (LOT_SIZE * prices))
+    np.testing.assert_array_equal(result.lots, expected_lots)
+    assert result.total_invested == pytest.approx((expected_lots * LOT_SIZE * prices).sum())
+    assert result.leftover_cash == pytest.approx(capital - result.total_invested)
+    assert result.actual_weights.sum() == pytest.approx(1.0)
+
+
+def test_greedy_mode_spends_leftover_cash_without_overspending():
+    weights = np.array([0.4, 0.35, 0.25])
+    prices = np.array([3000.0, 1550.0, 480.0])
+    capital = 5_000_000
+
+    floor = allocate_lots(weights, prices, capital, mode="floor")
+    greedy = allocate_lots(weights, prices, capital, mode="greedy")
+
+    assert greedy.leftover_cash < floor.leftover_cash
+    assert 0 <= greedy.leftover_cash < (prices * LOT_SIZE).min()
+    assert np.all(greedy.lots >= floor.lots)
+
+
+def test_invalid_prices_and_zero_weights_get_no_lots():
+    result = allocate_lots([0.5, 0.0, 0.5], [np.nan, 100.0, 200.0], 1_000_000, mode="greedy")
+
+    assert result.lots[0] == 0
+    assert result.lots[1] == 0
+    assert result.lots[2] > 0
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        allocate_lots([1.0], [100.0], 1_000_000, mode="bogus")
@@ -0,0 +1,68 @@
+# test_backtest.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import (fill_failed_rebalances, format_backtest, rebalance_positions, simulate_portfolio,
+                      split_walk_forward, walk_forward_weights)
+
+
+def test_rebalance_positions_follow_calendar_periods():
+    dates = pd.bdate_range('2024-01-01', '2024-07-31')
+
+    monthly = rebalance_positions(dates, "monthly", start=10)
+    quarterly = rebalance_positions(dates, "quarterly", start=10)
+
+    assert monthly[0] == 10
+    assert [dates[p].month for p in monthly[1:]] == [2, 3, 4, 5, 6, 7]
+    assert all(dates[p].day <= 3 for p in monthly[1:])
+    assert [dates[p].month for p in quarterly[1:]] == [4, 7]
+    assert rebalance_positions(dates, "none", start=10).tolist() == [10]
+    with pytest.raises(ValueError):
+        rebalance_positions(dates, "weekly", start=10)
+
+
+def test_simulation_rounds_to_lots_and_tracks_turnover():
+    # Dua saham, harga 100 dan 200; rebalance di hari ke-0 dan ke-2
+    prices = np.array([[100.0, 200.0], [110.0, 200.0], [120.0, 180.0], [120.0, 190.0]])
+    weights = np.array([[0.5, 0.5], [0.0, 1.0]])
+
+    result = simulate_portfolio(prices, [0, 2], weights, initial_capital=100_000)
+
+    # Hari 0: 5 lot A (50.000) + 2 lot B (40.000), kas 10.000
+    assert result.values[0] == 100_000
+    assert result.values[1] == 500 * 110 + 200 * 200 + 10_000
+    # Hari 2: nilai 500*120 + 200*180 + 10.000 = 106.000 -> semua ke B: 5 lot (90.000), kas 16.000
+    assert result.values[2] == 106_000
+    assert result.values[3] == 500 * 190 + 16_000
+    assert result.turnovers[0] == 0
+    assert result.turnovers[1] == pytest.approx((500 * 120 + 300 * 180) / (2 * 106_000))
+    assert result.drawdowns.max() == 0
+    assert result.final_cash == 16_000
+
+
+def test_walk_forward_chunks_match_single_pass():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0005, 0.01, size=(400, 4)) + np.array([0.0, 0.0002, 0.0004, 0.0006])
+    tickers = ['A', 'B', 'C', 'D']
+    positions = np.array([100, 150, 200, 250, 300])
+
+    single = walk_forward_weights(returns, tickers, positions, 100, "min_volatility")
+    chunked = np.vstack([walk_forward_weights(chunk, tickers, chunk_positions, 100, "min_volatility")
+                         for chunk, chunk_positions in split_walk_forward(returns, positions, 100, 2)])
+
+    np.testing.assert_allclose(chunked, single)
+    np.testing.assert_allclose(single.sum(axis=1), 1, atol=1e-3)
+
+
+def test_failed_rebalances_reuse_previous_weights_and_format():
+    weights = fill_failed_rebalances(np.array([[np.nan, np.nan], [0.2, 0.8], [np.nan, np.nan]]))
+    assert weights.tolist() == [[0.5, 0.5], [0.2, 0.8], [0.2, 0.8]]
+
+    dates = pd.bdate_range('2024-01-01', periods=3)
+    result = simulate_portfolio(np.full((3, 2), 100.0), [0], weights[:1], initial_capital=50_000)
+    formatted = format_backtest(result, dates, ['A', 'B'], 50_000)
+    assert formatted["start_date"] == '2024-01-01'
+    assert len(formatted["equity_curve"]) == 3
+    assert formatted["rebalances"][0]["weights"] == {'A': 0.4, 'B': 0.4} # 2 lot @ Rp10.000 per saham
+    assert formatted["metrics"]["total_return"] == 0
@@ -0,0 +1,29 @@
+# test_benchmarks.py
+from benchmarks.bench_pipeline import bench_stages, compare_results, make_synthetic_universe
+
+
+def test_synthetic_universe_shape_and_stage_timings():
+    df_fundamentals, df_prices = make_synthetic_universe(n_tickers=30, years=1, seed=1)
+
+    assert df_prices.shape == (252, 30)
+    assert list(df_fundamentals.index) == list(df_prices.columns)
+
+    stages = bench_stages(df_fundamentals, df_prices, repeats=2)
+    for stage in ["fundamental_filter", "capm_mu", "ledoit_wolf_cov", "solver", "allocation"]:
+        assert stages[stage]["median_seconds"] >= 0
+        assert stages[stage]["runs"] == 2 # Pass memori tidak ikut dihitung sebagai durasi
+        assert stages[stage]["peak_mb"] >= 0
+
+    untraced = bench_stages(df_fundamentals, df_prices, repeats=1, memory=False)
+    assert untraced["solver"]["peak_mb"] is None
+
+
+def test_compare_results_flags_slower_stages_only():
+    def result(seconds):
+        return {"cases": [{"n_tickers": 20, "years": 2, "stages": {
+            "solver": {"median_seconds": seconds}, "allocation": {"median_seconds": 0.01}}}]}
+
+    regressions = compare_results(result(0.2), result(0.1), tolerance=0.25)
+
+    assert [r["stage"] for r in regressions] == ["solver"]
+    assert compare_results(result(0.11), result(0.1), tolerance=0.25) == []
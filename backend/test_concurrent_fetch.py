@@ -0,0 +1,84 @@
+# test_concurrent_fetch.py
+import threading
+import time
+
+from concurrent_fetch import map_concurrently
+
+
+def test_results_are_collected_and_failures_skipped_per_item():
+    def fetch(item):
+        if item == 'BAD':
+            raise ValueError("tidak ada data")
+        return item.lower()
+
+    results, errors = map_concurrently(fetch, ['AAA', 'BAD', 'CCC'], max_workers=4)
+
+    assert results == {'AAA': 'aaa', 'CCC': 'ccc'}
+    assert list(errors) == ['BAD']
+
+
+def test_transient_failures_are_retried_with_backoff():
+    attempts, delays = {}, []
+
+    def flaky(item):
+        attempts[item] = attempts.get(item, 0) + 1
+        if attempts[item] < 3:
+            raise ConnectionError("rate limited")
+        return attempts[item]
+
+    results, errors = map_concurrently(flaky, ['AAA'], max_workers=1, retries=2,
+                                       backoff=0.1, sleep=delays.append)
+
+    assert results == {'AAA': 3}
+    assert not errors
+    assert delays == [0.1, 0.2]
+
+
+def test_slow_item_times_out_without_blocking_others():
+    release = threading.Event()
+
+    def fetch(item):
+        if item == 'SLOW':
+            release.wait(5)
+        return item
+
+    started = time.monotonic()
+    results, errors = map_concurrently(fetch, ['SLOW', 'FAST'], max_workers=2, timeout=0.2)
+    release.set()
+
+    assert results == {'FAST': 'FAST'}
+    assert isinstance(errors['SLOW'], TimeoutError)
+    assert time.monotonic() - started < 2
+
+
+def test_work_runs_in_parallel_up_to_the_limit():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fetch(item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return item
+
+    results, _ = map_concurrently(fetch, range(12), max_workers=4)
+
+    assert len(results) == 12
+    assert peak[0] == 4
+
+
+def test_time_spent_waiting_to_acquire_does_not_count_towards_timeout():
+    acquired = []
+
+    def acquire():
+        time.sleep(0.2) # Mis. menunggu token rate limit
+        acquired.append(1)
+
+    results, errors = map_concurrently(lambda item: item, ['AAA', 'BBB', 'CCC'], max_workers=3,
+                                       timeout=0.1, acquire=acquire)
+
+    assert results == {'AAA': 'AAA', 'BBB': 'BBB', 'CCC': 'CCC'}
+    assert not errors
+    assert len(acquired) == 3
@@ -0,0 +1,76 @@
+# test_executor.py
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from executor import ExecutionCancelledError, ExecutionLayer, ExecutionTimeoutError, QueueFullError
+
+
+def test_run_io_executes_off_the_event_loop_thread():
+    layer = ExecutionLayer(io_workers=2, cpu_workers=0, max_pending=4)
+
+    async def main():
+        return await layer.run_io(threading.get_ident), threading.get_ident()
+
+    worker_thread, loop_thread = asyncio.run(main())
+    layer.shutdown()
+
+    assert worker_thread != loop_thread
+    assert layer.in_flight == 0
+
+
+def test_requests_beyond_the_queue_limit_are_rejected():
+    layer = ExecutionLayer(io_workers=1, cpu_workers=0, max_pending=1)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(layer.run_io(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError):
+            await layer.run_io(lambda: None)
+        release.set()
+        return await first
+
+    assert asyncio.run(main()) is True
+    layer.shutdown()
+
+
+def test_timed_out_work_keeps_its_slot_until_it_finishes():
+    layer = ExecutionLayer(io_workers=1, cpu_workers=0, max_pending=2)
+    release = threading.Event()
+
+    async def main():
+        with pytest.raises(ExecutionTimeoutError):
+            await layer.run_io(release.wait, 5, timeout=0.05)
+        assert layer.in_flight == 1
+        release.set()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    layer.shutdown()
+    assert layer.in_flight == 0
+
+
+def test_run_cpu_uses_a_separate_process():
+    layer = ExecutionLayer(io_workers=1, cpu_workers=1, max_pending=1)
+    try:
+        assert layer.run_cpu(os.getpid, timeout=60) != os.getpid()
+    finally:
+        layer.shutdown()
+
+
+def test_run_cpu_stops_waiting_when_cancelled():
+    layer = ExecutionLayer(io_workers=1, cpu_workers=1, max_pending=1)
+    cancelled = threading.Event()
+    try:
+        layer.warm_up()
+        threading.Timer(0.1, cancelled.set).start()
+        started = time.monotonic()
+        with pytest.raises(ExecutionCancelledError):
+            layer.run_cpu(time.sleep, 5, timeout=60, cancelled=cancelled)
+        assert time.monotonic() - started < 2
+    finally:
+        layer.shutdown()
@@ -0,0 +1,64 @@
+# test_frontier.py
+import numpy as np
+
+import pytest
+
+from frontier import FrontierProblem, compute_frontier
+
+
+def make_inputs():
+    mu = np.array([0.08, 0.12, 0.18])
+    vols = np.array([0.10, 0.18, 0.30])
+    corr = np.array([[1.0, 0.2, 0.1], [0.2, 1.0, 0.3], [0.1, 0.3, 1.0]])
+    return mu, corr * np.outer(vols, vols)
+
+
+def test_frontier_points_are_monotonic_and_fully_invested():
+    mu, S = make_inputs()
+
+    frontier = compute_frontier(['A', 'B', 'C'], mu, S, n_points=15)
+
+    points = frontier["points"]
+    assert len(points) == 15
+    vols = [p["annual_volatility"] for p in points]
+    assert all(b >= a - 1e-6 for a, b in zip(vols, vols[1:]))
+    for point in points:
+        assert abs(sum(point["weights"].values()) - 1) < 1e-3
+        assert point["expected_annual_return"] >= point["target_return"] - 1e-4
+    assert points[-1]["weights"] == {'C': 1.0} # Ujung atas analitik: aset return tertinggi
+
+
+def test_frontier_returns_every_point_on_a_large_universe():
+    # 100 aset: OSQP saja kehilangan titik-titik dekat return maksimum
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0004, 0.02, (500, 100)) + rng.normal(0, 0.01, (500, 1))
+    mu, S = rng.normal(0.1, 0.08, 100), np.cov(returns.T) * 252
+    tickers = [f"T{i:03d}.JK" for i in range(100)]
+
+    points = compute_frontier(tickers, mu, S, n_points=50)["points"]
+
+    assert len(points) == 50
+    assert points[-1]["weights"] == {tickers[int(np.argmax(mu))]: 1.0}
+
+
+def test_failed_points_are_reported_instead_of_skipped(monkeypatch):
+    mu, S = make_inputs()
+    original_solve = FrontierProblem.solve
+    monkeypatch.setattr(FrontierProblem, "solve",
+                        lambda self, target: None if 0.12 < target < 0.15 else original_solve(self, target))
+
+    with pytest.raises(ValueError, match="titik frontier"):
+        compute_frontier(['A', 'B', 'C'], mu, S, n_points=15)
+
+
+def test_problem_is_reused_across_targets():
+    mu, S = make_inputs()
+    problem = FrontierProblem(mu, S)
+
+    first = problem.solve(0.10)
+    compiled = problem.problem
+    second = problem.solve(0.15)
+
+    assert problem.problem is compiled
+    assert mu @ second > mu @ first
+    assert problem.solve(0.5) is None  # di atas return aset tertinggi -> infeasible
@@ -1,12 +1,33 @@
 # test_main.py
+import json
 import pytest
 from fastapi.testclient import TestClient
+import main
 from main import app # Mengimpor aplikasi FastAPI Anda dari main.py
 import pandas as pd # Import pandas
 
 # Membuat instance TestClient
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def reset_market_cache(monkeypatch):
+    """Cache data pasar bersifat global per proses; kosongkan agar setiap tes memakai mock-nya sendiri."""
+    monkeypatch.setattr(main, "price_store", None) # Jangan memanaskan cache dari data/ milik developer
+    main.market_cache.clear()
+    main.risk_model_registry.clear()
+    main.frontier_cache.clear()
+    main.universe_index_cache.clear()
+    main.backtest_weights_cache.clear()
+    main.response_cache.clear()
+    monkeypatch.setattr(main, "strategy_table", None)
+    yield
+    main.market_cache.clear()
+    main.risk_model_registry.clear()
+    main.frontier_cache.clear()
+    main.universe_index_cache.clear()
+    main.backtest_weights_cache.clear()
+    main.response_cache.clear()
+
 # --- Fungsi Mock untuk fetch_yfinance_data ---
 # Anda bisa membuat variasi dari fungsi mock ini sesuai kebutuhan tes
 
@@ -173,4 +194,462 @@ def test_recommendation_with_original_mock_data(monkeypatch):
     assert "BKB.JK" in allocated_tickers
     # --- AKHIR PERUBAHAN ---
 
-    assert data["analysis_summary"]["determined_strategy"] == "Balanced"
\ No newline at end of file
+    assert data["analysis_summary"]["determined_strategy"] == "Balanced"
+
+def test_recommendation_rejected_with_503_when_queue_is_full(monkeypatch):
+    """Backpressure: request ditolak dengan 503 jika antrean lapisan eksekusi penuh."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    monkeypatch.setattr(main, "execution", main.ExecutionLayer(io_workers=1, cpu_workers=0, max_pending=0))
+
+    test_payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    }
+    response = client.post("/api/v1/recommendations", json=test_payload)
+
+    assert response.status_code == 503
+    assert "sibuk" in response.json()["detail"]
+
+
+def test_batch_recommendations_solve_each_distinct_problem_once(monkeypatch):
+    """Profil dengan (ticker eligible, target) yang sama hanya memicu satu kali solver."""
+    import json
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    solver_calls = []
+    real_solver = main.portfolio_solver
+
+    def counting_solver(mu, S, optimization_target):
+        solver_calls.append(optimization_target)
+        return real_solver(mu, S, optimization_target)
+
+    monkeypatch.setattr(main, "portfolio_solver", counting_solver)
+
+    growth_profile = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": ["Perbankan"], "principles": []}
+    }
+    richer_profile = dict(growth_profile, initial_capital=250000000)
+    impossible_profile = dict(growth_profile, preferences={"sectors": ["Sektor Fiktif"], "principles": []})
+
+    response = client.post("/api/v1/recommendations/batch",
+                           json=[growth_profile, impossible_profile, richer_profile])
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = {line["index"]: line for line in map(json.loads, response.text.strip().splitlines())}
+    assert sorted(lines) == [0, 1, 2]
+    assert lines[1]["status_code"] == 400
+    assert lines[0]["status_code"] == lines[2]["status_code"] == 200
+    assert lines[2]["result"]["input_summary"]["initial_capital"] == "Rp 250,000,000"
+    assert solver_calls == ["max_sharpe"]
+
+
+def test_recommendation_greedy_allocation_returns_numeric_fields(monkeypatch):
+    """Mode alokasi greedy mengurangi sisa kas dan respons memuat field numerik mentah."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 7500000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    }
+
+    floor = client.post("/api/v1/recommendations", json=payload).json()["portfolio_recommendation"]
+    greedy = client.post("/api/v1/recommendations", json=dict(payload, allocation_mode="greedy")).json()["portfolio_recommendation"]
+
+    assert greedy["financial_summary"]["allocation_mode"] == "greedy"
+    assert greedy["financial_summary"]["unallocated_cash_value"] <= floor["financial_summary"]["unallocated_cash_value"]
+    item = greedy["allocation_details"][0]
+    assert item["invested_capital_value"] == item["lots"] * 100 * item["price_per_share_value"]
+    assert isinstance(greedy["portfolio_metrics"]["sharpe_ratio_value"], float)
+
+
+def test_frontier_endpoint_returns_requested_points(monkeypatch):
+    """Endpoint frontier mengembalikan N titik berurutan naik dan di-cache per snapshot."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    }
+
+    response = client.post("/api/v1/recommendations/frontier?points=10", json=payload)
+
+    assert response.status_code == 200, response.text
+    data = response.json()
+    returns = [p["expected_annual_return"] for p in data["points"]]
+    assert len(data["points"]) == 10
+    assert returns == sorted(returns)
+    assert abs(sum(data["points"][0]["weights"].values()) - 1) < 1e-3
+    assert len(main.frontier_cache) == 1
+
+    client.post("/api/v1/recommendations/frontier?points=10", json=payload)
+    assert main.frontier_cache.hits == 1
+
+
+def test_metrics_endpoint_and_timing_header(monkeypatch):
+    """Durasi per tahap tercatat di /metrics dan, jika diaktifkan, di header X-Timing."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    monkeypatch.setattr(main, "TIMING_HEADER_ENABLED", True)
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    }
+
+    response = client.post("/api/v1/recommendations", json=payload)
+
+    assert response.status_code == 200, response.text
+    timing = response.headers["X-Timing"]
+    for stage in ("analyze_input", "filter", "solver", "allocation", "serialize", "total"):
+        assert f"{stage};dur=" in timing
+
+    metrics_text = client.get("/metrics").text
+    assert 'robokaya_stage_duration_seconds_count{stage="solver"}' in metrics_text
+    assert 'robokaya_cache_events_total{cache="market_data",result="miss"}' in metrics_text
+    assert 'route="/api/v1/recommendations"' in metrics_text
+
+
+def test_recommendation_served_from_replay_provider_without_network(monkeypatch, tmp_path):
+    """Provider replay menyajikan rekaman lokal lewat jalur fetch yang asli (tanpa monkeypatch fetch)."""
+    from price_store import PriceStore
+    from providers import ReplayProvider
+
+    df_fundamentals, df_prices = mock_fetch_success_data([])
+    df_prices.index = pd.bdate_range(end=pd.Timestamp.now().normalize() - pd.Timedelta(days=1), periods=len(df_prices))
+    recordings = PriceStore(tmp_path)
+    recordings.save_prices(df_prices, 1.0, list(df_prices.columns))
+    recordings.save_infos({ticker: {'shortName': row['company_name'], 'sector': row['sector'], 'marketCap': row['marketCap'],
+                                    'trailingPE': row['pe_ratio'], 'returnOnEquity': row['roe'], 'debtToEquity': row['der']}
+                           for ticker, row in df_fundamentals.iterrows()}, 1.0)
+    monkeypatch.setattr(main, "market_data_provider", ReplayProvider(tmp_path))
+    monkeypatch.setattr(main, "TICKERS_TO_ANALYZE", list(df_prices.columns))
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    }
+
+    response = client.post("/api/v1/recommendations", json=payload)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["portfolio_recommendation"]["allocation_details"]
+
+
+def test_recorded_infos_are_used_only_when_yahoo_returns_no_fundamentals(monkeypatch, tmp_path):
+    """Satu ticker gagal: ticker itu dibuang (fundamental lain tetap segar). Yahoo mati total: pakai rekaman."""
+    from price_store import PriceStore
+    from providers import FailoverProvider, MarketDataProvider, ReplayProvider
+
+    class PartlyDownProvider(MarketDataProvider):
+        name = "flaky"
+
+        def __init__(self, failing):
+            self.failing = failing
+
+        def fetch_info(self, ticker):
+            if ticker in self.failing:
+                raise RuntimeError("Too Many Requests")
+            return {'marketCap': 5e12}
+
+    PriceStore(tmp_path).save_infos({'AAA.JK': {'marketCap': 6e12}, 'BBB.JK': {'marketCap': 7e12}}, 1.0)
+    monkeypatch.setattr(main, "FUNDAMENTALS_FETCH_RETRIES", 0)
+
+    provider = FailoverProvider(PartlyDownProvider({'BBB.JK'}), ReplayProvider(tmp_path))
+    monkeypatch.setattr(main, "market_data_provider", provider)
+    df_fundamentals = main.fetch_fundamental_data(['AAA.JK', 'BBB.JK'])
+    assert list(df_fundamentals.index) == ['AAA.JK']
+    assert provider.fallback_usage == (None, None)
+
+    provider = FailoverProvider(PartlyDownProvider({'AAA.JK', 'BBB.JK'}), ReplayProvider(tmp_path))
+    monkeypatch.setattr(main, "market_data_provider", provider)
+    df_fundamentals = main.fetch_fundamental_data(['AAA.JK', 'BBB.JK'])
+    assert df_fundamentals['marketCap'].to_dict() == {'AAA.JK': 6e12, 'BBB.JK': 7e12}
+    assert provider.fallback_usage == (None, 1.0)
+
+
+def test_backtest_endpoint_walk_forward_monthly(monkeypatch):
+    """Backtest bulanan mengembalikan kurva ekuitas, drawdown, dan rebalance walk-forward (di-cache)."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    }
+
+    response = client.post("/api/v1/recommendations/backtest?rebalance=monthly&lookback_days=120", json=payload)
+
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["in_sample"] is False
+    assert len(data["equity_curve"]) == 255 - 120
+    assert data["equity_curve"][0]["value"] == 50000000
+    assert len(data["rebalances"]) > 1
+    assert data["metrics"]["max_drawdown"] <= 0
+    assert len(main.backtest_weights_cache) == 1
+
+    hold = client.post("/api/v1/recommendations/backtest?lookback_days=120", json=payload).json()
+    assert hold["in_sample"] is True and len(hold["rebalances"]) == 1
+    assert client.post("/api/v1/recommendations/backtest?rebalance=weekly", json=payload).status_code == 422
+
+
+def test_simulation_endpoint_reports_goal_probability(monkeypatch):
+    """Simulasi Monte Carlo memakai horizon profil dan melaporkan peluang mencapai target."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []},
+        "goal_amount": 100000000
+    }
+
+    response = client.post("/api/v1/recommendations/simulation?paths=5000&seed=3", json=payload)
+
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["time_horizon_category"] == "Long"
+    assert data["years"] == 15 and len(data["percentile_bands"]) == 15
+    assert 0 <= data["probability_of_reaching_goal"] <= 1
+    assert abs(sum(data["weights"].values()) - 1) < 1e-3
+    assert client.post("/api/v1/recommendations/simulation?paths=10", json=payload).status_code == 422
+
+
+def test_recommendation_served_from_precomputed_strategy_table(monkeypatch):
+    """Setelah tabel strategi snapshot dibangun, request hanya membaca tabel + alokasi lot (tanpa solver)."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    }
+    live = client.post("/api/v1/recommendations", json=payload).json()
+
+    main.refresh_strategy_table(main.market_cache.get())
+    assert len(main.strategy_table) > 0
+
+    def failing_solver(*args):
+        raise AssertionError("Solver tidak boleh dipanggil untuk kombinasi yang ada di tabel")
+    monkeypatch.setattr(main, "portfolio_solver", failing_solver)
+    main.risk_model_registry.weights_cache.clear()
+    main.response_cache.clear()
+
+    from_table = client.post("/api/v1/recommendations", json=payload)
+
+    assert from_table.status_code == 200, from_table.text
+    assert from_table.json()["portfolio_recommendation"] == live["portfolio_recommendation"]
+
+
+def test_recommendation_response_cache_and_etag(monkeypatch):
+    """Request setara (urutan sektor berbeda) dilayani dari cache dengan ETag sama; If-None-Match memberi 304."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": ["Teknologi", "Perbankan"], "principles": []}
+    }
+    first = client.post("/api/v1/recommendations", json=payload)
+    assert first.status_code == 200, first.text
+    etag = first.headers["ETag"]
+
+    def failing_pipeline(*args, **kwargs):
+        raise AssertionError("Pipeline tidak boleh dijalankan untuk request yang sudah di-cache")
+    monkeypatch.setattr(main, "build_recommendation", failing_pipeline)
+
+    reordered = dict(payload, initial_capital=50000000.0,
+                     preferences={"sectors": ["Perbankan", "Teknologi", "Perbankan"], "principles": []})
+    cached = client.post("/api/v1/recommendations", json=reordered)
+    assert cached.status_code == 200
+    assert cached.headers["ETag"] == etag
+    assert cached.content == first.content
+
+    not_modified = client.post("/api/v1/recommendations", json=payload, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+
+def test_follower_worker_serves_snapshot_published_by_leader(monkeypatch, tmp_path):
+    """Worker pengikut memetakan snapshot bersama dari pemimpin dan tidak pernah menarik data sendiri."""
+    from shared_snapshot import SharedSnapshotStore
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    leader_snapshot = main.market_cache.get()
+    SharedSnapshotStore(tmp_path).publish(leader_snapshot)
+    main.market_cache.clear()
+
+    def failing_fetch(tickers):
+        raise AssertionError("Worker pengikut tidak boleh menghubungi Yahoo")
+    monkeypatch.setattr("main.fetch_yfinance_data", failing_fetch)
+    monkeypatch.setattr(main, "shared_snapshots", SharedSnapshotStore(tmp_path))
+    monkeypatch.setattr(main.market_cache, "fetch_enabled", False)
+
+    adopted = main.adopt_shared_snapshot()
+    response = client.post("/api/v1/recommendations", json={
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    })
+
+    assert adopted.snapshot_id == leader_snapshot.snapshot_id
+    assert response.status_code == 200, response.text
+
+
+def test_health_and_readiness_probes(monkeypatch):
+    """Liveness selalu 200; readiness baru 200 setelah data pasar tersedia dan solver di-warm-up."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    monkeypatch.setattr(main, "solver_ready", False)
+
+    assert client.get("/healthz").status_code == 200
+    not_ready = client.get("/readyz")
+    assert not_ready.status_code == 503
+    assert not_ready.json()["checks"] == {"market_data": False, "solver": False}
+
+    main.market_cache.get()
+    monkeypatch.setattr(main, "solver_ready", True)
+    ready = client.get("/readyz")
+    assert ready.status_code == 200
+    assert ready.json()["snapshot_id"] == main.market_cache.snapshot.snapshot_id
+    assert "robokaya_startup_ready_seconds" in client.get("/metrics").text
+
+
+def test_import_does_not_load_solver_libraries():
+    """pypfopt/cvxpy/yfinance dimuat lambat (warm-up startup atau request pertama), bukan saat import."""
+    import os
+    import subprocess
+    import sys
+    code = "import sys, main; print(sorted(m for m in ('cvxpy', 'pypfopt', 'yfinance') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(main.__file__)), timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def parse_sse(text):
+    """Memecah body SSE menjadi daftar (event, data JSON)."""
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_recommendation_stream_emits_stage_events_then_result(monkeypatch):
+    """Endpoint SSE mengirim event per tahap pipeline lalu body rekomendasi yang sama dengan endpoint biasa."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []}
+    }
+
+    response = client.post("/api/v1/recommendations/stream", json=payload)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [name for name, _ in events] == ["data_fetched", "filters_applied", "solver_done", "allocation_ready", "result"]
+    assert events[0][1]["tickers"] == 4
+    assert events[1][1]["eligible"] >= 2
+    main.response_cache.clear()
+    assert events[-1][1] == client.post("/api/v1/recommendations", json=payload).json()
+
+
+def test_recommendation_stream_reports_pipeline_errors(monkeypatch):
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 50000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": ["Sektor Tidak Ada"], "principles": []}
+    }
+
+    events = parse_sse(client.post("/api/v1/recommendations/stream", json=payload).text)
+
+    assert events[-1][0] == "error"
+    assert events[-1][1]["status_code"] == 400
+
+
+def test_recommendation_stream_cancels_pipeline_when_client_disconnects(monkeypatch):
+    """Menutup stream (klien terputus) membuat pipeline berhenti di laporan tahap berikutnya."""
+    import asyncio
+    import threading
+    from progress import PipelineCancelled, cancellation_event, report_progress
+    stopped = threading.Event()
+
+    def slow_pipeline(request, if_none_match):
+        report_progress("data_fetched", tickers=4)
+        cancellation_event().wait(5) # Mensimulasikan solver yang masih berjalan
+        try:
+            report_progress("solver_done")
+        except PipelineCancelled:
+            stopped.set()
+            raise
+        return '"etag"', b"{}"
+    monkeypatch.setattr(main, "build_cached_recommendation", slow_pipeline)
+    request = main.PortfolioRequest(initial_capital=50000000, investment_goal="Mengembangkan Kekayaan",
+                                    time_horizon="Antara 8 - 15 tahun",
+                                    risk_answers={"q1": "C", "q2": "B", "q3": "A"},
+                                    preferences={"sectors": [], "principles": []})
+
+    async def disconnect_after_first_event():
+        stream = main._stream_recommendation(request)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    first = asyncio.run(disconnect_after_first_event())
+
+    assert first.startswith("event: data_fetched")
+    assert stopped.wait(5)
+
+
+def test_sparse_mode_limits_holdings_to_purchasable_lots(monkeypatch):
+    """Dengan max_holdings, rekomendasi memuat paling banyak K saham dan masing-masing minimal satu lot."""
+    monkeypatch.setattr("main.fetch_yfinance_data", mock_fetch_success_data)
+    payload = {
+        "initial_capital": 1000000,
+        "investment_goal": "Mengembangkan Kekayaan",
+        "time_horizon": "Antara 8 - 15 tahun",
+        "risk_answers": {"q1": "C", "q2": "B", "q3": "A"},
+        "preferences": {"sectors": [], "principles": []},
+        "max_holdings": 2
+    }
+
+    response = client.post("/api/v1/recommendations", json=payload)
+
+    assert response.status_code == 200, response.text
+    details = response.json()["portfolio_recommendation"]["allocation_details"]
+    assert 1 <= len(details) <= 2
+    assert all(item["lots"] >= 1 for item in details)
+    assert client.post("/api/v1/recommendations", json=dict(payload, max_holdings=0)).status_code == 422
+
+    held = client.post("/api/v1/recommendations/backtest?lookback_days=120", json=payload)
+    assert held.status_code == 200, held.text
+    assert sum(w > 0 for w in held.json()["rebalances"][0]["weights"].values()) <= 2
+    rebalanced = client.post("/api/v1/recommendations/backtest?rebalance=monthly&lookback_days=120", json=payload)
+    assert rebalanced.status_code == 400
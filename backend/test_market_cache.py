@@ -0,0 +1,171 @@
+# test_market_cache.py
+import pandas as pd
+
+from market_cache import MarketDataCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_frames(n_rows: int = 10):
+    df_fundamentals = pd.DataFrame({'marketCap': [6e12, 8e12]}, index=['AAA.JK', 'BBB.JK'])
+    df_prices = pd.DataFrame({
+        'AAA.JK': range(100, 100 + n_rows),
+        'BBB.JK': range(200, 200 + n_rows),
+    }, index=pd.date_range(start='2024-01-01', periods=n_rows, freq='B'))
+    return df_fundamentals, df_prices
+
+
+def make_cache(clock, calls):
+    def load_all():
+        calls.append('all')
+        return make_frames()
+
+    def load_prices(df_fundamentals):
+        calls.append('prices')
+        return df_fundamentals, make_frames(n_rows=11)[1]
+
+    return MarketDataCache(load_all=load_all, load_prices=load_prices,
+                           price_ttl=100, fundamentals_ttl=1000, max_stale=500, clock=clock)
+
+
+def test_cold_cache_loads_once_then_serves_from_memory():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+
+    first = cache.get()
+    second = cache.get()
+
+    assert first is second
+    assert calls == ['all']
+    assert first.data_as_of_date == '2024-01-12'
+
+
+def test_stale_prices_are_served_while_refreshing_prices_only():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    original = cache.get()
+
+    clock.now += 150  # harga basi, fundamental masih segar
+    served = cache.get()
+    cache._background_thread.join(timeout=5)
+
+    assert served is original
+    assert calls == ['all', 'prices']
+    assert len(cache.snapshot.df_prices) == 11
+    assert cache.snapshot.fundamentals_fetched_at == original.fundamentals_fetched_at
+
+
+def test_stale_fundamentals_trigger_full_reload():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    cache.get()
+
+    clock.now += 1500
+    cache.refresh_if_stale()
+
+    assert calls == ['all', 'all']
+
+
+def test_failed_refresh_keeps_serving_old_snapshot():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    original = cache.get()
+    cache._load_prices = lambda df_fundamentals: (None, None)
+
+    clock.now += 600  # melewati max_stale, refresh gagal -> tetap pakai snapshot lama
+    assert cache.get() is original
+    assert cache.refresh_in_background() is False  # sedang dalam jeda retry
+
+
+def test_cache_is_warmed_from_store_before_hitting_the_network():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    df_fundamentals, df_prices = make_frames()
+    cache._load_stored = lambda: (df_fundamentals, df_prices, clock.now - 10, clock.now - 10)
+
+    snapshot = cache.get()
+
+    assert snapshot.df_prices is df_prices
+    assert calls == []
+
+
+def test_follower_never_fetches_and_adopts_published_snapshot():
+    clock, calls = FakeClock(), []
+    leader = make_cache(clock, calls)
+    published = leader.get()
+    follower = make_cache(clock, calls)
+    follower.fetch_enabled = False
+
+    assert follower.get() is None
+    assert follower.adopt(published)
+    clock.now += 10_000  # jauh melewati max_stale: pengikut tetap tidak menarik data sendiri
+    assert follower.get() is published
+    assert not follower.adopt(published)
+    assert calls == ['all']
+
+
+def test_on_refresh_receives_each_new_snapshot():
+    clock, calls, published = FakeClock(), [], []
+    cache = make_cache(clock, calls)
+    cache._on_refresh = published.append
+
+    snapshot = cache.get()
+
+    assert published == [snapshot]
+
+
+def test_fallback_data_keeps_recorded_timestamp():
+    clock, calls, published = FakeClock(), [], []
+    cache = make_cache(clock, calls)
+    cache._on_refresh = published.append
+    recorded_at = clock.now - 3 * 24 * 3600
+    cache._fallback_usage = lambda: (recorded_at, recorded_at)
+
+    snapshot = cache.get()
+
+    assert snapshot.prices_fetched_at == recorded_at
+    assert snapshot.fundamentals_fetched_at == recorded_at
+    assert published == [snapshot]
+    assert cache.get() is snapshot # Dalam jeda retry: tidak menunggu Yahoo lagi
+    assert calls == ['all']
+
+    cache._fallback_usage = lambda: (None, None)
+    clock.now += cache.retry_interval
+    fresh = cache.get()
+    assert fresh.prices_fetched_at == clock.now
+    assert published == [snapshot, fresh]
+
+
+def test_fallback_fundamentals_never_discard_fresh_prices():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    df_fundamentals, df_prices = make_frames()
+    # Harga 1 hari, fundamental 8 hari (sudah melewati TTL): refresh penuh, satu ticker dari rekaman
+    cache._load_stored = lambda: (df_fundamentals, df_prices, clock.now - 86_400, clock.now - 8 * 86_400)
+    cache.warm_from_store()
+    fundamentals_recorded_at = clock.now - 10 * 86_400
+    cache._fallback_usage = lambda: (None, fundamentals_recorded_at)
+
+    snapshot = cache.refresh_if_stale()
+
+    assert snapshot is not None
+    assert len(snapshot.df_prices) == 10 and snapshot.prices_fetched_at == clock.now
+    assert snapshot.fundamentals_fetched_at == fundamentals_recorded_at
+    assert cache.refresh_in_background() is False # Yahoo dicoba lagi setelah retry_interval
+
+
+def test_fallback_prices_older_than_snapshot_are_discarded():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    original = cache.get()
+    cache._fallback_usage = lambda: (original.prices_fetched_at - 10, None)
+
+    clock.now += 600
+    assert cache.get() is original
+    assert cache.snapshot is original
@@ -0,0 +1,40 @@
+# test_metrics.py
+from metrics import MetricsRegistry, format_timing_header, reset_request_timing, span, start_request_timing, STAGE_SECONDS
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_events_total", "Contoh counter.", ["kind"])
+    histogram = registry.histogram("test_seconds", "Contoh histogram.", ["stage"], buckets=(0.1, 1.0))
+    counter.inc(kind="a")
+    counter.inc(2, kind="a")
+    histogram.observe(0.05, stage="x")
+    histogram.observe(0.5, stage="x")
+    histogram.observe(5.0, stage="x")
+
+    text = registry.render()
+
+    assert "# TYPE test_events_total counter" in text
+    assert 'test_events_total{kind="a"} 3' in text
+    assert 'test_seconds_bucket{stage="x",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="x",le="1"} 2' in text
+    assert 'test_seconds_bucket{stage="x",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="x"} 3' in text
+
+
+def test_span_records_into_request_timings_and_histogram():
+    before = STAGE_SECONDS.count(stage="unit_test_stage")
+    token = start_request_timing()
+    with span("unit_test_stage"):
+        pass
+    timings = reset_request_timing(token)
+
+    assert [stage for stage, _ in timings] == ["unit_test_stage"]
+    assert STAGE_SECONDS.count(stage="unit_test_stage") == before + 1
+    assert format_timing_header([("solver", 0.0123)]) == "solver;dur=12.3"
+
+
+def test_span_outside_request_only_records_histogram():
+    with span("unit_test_background"):
+        pass
+    assert STAGE_SECONDS.count(stage="unit_test_background") >= 1
@@ -0,0 +1,19 @@
+# test_portfolio_math.py
+import numpy as np
+import pandas as pd
+from pypfopt import EfficientFrontier
+
+from portfolio_math import portfolio_performance, sharpe_ratio
+
+
+def test_performance_matches_pypfopt():
+    mu = pd.Series([0.08, 0.12, 0.18], index=['A', 'B', 'C'])
+    vols = np.array([0.10, 0.18, 0.30])
+    corr = np.array([[1.0, 0.2, 0.1], [0.2, 1.0, 0.3], [0.1, 0.3, 1.0]])
+    S = pd.DataFrame(corr * np.outer(vols, vols), index=mu.index, columns=mu.index)
+    ef = EfficientFrontier(mu, S)
+    weights = np.array(list(ef.max_sharpe().values()))
+
+    np.testing.assert_allclose(portfolio_performance(weights, mu.to_numpy(), S.to_numpy()),
+                               ef.portfolio_performance(), rtol=1e-9)
+    assert sharpe_ratio(0.1, 0.0) == 0.0
@@ -0,0 +1,123 @@
+# test_price_store.py
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import main
+from price_store import PriceStore
+
+
+def make_prices(start='2024-01-01', periods=5, tickers=('AAA.JK', 'BBB.JK')):
+    index = pd.date_range(start=start, periods=periods, freq='B')
+    return pd.DataFrame({t: np.arange(periods, dtype=float) + 100 * (i + 1) for i, t in enumerate(tickers)},
+                        index=index)
+
+
+def is_memory_mapped(array) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def test_prices_round_trip_as_read_only_memory_map(tmp_path):
+    store = PriceStore(tmp_path)
+    df_prices = make_prices()
+    store.save_prices(df_prices, fetched_at=123.0, requested_tickers=['AAA.JK', 'BBB.JK', 'CCC.JK'])
+
+    loaded, fetched_at, requested = store.load_prices()
+
+    pd.testing.assert_frame_equal(loaded, df_prices, check_names=False, check_freq=False)
+    assert fetched_at == 123.0
+    assert requested == ['AAA.JK', 'BBB.JK', 'CCC.JK']
+    assert is_memory_mapped(loaded.to_numpy())
+    assert not loaded.to_numpy().flags.writeable
+
+
+def test_saving_replaces_previous_array_file(tmp_path):
+    store = PriceStore(tmp_path)
+    store.save_prices(make_prices(), fetched_at=1.0, requested_tickers=['AAA.JK', 'BBB.JK'])
+    store.save_prices(make_prices(periods=6), fetched_at=2.0, requested_tickers=['AAA.JK', 'BBB.JK'])
+
+    assert len(list(tmp_path.glob('prices-*.npy'))) == 1
+    assert len(store.load_prices()[0]) == 6
+
+
+def test_fundamentals_round_trip_keeps_missing_values(tmp_path):
+    store = PriceStore(tmp_path)
+    df_fundamentals = pd.DataFrame({
+        'company_name': ['Bank A', 'Bank B'], 'is_syariah': [False, True],
+        'marketCap': [6e12, 8e12], 'pe_ratio': [15.0, None],
+    }, index=pd.Index(['AAA.JK', 'BBB.JK'], name='ticker'))
+    store.save_fundamentals(df_fundamentals, fetched_at=5.0)
+
+    loaded, fetched_at = store.load_fundamentals()
+
+    assert fetched_at == 5.0
+    assert loaded.loc['BBB.JK', 'is_syariah'] == True
+    assert pd.isna(loaded.loc['BBB.JK', 'pe_ratio'])
+    assert loaded['pe_ratio'].dtype == float
+
+
+def test_fetch_price_data_only_downloads_days_after_last_stored_date(tmp_path, monkeypatch):
+    store = PriceStore(tmp_path)
+    today = pd.Timestamp(datetime.now().date())
+    source = make_prices(start=today - pd.Timedelta(days=20), periods=7)
+    stored = source.iloc[:5]
+    store.save_prices(stored, fetched_at=1.0, requested_tickers=['AAA.JK', 'BBB.JK'])
+    monkeypatch.setattr(main, "price_store", store)
+    monkeypatch.setattr(main, "PRICE_OVERLAP_DAYS", 2)
+
+    requested_ranges = []
+
+    def fake_download(tickers, start_date, end_date):
+        requested_ranges.append((list(tickers), start_date))
+        return source.loc[source.index >= pd.Timestamp(start_date.date()), list(tickers)]
+
+    monkeypatch.setattr(main, "download_price_data", fake_download)
+    df_prices = main.fetch_price_data(['AAA.JK', 'BBB.JK'])
+
+    # Hanya 2 hari tersimpan terakhir (pembanding) + hari baru; harga tidak berubah -> tanpa unduh penuh
+    assert requested_ranges == [(['AAA.JK', 'BBB.JK'], stored.index[-2].to_pydatetime())]
+    assert len(df_prices) == 7
+    assert len(store.load_prices()[0]) == 7
+
+
+def test_readjusted_history_is_downloaded_again_in_full(tmp_path, monkeypatch):
+    store = PriceStore(tmp_path)
+    today = pd.Timestamp(datetime.now().date())
+    stored = make_prices(start=today - pd.Timedelta(days=20), periods=5)
+    store.save_prices(stored, fetched_at=1.0, requested_tickers=['AAA.JK', 'BBB.JK'])
+    monkeypatch.setattr(main, "price_store", store)
+    # Split 1:2 pada AAA: Yahoo menyesuaikan ulang seluruh riwayatnya (harga lama ikut dibagi dua)
+    source = make_prices(start=stored.index[0], periods=7)
+    source['AAA.JK'] /= 2
+
+    requested_ranges = []
+
+    def fake_download(tickers, start_date, end_date):
+        requested_ranges.append((list(tickers), start_date))
+        return source.loc[source.index >= pd.Timestamp(start_date.date()), list(tickers)]
+
+    monkeypatch.setattr(main, "download_price_data", fake_download)
+    df_prices = main.fetch_price_data(['AAA.JK', 'BBB.JK'])
+
+    assert [tickers for tickers, _ in requested_ranges] == [['AAA.JK', 'BBB.JK'], ['AAA.JK']]
+    pd.testing.assert_frame_equal(df_prices, source, check_freq=False, check_names=False)
+    assert not df_prices['AAA.JK'].pct_change().abs().gt(0.1).any() # Tidak ada lonjakan palsu di sambungan
+    pd.testing.assert_frame_equal(store.load_prices()[0], source, check_freq=False, check_names=False)
+
+
+def test_stored_snapshot_warms_cache_without_copying_prices(tmp_path, monkeypatch):
+    store = PriceStore(tmp_path)
+    store.save_prices(make_prices(), fetched_at=10.0, requested_tickers=['AAA.JK', 'BBB.JK'])
+    store.save_fundamentals(pd.DataFrame({'marketCap': [6e12, 8e12]}, index=['AAA.JK', 'BBB.JK']), fetched_at=5.0)
+    monkeypatch.setattr(main, "price_store", store)
+
+    df_fundamentals, df_prices, prices_fetched_at, fundamentals_fetched_at = main.load_stored_market_data()
+
+    assert list(df_fundamentals.index) == ['AAA.JK', 'BBB.JK']
+    assert (prices_fetched_at, fundamentals_fetched_at) == (10.0, 5.0)
+    assert is_memory_mapped(df_prices.to_numpy())
@@ -0,0 +1,105 @@
+# test_providers.py
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_store import PriceStore
+from providers import (FailoverProvider, MarketDataProvider, RecordingProvider, ReplayProvider,
+                       YFinanceProvider, create_provider)
+
+
+class FakeLiveProvider(MarketDataProvider):
+    name = "fake"
+
+    def __init__(self, df_close=None, infos=None, fail=False):
+        self.df_close = df_close
+        self.infos = infos or {}
+        self.fail = fail
+
+    def download_close(self, tickers, start_date, end_date):
+        if self.fail:
+            raise RuntimeError("Too Many Requests")
+        return self.df_close[[t for t in tickers if t in self.df_close.columns]]
+
+    def fetch_info(self, ticker):
+        if self.fail:
+            raise RuntimeError("Too Many Requests")
+        return self.infos[ticker]
+
+
+def make_close(tickers=('AAA.JK', 'BBB.JK'), periods=10):
+    index = pd.bdate_range('2024-01-01', periods=periods)
+    return pd.DataFrame({t: np.linspace(100, 110, periods) * (i + 1) for i, t in enumerate(tickers)}, index=index)
+
+
+def test_recorded_responses_replay_without_network(tmp_path):
+    df_close = make_close()
+    infos = {'AAA.JK': {'shortName': 'A', 'sector': 'Energi', 'marketCap': 6e12, 'trailingPE': 10.0,
+                        'returnOnEquity': 0.2, 'debtToEquity': 0.5, 'longBusinessSummary': 'tidak direkam'}}
+    recorder = RecordingProvider(FakeLiveProvider(df_close, infos), tmp_path)
+    recorder.download_close(['AAA.JK', 'BBB.JK'], datetime(2024, 1, 1), datetime(2024, 2, 1))
+    recorder.fetch_info('AAA.JK')
+    assert PriceStore(tmp_path).load_infos() == {} # Info ditampung sampai flush
+    recorder.flush()
+
+    replay = ReplayProvider(tmp_path)
+    replayed = replay.download_close(['AAA.JK', 'BBB.JK'], datetime(2024, 1, 3), datetime(2024, 1, 10))
+
+    assert replayed.index.min() == pd.Timestamp('2024-01-03')
+    assert replayed.index.max() == pd.Timestamp('2024-01-09')
+    np.testing.assert_allclose(replayed.to_numpy(), df_close.loc['2024-01-03':'2024-01-09'].to_numpy())
+    assert replay.fetch_info('AAA.JK')['marketCap'] == 6e12
+    assert 'longBusinessSummary' not in replay.fetch_info('AAA.JK')
+    with pytest.raises(LookupError):
+        replay.fetch_info('BBB.JK')
+
+
+def test_replay_reconstructs_infos_from_stored_fundamentals(tmp_path):
+    store = PriceStore(tmp_path)
+    store.save_prices(make_close(), 1.0, ['AAA.JK', 'BBB.JK'])
+    store.save_fundamentals(pd.DataFrame({
+        'company_name': ['A', 'B'], 'sector': ['Energi', 'Perbankan'], 'is_syariah': [True, False],
+        'marketCap': [6e12, 7e12], 'pe_ratio': [10.0, None], 'roe': [0.2, 0.1], 'der': [0.5, 1.0]
+    }, index=pd.Index(['AAA.JK', 'BBB.JK'], name='ticker')), 1.0)
+
+    info = ReplayProvider(tmp_path).fetch_info('BBB.JK')
+
+    assert info['shortName'] == 'B'
+    assert info['marketCap'] == 7e12
+    assert info['trailingPE'] is None
+
+
+def test_failover_uses_recordings_when_live_provider_is_throttled(tmp_path):
+    recorder = RecordingProvider(FakeLiveProvider(make_close(), {'AAA.JK': {'marketCap': 6e12}}), tmp_path)
+    recorder.fetch_info('AAA.JK')
+    recorder.flush()
+    PriceStore(tmp_path).save_prices(make_close(), 1.0, ['AAA.JK', 'BBB.JK'])
+    provider = FailoverProvider(FakeLiveProvider(fail=True), ReplayProvider(tmp_path))
+    assert provider.fallback_usage == (None, None)
+
+    df_close = provider.download_close(['AAA.JK'], datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+    assert list(df_close.columns) == ['AAA.JK']
+    assert provider.fallback_usage == (1.0, None) # Waktu rekam asli harga; info masih live
+    with pytest.raises(RuntimeError):
+        provider.fetch_info('AAA.JK') # Error diteruskan agar retry pemanggil tetap berjalan
+    assert provider.fetch_fallback_info('AAA.JK') == {'marketCap': 6e12}
+    with pytest.raises(LookupError):
+        provider.fetch_fallback_info('BBB.JK')
+    assert provider.fallback_usage == (1.0, provider.fallback.infos_recorded_at) # Per ticker info
+
+    provider.reset_fallback_usage()
+    assert provider.fallback_usage == (None, None)
+
+
+def test_create_provider_from_configuration(tmp_path):
+    assert isinstance(create_provider("yfinance"), YFinanceProvider)
+    assert isinstance(create_provider("yfinance", str(tmp_path / "tidak-ada"), snapshot_dir=str(tmp_path)), FailoverProvider)
+    assert isinstance(create_provider("replay", str(tmp_path)), ReplayProvider)
+    assert isinstance(create_provider("record", str(tmp_path)), RecordingProvider)
+    with pytest.raises(ValueError):
+        create_provider("replay")
+    with pytest.raises(ValueError):
+        create_provider("bloomberg", str(tmp_path))
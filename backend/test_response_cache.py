@@ -0,0 +1,38 @@
+# test_response_cache.py
+from response_cache import ResponseCache, SQLiteResponseStore, canonical_request_hash, etag_matches, make_etag
+
+
+def test_canonical_hash_ignores_key_and_preference_order():
+    a = {"initial_capital": 5e7, "preferences": {"sectors": ["B", "A", "A"], "principles": ["Syariah"]}}
+    b = {"preferences": {"principles": ["Syariah"], "sectors": ["A", "B"]}, "initial_capital": 50000000}
+    c = {"initial_capital": 5e7, "preferences": {"sectors": ["A"], "principles": ["Syariah"]}}
+
+    assert canonical_request_hash(a) == canonical_request_hash(b)
+    assert canonical_request_hash(a) != canonical_request_hash(c)
+
+
+def test_etag_depends_on_snapshot_and_matches_header_forms():
+    request_hash = canonical_request_hash({"x": 1})
+    etag = make_etag(request_hash, "snap-1")
+
+    assert etag != make_etag(request_hash, "snap-2")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_sqlite_store_shares_hits_between_caches_and_evicts(tmp_path):
+    path = tmp_path / "responses.sqlite"
+    worker_a = ResponseCache(4, SQLiteResponseStore(path, max_entries=2))
+    worker_b = ResponseCache(4, SQLiteResponseStore(path, max_entries=2))
+
+    worker_a.put('"e1"', b'{"a":1}')
+    assert worker_b.get('"e1"') == b'{"a":1}'
+
+    worker_a.put('"e2"', b'{"a":2}')
+    worker_a.put('"e3"', b'{"a":3}')
+    store = SQLiteResponseStore(path)
+    assert store.get('"e3"') == b'{"a":3}'
+    assert sum(store.get(e) is not None for e in ('"e1"', '"e2"', '"e3"')) == 2
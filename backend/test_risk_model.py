@@ -0,0 +1,59 @@
+# test_risk_model.py
+import numpy as np
+import pandas as pd
+
+import risk_model
+from risk_model import RiskModelRegistry, UniverseRiskModel
+
+
+def make_prices(n_tickers=5, n_rows=300, seed=7):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.001, 0.01, size=(n_rows, n_tickers))
+    prices = 1000 * np.exp(np.cumsum(returns, axis=0))
+    return pd.DataFrame(prices, columns=[f"T{i}.JK" for i in range(n_tickers)],
+                        index=pd.date_range(start='2023-01-02', periods=n_rows, freq='B'))
+
+
+def test_subset_is_a_slice_of_the_universe_statistics():
+    model = UniverseRiskModel(make_prices(), snapshot_id="s1")
+
+    mu, S = model.subset(['T3.JK', 'T1.JK'])
+
+    assert list(mu.index) == ['T3.JK', 'T1.JK']
+    assert S.loc['T3.JK', 'T1.JK'] == model.cov.loc['T3.JK', 'T1.JK']
+    assert np.all(np.linalg.eigvalsh(S.values) > 0)
+
+
+def test_optimized_weights_are_cached_per_ticker_set_and_target(monkeypatch):
+    model = UniverseRiskModel(make_prices(), snapshot_id="s1")
+    calls = []
+    real_solve = risk_model.solve_portfolio
+
+    def counting_solve(mu, S, target):
+        calls.append(target)
+        return real_solve(mu, S, target)
+
+    monkeypatch.setattr(risk_model, "solve_portfolio", counting_solve)
+
+    first, perf = model.optimize(['T0.JK', 'T1.JK', 'T2.JK'], "min_volatility")
+    second, _ = model.optimize(['T2.JK', 'T1.JK', 'T0.JK'], "min_volatility")
+    model.optimize(['T0.JK', 'T1.JK', 'T2.JK'], "max_sharpe")
+
+    assert first == second
+    assert abs(sum(first.values()) - 1) < 1e-3
+    assert calls == ["min_volatility", "max_sharpe"]
+    assert len(perf) == 3
+
+
+def test_registry_rebuilds_model_for_new_snapshot():
+    registry = RiskModelRegistry()
+    df_prices = make_prices()
+
+    first = registry.get("s1", df_prices)
+    assert registry.get("s1", df_prices) is first
+
+    first.optimize(['T0.JK', 'T1.JK'], "min_volatility")
+    second = registry.get("s2", df_prices)
+
+    assert second is not first
+    assert len(registry.weights_cache) == 0
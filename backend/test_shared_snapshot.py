@@ -0,0 +1,62 @@
+# test_shared_snapshot.py
+import numpy as np
+import pandas as pd
+
+from market_cache import MarketSnapshot
+from shared_snapshot import LeaderLock, SharedSnapshotStore
+
+
+def is_memory_mapped(array) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def make_snapshot(snapshot_id, fetched_at=100.0):
+    df_fundamentals = pd.DataFrame({'sector': ['Perbankan', 'Teknologi'], 'is_syariah': [True, False],
+                                    'marketCap': [6e12, 8e12]}, index=['AAA.JK', 'BBB.JK'])
+    df_prices = pd.DataFrame({'AAA.JK': np.arange(5.0) + 100, 'BBB.JK': np.arange(5.0) + 200},
+                             index=pd.date_range(start='2024-01-01', periods=5, freq='B'))
+    return MarketSnapshot(df_fundamentals=df_fundamentals, df_prices=df_prices, prices_fetched_at=fetched_at,
+                          fundamentals_fetched_at=fetched_at - 50, snapshot_id=snapshot_id)
+
+
+def test_published_snapshot_is_loaded_memory_mapped_by_other_workers(tmp_path):
+    leader, worker = SharedSnapshotStore(tmp_path), SharedSnapshotStore(tmp_path)
+    assert worker.load() is None
+
+    assert leader.publish(make_snapshot("s1"))
+    assert not leader.publish(make_snapshot("s1"))  # sudah aktif: tidak ditulis ulang
+    loaded = worker.load()
+
+    assert worker.current_id() == "s1"
+    assert loaded.snapshot_id == "s1"
+    assert loaded.prices_fetched_at == 100.0 and loaded.fundamentals_fetched_at == 50.0
+    assert is_memory_mapped(loaded.df_prices.to_numpy())
+    pd.testing.assert_frame_equal(loaded.df_prices, make_snapshot("s1").df_prices,
+                                  check_names=False, check_freq=False)
+    assert loaded.df_fundamentals["is_syariah"].tolist() == [True, False]
+
+
+def test_publish_switches_current_and_prunes_old_snapshots(tmp_path):
+    store = SharedSnapshotStore(tmp_path, keep=2)
+    for i, snapshot_id in enumerate(("s1", "s2", "s3")):
+        store.publish(make_snapshot(snapshot_id, fetched_at=100.0 + i))
+
+    assert store.current_id() == "s3"
+    assert sorted(p.name for p in (tmp_path / "snapshots").iterdir()) == ["s2", "s3"]
+    assert store.load().prices_fetched_at == 102.0
+
+
+def test_leader_lock_is_exclusive_until_released(tmp_path):
+    first, second = LeaderLock(tmp_path / "leader.lock"), LeaderLock(tmp_path / "leader.lock")
+
+    assert first.try_acquire()
+    assert first.try_acquire()
+    assert not second.try_acquire()
+
+    first.release()
+    assert second.try_acquire() and second.held
+    second.release()
@@ -0,0 +1,49 @@
+# test_simulation.py
+import math
+
+import numpy as np
+import pytest
+
+from simulation import portfolio_log_dynamics, simulate_wealth
+
+
+def make_inputs():
+    mu = np.array([0.12, 0.08, 0.10])
+    vols = np.array([0.25, 0.15, 0.20])
+    corr = np.array([[1.0, 0.3, 0.5], [0.3, 1.0, 0.2], [0.5, 0.2, 1.0]])
+    return np.array([0.5, 0.3, 0.2]), mu, corr * np.outer(vols, vols)
+
+
+def test_portfolio_dynamics_match_portfolio_variance():
+    weights, mu, S = make_inputs()
+    drift, volatility = portfolio_log_dynamics(weights, mu, S)
+
+    assert volatility == pytest.approx(np.sqrt(weights @ S @ weights))
+    assert drift == pytest.approx(weights @ mu - 0.5 * volatility ** 2)
+
+
+def test_simulated_median_and_goal_probability_match_lognormal_closed_form():
+    weights, mu, S = make_inputs()
+    drift, volatility = portfolio_log_dynamics(weights, mu, S)
+    years, capital, goal = 10, 100_000_000, 200_000_000
+
+    result = simulate_wealth(weights, mu, S, capital, years, 50_000, goal, seed=1)
+
+    median = result["percentile_bands"][-1]["p50"]
+    assert median == pytest.approx(capital * np.exp(drift * years), rel=0.02)
+    z = (np.log(goal / capital) - drift * years) / (volatility * np.sqrt(years))
+    expected_probability = 0.5 * (1 - math.erf(z / np.sqrt(2)))
+    assert result["probability_of_reaching_goal"] == pytest.approx(expected_probability, abs=0.01)
+    assert len(result["percentile_bands"]) == years
+    band = result["percentile_bands"][4]
+    assert band["p5"] < band["p25"] < band["p50"] < band["p75"] < band["p95"]
+
+
+def test_simulation_is_reproducible_with_seed_and_goal_is_optional():
+    weights, mu, S = make_inputs()
+    first = simulate_wealth(weights, mu, S, 1e8, 3, 2_000, seed=7)
+    second = simulate_wealth(weights, mu, S, 1e8, 3, 2_000, seed=7)
+
+    assert first == second
+    assert first["probability_of_reaching_goal"] is None
+    assert 0 <= first["probability_of_loss"] <= 1
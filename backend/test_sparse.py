@@ -0,0 +1,56 @@
+# test_sparse.py
+import time
+
+import numpy as np
+
+from portfolio_math import portfolio_performance
+from sparse import prescreen_candidates, prune_to_cardinality
+
+
+def make_universe(n, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 5)) * 0.1
+    S = factors @ factors.T + np.diag(rng.uniform(0.02, 0.2, n))
+    mu = rng.normal(0.1, 0.08, n)
+    lot_prices = rng.uniform(50, 20_000, n) * 100
+    return mu, S, lot_prices
+
+
+def test_prescreen_keeps_only_affordable_best_scores():
+    mu = np.array([0.30, 0.25, 0.05, 0.20])
+    variances = np.array([0.04, 0.04, 0.04, 0.04])
+    lot_prices = np.array([2e6, 1e5, 1e5, 1e5])  # saham pertama tidak terjangkau dengan modal 1 juta
+
+    candidates = prescreen_candidates(mu, variances, lot_prices, 1e6, max_holdings=1, optimization_target="max_sharpe")
+
+    assert 0 not in candidates
+    assert candidates.tolist()[:2] == [1, 3]
+
+
+def test_pruning_respects_cardinality_and_one_lot_minimum_for_large_universe():
+    mu, S, lot_prices = make_universe(600)
+    capital = 20_000_000
+    for target in ("max_sharpe", "min_volatility"):
+        started = time.perf_counter()
+        candidates = prescreen_candidates(mu, np.diag(S), lot_prices, capital, 8, target)
+        weights = prune_to_cardinality(mu[candidates], S[np.ix_(candidates, candidates)],
+                                       lot_prices[candidates] / capital, 8, target)
+        elapsed = time.perf_counter() - started
+
+        held = weights > 0
+        assert 1 <= held.sum() <= 8
+        assert abs(weights.sum() - 1) < 1e-9
+        assert (np.floor(capital * weights[held] / lot_prices[candidates][held]) >= 1).all()
+        assert elapsed < 5
+
+
+def test_max_sharpe_falls_back_to_min_volatility_when_no_asset_beats_risk_free_rate():
+    mu = np.array([0.01, 0.0, -0.02])
+    S = np.diag([0.04, 0.09, 0.16])
+
+    weights = prune_to_cardinality(mu, S, np.full(3, 0.01), 2, "max_sharpe")
+
+    assert (weights > 0).sum() <= 2
+    assert weights[0] == weights.max()
+    expected_return, volatility, _ = portfolio_performance(weights, mu, S)
+    assert volatility < 0.2 and expected_return < 0.02
@@ -0,0 +1,39 @@
+# test_strategy_table.py
+from strategy_table import build_strategy_table, table_combinations, table_key
+
+
+def test_combinations_cover_targets_syariah_and_sector_sets():
+    combos = list(table_combinations(['Energi', 'Perbankan', 'Energi'], ('max_sharpe', 'min_volatility'), max_sectors=1))
+
+    # (1 tanpa filter + 2 sektor tunggal) x 2 target x 2 syariah
+    assert len(combos) == 12
+    assert ('max_sharpe', True, ('Perbankan',)) in combos
+    assert ('min_volatility', False, ()) in combos
+    assert len(list(table_combinations(['A', 'B', 'C'], ('max_sharpe',), max_sectors=2))) == (1 + 3 + 3) * 2
+
+
+def test_identical_eligible_sets_are_solved_once():
+    eligible = {
+        (False, ()): ['A', 'B', 'C'],
+        (True, ()): ['A', 'B'],
+        (False, ('Energi',)): ['A', 'B'],  # Sama dengan syariah tanpa filter sektor
+        (True, ('Energi',)): ['A', 'B'],
+        (False, ('Perbankan',)): None,     # Tidak cukup saham
+        (True, ('Perbankan',)): None,
+    }
+    solved_problems = []
+
+    def solve_many(problems):
+        solved_problems.extend(problems)
+        return {p: ({t: 1 / len(p[0]) for t in p[0]}, (0.1, 0.2, 0.4)) for p in problems if p[1] == 'max_sharpe'}
+
+    table = build_strategy_table("snap-1", table_combinations(['Energi', 'Perbankan'], ('max_sharpe', 'min_volatility'), 1),
+                                 lambda syariah, sectors: eligible[(syariah, sectors)], solve_many)
+
+    assert sorted(solved_problems) == sorted([(('A', 'B', 'C'), 'max_sharpe'), (('A', 'B'), 'max_sharpe'),
+                                              (('A', 'B', 'C'), 'min_volatility'), (('A', 'B'), 'min_volatility')])
+    assert len(table) == 4  # Hanya kombinasi max_sharpe yang berhasil
+    assert table.get('max_sharpe', True, ['Energi']).tickers == ('A', 'B')
+    assert table.get('min_volatility', False, []) is None
+    assert table.get('max_sharpe', False, ['Perbankan']) is None
+    assert table_key('max_sharpe', 0, ['B', 'A', 'A']) == ('max_sharpe', False, ('A', 'B'))
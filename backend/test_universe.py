@@ -0,0 +1,52 @@
+# test_universe.py
+import numpy as np
+import pandas as pd
+
+from universe import UniverseIndex, load_universe
+
+
+def make_fundamentals():
+    return pd.DataFrame({
+        'company_name': ['A', 'B', 'C', 'D', 'E'],
+        'sector': ['Energi', 'Perbankan', 'Perbankan', 'Teknologi', 'Energi'],
+        'is_syariah': [True, False, True, True, True],
+        'marketCap': [6e12, 8e12, 7e12, 1e12, 9e12],  # D terlalu kecil
+        'pe_ratio': [10, 12, None, 15, 20],           # C tanpa PE -> dianggap 999 -> gagal
+        'roe': [0.2, 0.15, 0.2, 0.3, 0.1],
+        'der': [0.5, None, 0.4, 0.2, 1.0],            # B tanpa DER -> dianggap 0 -> lolos
+    }, index=['AAA.JK', 'BBB.JK', 'CCC.JK', 'DDD.JK', 'EEE.JK'])
+
+
+def make_prices(columns=('EEE.JK', 'BBB.JK', 'AAA.JK', 'CCC.JK')):
+    return pd.DataFrame(np.arange(3 * len(columns), dtype=float).reshape(3, len(columns)), columns=list(columns))
+
+
+def test_load_universe_parses_syariah_flags_and_dedupes(tmp_path):
+    path = tmp_path / "universe.csv"
+    path.write_text("ticker,company_name,sector,is_syariah\n"
+                    "aaa.jk,A,Energi,true\nBBB.JK,,Perbankan,0\nAAA.JK,A Baru,Energi,ya\n", encoding="utf-8")
+
+    df_universe = load_universe(path)
+
+    assert df_universe.index.tolist() == ['BBB.JK', 'AAA.JK']
+    assert df_universe.loc['AAA.JK', 'company_name'] == 'A Baru'
+    assert df_universe['is_syariah'].tolist() == [False, True]
+
+
+def test_eligible_mask_is_intersection_of_quality_preferences_and_prices():
+    index = UniverseIndex(make_fundamentals(), make_prices())
+
+    assert index.tickers_for(index.quality) == ['AAA.JK', 'BBB.JK', 'EEE.JK']
+    assert index.tickers_for(index.eligible_mask()) == ['AAA.JK', 'BBB.JK', 'EEE.JK']
+    assert index.tickers_for(index.eligible_mask(syariah_only=True)) == ['AAA.JK', 'EEE.JK']
+    assert index.tickers_for(index.eligible_mask(sectors=['Perbankan', 'Teknologi'])) == ['BBB.JK']
+    assert index.tickers_for(index.eligible_mask(sectors=['Tidak Ada'])) == []
+
+
+def test_price_columns_follow_eligible_ticker_order():
+    df_prices = make_prices(columns=('EEE.JK', 'AAA.JK'))  # BBB tidak punya data harga
+    index = UniverseIndex(make_fundamentals(), df_prices)
+    mask = index.eligible_mask()
+
+    assert index.tickers_for(mask) == ['AAA.JK', 'EEE.JK']
+    assert df_prices.columns[index.price_columns_for(mask)].tolist() == ['AAA.JK', 'EEE.JK']
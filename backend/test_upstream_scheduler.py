@@ -0,0 +1,93 @@
+# test_upstream_scheduler.py
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from concurrent_fetch import map_concurrently
+from metrics import UPSTREAM_CALLS, UPSTREAM_WAIT_SECONDS
+from providers import MarketDataProvider, YFinanceProvider, create_provider
+from upstream_scheduler import ScheduledProvider, TokenBucket, UpstreamScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class CountingProvider(MarketDataProvider):
+    name = "counting"
+
+    def __init__(self):
+        self.download_calls = []
+        self.info_calls = []
+        self._lock = threading.Lock()
+
+    def download_close(self, tickers, start_date, end_date):
+        self.download_calls.append(list(tickers))
+        return pd.DataFrame({t: [1.0, 2.0] for t in tickers}, index=pd.date_range("2023-01-02", periods=2))
+
+    def fetch_info(self, ticker):
+        with self._lock:
+            self.info_calls.append(ticker)
+        return {"symbol": ticker}
+
+
+def test_token_bucket_allows_burst_then_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [0.5]
+    bucket.acquire()
+    assert clock.now == 1.0
+
+
+def test_price_downloads_take_a_token_and_record_wait_time():
+    inner = CountingProvider()
+    provider = ScheduledProvider(inner, UpstreamScheduler(rate=5, burst=10))
+    calls_before = UPSTREAM_CALLS.value(operation="download")
+    waits_before = UPSTREAM_WAIT_SECONDS.count(operation="download")
+
+    df_close = provider.download_close(["AAA.JK", "BBB.JK"], datetime(2023, 1, 2), datetime(2024, 1, 2))
+
+    assert list(df_close.columns) == ["AAA.JK", "BBB.JK"]
+    assert inner.download_calls == [["AAA.JK", "BBB.JK"]]
+    assert UPSTREAM_CALLS.value(operation="download") - calls_before == 1
+    assert UPSTREAM_WAIT_SECONDS.count(operation="download") - waits_before == 1
+
+
+def test_info_tokens_are_taken_before_the_per_ticker_timeout_starts():
+    # 20 token/detik dengan burst 1: ticker keenam menunggu ~0.25 detik, jauh di atas timeout per ticker
+    scheduler = UpstreamScheduler(rate=20, burst=1)
+    inner = CountingProvider()
+    provider = ScheduledProvider(inner, scheduler)
+    tickers = [f"T{i:02d}.JK" for i in range(6)]
+
+    infos, errors = map_concurrently(provider.fetch_info, tickers, max_workers=6, timeout=0.05,
+                                     acquire=lambda: provider.acquire_slot("info"))
+
+    assert not errors
+    assert sorted(infos) == tickers
+    assert sorted(inner.info_calls) == tickers
+    assert scheduler.queue_depth == 0
+
+
+def test_create_provider_schedules_live_calls():
+    scheduler = UpstreamScheduler(rate=5, burst=10)
+    provider = create_provider("yfinance", scheduler=scheduler)
+    assert isinstance(provider, ScheduledProvider)
+    assert isinstance(provider.inner, YFinanceProvider)
+    assert provider.name == "yfinance"
@@ -0,0 +1,97 @@
+# universe.py
+"""Universe saham dari file data (ticker, sektor, status syariah) dan indeks eligibility per snapshot."""
+
+import logging
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("robokaya.universe")
+
+# Kriteria kualitas fundamental (sama dengan filter awal generate_optimal_portfolio)
+MIN_MARKET_CAP = 5e12
+MAX_PE_RATIO = 30
+MIN_ROE = 0.08
+MAX_DER = 2.0
+
+_TRUE_STRINGS = ("true", "1", "ya", "yes", "y")
+
+
+def load_universe(path) -> pd.DataFrame:
+    """
+    Membaca daftar saham dari CSV berkolom `ticker,company_name,sector,is_syariah`.
+
+    Mengembalikan DataFrame ber-index ticker; `sector` dan `company_name` boleh kosong
+    (dipakai sebagai cadangan jika Yahoo tidak mengembalikan datanya).
+    """
+    df_universe = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = {"ticker", "is_syariah"} - set(df_universe.columns)
+    if missing:
+        raise ValueError(f"File universe {path} tidak memiliki kolom: {', '.join(sorted(missing))}")
+    df_universe["ticker"] = df_universe["ticker"].str.strip().str.upper()
+    df_universe = df_universe[df_universe["ticker"] != ""].drop_duplicates("ticker", keep="last")
+    df_universe["is_syariah"] = df_universe["is_syariah"].str.strip().str.lower().isin(_TRUE_STRINGS)
+    for column in ("company_name", "sector"):
+        if column not in df_universe.columns:
+            df_universe[column] = ""
+    return df_universe.set_index("ticker")[["company_name", "sector", "is_syariah"]]
+
+
+def _numeric(df: pd.DataFrame, column: str, fill: float) -> np.ndarray:
+    return pd.to_numeric(df[column], errors="coerce").fillna(fill).to_numpy(dtype=float)
+
+
+class UniverseIndex:
+    """
+    Mask boolean (bitset) yang dihitung sekali per snapshot data pasar.
+
+    Urutan posisi mengikuti index `df_fundamentals`. Eligibility per request menjadi
+    irisan mask (kualitas & syariah & gabungan sektor & punya data harga) tanpa
+    menyalin DataFrame, dan kolom harga diambil lewat posisi yang sudah dipetakan.
+    """
+
+    def __init__(self, df_fundamentals: pd.DataFrame, df_prices: pd.DataFrame):
+        self.tickers = np.asarray(df_fundamentals.index, dtype=object)
+        self.position: Dict[str, int] = {t: i for i, t in enumerate(self.tickers)}
+        # Posisi kolom harga untuk setiap ticker fundamental (-1 jika tidak ada harganya)
+        self.price_positions = df_prices.columns.get_indexer(df_fundamentals.index)
+        self.has_prices = self.price_positions >= 0
+
+        market_cap = _numeric(df_fundamentals, "marketCap", 0)
+        pe_ratio = _numeric(df_fundamentals, "pe_ratio", 999)
+        roe = _numeric(df_fundamentals, "roe", -1)
+        der = _numeric(df_fundamentals, "der", 0)
+        self.quality = ((market_cap > MIN_MARKET_CAP) & (pe_ratio > 0) & (pe_ratio < MAX_PE_RATIO) &
+                        (roe > MIN_ROE) & (der < MAX_DER))
+        self.syariah = df_fundamentals["is_syariah"].fillna(False).to_numpy() == True
+
+        sectors = df_fundamentals["sector"].astype(str).to_numpy()
+        self.sector_masks: Dict[str, np.ndarray] = {sector: sectors == sector for sector in np.unique(sectors)}
+        self._empty = np.zeros(len(self.tickers), dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def sector_mask(self, sectors: Iterable[str]) -> np.ndarray:
+        """Gabungan (OR) mask sektor yang dipilih."""
+        mask = self._empty.copy()
+        for sector in sectors:
+            mask |= self.sector_masks.get(sector, self._empty)
+        return mask
+
+    def eligible_mask(self, syariah_only: bool = False, sectors: Iterable[str] = ()) -> np.ndarray:
+        mask = self.quality & self.has_prices
+        if syariah_only:
+            mask = mask & self.syariah
+        sectors = list(sectors)
+        if sectors:
+            mask = mask & self.sector_mask(sectors)
+        return mask
+
+    def tickers_for(self, mask: np.ndarray) -> List[str]:
+        return self.tickers[mask].tolist()
+
+    def price_columns_for(self, mask: np.ndarray) -> np.ndarray:
+        """Posisi kolom `df_prices` untuk ticker pada mask (urutan sama dengan `tickers_for`)."""
+        return self.price_positions[mask]
@@ -0,0 +1,101 @@
+# upstream_scheduler.py
+"""Pembatas laju panggilan keluar ke Yahoo (token bucket) beserta statistik antrean dan waktu tunggu."""
+
+import threading
+import time
+from typing import Callable
+
+from metrics import UPSTREAM_CALLS, UPSTREAM_WAIT_SECONDS
+from providers import MarketDataProvider
+
+
+class TokenBucket:
+    """
+    Pembatas laju: `rate` token per detik dengan kapasitas `burst`. `acquire` memblokir
+    pemanggil sampai satu token tersedia; `rate <= 0` berarti tanpa batas.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated_at = clock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+
+
+class UpstreamScheduler:
+    """
+    Setiap panggilan keluar ke Yahoo mengambil satu token terlebih dulu (batas laju per proses).
+
+    Tidak ada single-flight atau penggabungan batch di sini: semua fetch berjalan di bawah
+    kunci pembaruan `MarketDataCache` (satu fetch per proses, pemanggil serentak menunggu
+    fetch yang sama) dan `map_concurrently` sudah membuang ticker duplikat.
+
+    `queue_depth` (pemanggil yang sedang menunggu token) dan histogram waktu tunggu diekspor ke /metrics.
+    """
+
+    def __init__(self, rate: float, burst: int, sleep: Callable[[float], None] = time.sleep):
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def _track_waiting(self, delta: int) -> None:
+        with self._lock:
+            self._waiting += delta
+
+    def acquire(self, operation: str) -> None:
+        """Menunggu token untuk satu panggilan `operation` (`download` atau `info`)."""
+        queued_at = time.monotonic()
+        self._track_waiting(1)
+        try:
+            self.bucket.acquire()
+        finally:
+            self._track_waiting(-1)
+        UPSTREAM_WAIT_SECONDS.observe(time.monotonic() - queued_at, operation=operation)
+        UPSTREAM_CALLS.inc(operation=operation)
+
+
+class ScheduledProvider(MarketDataProvider):
+    """
+    Provider live yang panggilannya dibatasi `UpstreamScheduler`.
+
+    Unduhan harga mengambil token sendiri. `fetch_info` tidak: pemanggilnya (`map_concurrently`)
+    mengambil token lewat `acquire_slot` sebelum jam timeout per ticker dimulai, sehingga
+    antrean rate limit tidak membuat ticker dibuang karena timeout.
+    """
+
+    def __init__(self, inner: MarketDataProvider, scheduler: UpstreamScheduler):
+        self.inner = inner
+        self.scheduler = scheduler
+        self.name = inner.name
+
+    def acquire_slot(self, operation: str) -> None:
+        self.scheduler.acquire(operation)
+
+    def download_close(self, tickers, start_date, end_date):
+        self.scheduler.acquire("download")
+        return self.inner.download_close(tickers, start_date, end_date)
+
+    def fetch_info(self, ticker):
+        return self.inner.fetch_info(ticker)